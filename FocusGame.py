@@ -2,6 +2,10 @@
 #Date: 11/29/2020
 #Description: Contains classes and methods needed to play FocusGame.
 
+import compact_game
+import move_tables
+import variants
+import zobrist
 
 class Player:
     """
@@ -13,7 +17,10 @@ class Player:
     Player objects are stored in and used by FocusGame objects, so that the FocusGame object can utilize the Player's color,
     reserved, and captured attributes when doing game logic that checks for wins, makes reserve moves, puts pieces into
     reserve and capture, checks for correct color on top of the stack, etc.
+    Uses __slots__ instead of a per-instance dict, to keep games small when many are held in memory.
     """
+    __slots__ = ("_name", "_color", "_captured", "_reserved")
+
     def __init__(self, name, color):
         """
         Initializes a player of FocusGame. Takes in the player's name and color of piece they're playing.
@@ -71,6 +78,26 @@ class Player:
         """
         self._captured += 1
 
+    def decrement_captured_pieces(self):
+        """
+        Subtracts 1 from the number of captured pieces.
+        Used when undoing a move that captured pieces.
+        :return: None
+        """
+        self._captured -= 1
+
+    def copy(self):
+        """
+        Makes a new Player with the same name, color, and captured and reserved counts. Used by FocusGame.clone.
+        :return: copy of the player (Player object)
+        """
+        player = Player.__new__(Player)
+        player._name = self._name
+        player._color = self._color
+        player._captured = self._captured
+        player._reserved = self._reserved
+        return player
+
 
 class Space:
     """
@@ -78,16 +105,30 @@ class Space:
     with lowest piece at index 0, and top piece at highest index.
     Has methods for adding a piece, removing pieces from top and bottom, getting length, and getting the stack itself.
     Space objects are initialized in a 6x6 list of lists (to represent the board) when a FocusGame object is initialized.
+    Uses __slots__ instead of a per-instance dict, to keep games small when many are held in memory.
     """
-    #
+    __slots__ = ("_stack",)
+
     def __init__(self, starting_piece):
         """Initializes a Space object. If given a starting piece, adds that starting piece to the stack.
+        A color that is already upper case is stored as it is, so every piece of a color shares one string.
         :param starting_piece: the color of the piece on the space at the start of the game. (string)"""
         if not starting_piece:
             self._stack = []
+        elif starting_piece.isupper():
+            self._stack = [starting_piece]
         else:
             self._stack = [starting_piece.upper()]
 
+    def copy(self):
+        """
+        Makes a new Space with a copy of the stack. Used by FocusGame.clone.
+        :return: copy of the space (Space object)
+        """
+        space = Space.__new__(Space)
+        space._stack = self._stack[:]
+        return space
+
     def add_piece(self, piece):
         """
         Adds piece to top of the stack (end of the stack list).
@@ -96,6 +137,24 @@ class Space:
         """
         self._stack.append(piece)
 
+    def add_pieces_to_bottom(self, pieces):
+        """
+        Adds pieces to the bottom of the stack (beginning of the stack list), keeping their order.
+        Used when undoing a move that removed pieces from the bottom of the stack.
+        :param pieces: the colors of the pieces to add, bottom-most piece at index 0 (list of strings)
+        :return: None
+        """
+        self._stack[0:0] = pieces
+
+    def add_pieces_to_top(self, pieces):
+        """
+        Adds pieces to the top of the stack (end of the stack list), keeping their order.
+        Used when making a move, to put the moving pieces on the destination stack in one step.
+        :param pieces: the colors of the pieces to add, bottom-most piece at index 0 (list of strings)
+        :return: None
+        """
+        self._stack.extend(pieces)
+
     def pop_top(self):
         """
         Removes the piece on the top of the stack (at the end of the stack list) and returns it.
@@ -111,8 +170,8 @@ class Space:
         Used for checking the color of the piece on the top of the stack.
         :return: piece (string)
         """
-        if not self.is_empty():
-            return self._stack[len(self._stack) - 1]
+        if self._stack:
+            return self._stack[-1]
         return None
 
     def is_empty(self):
@@ -125,16 +184,17 @@ class Space:
             return True
         return False
 
-    def remove_pieces_from_bottom(self):
+    def remove_pieces_from_bottom(self, max_height=5):
         """
         If the stack has over 5 pieces in it, removes pieces from the bottom of the stack (beginning of the stack list)
         until the stack has only 5 pieces in it. Returns a list of all pieces removed and stores it in extra_pieces.
         Used when capturing and reserving pieces after a move has been made.
+        :param max_height: most pieces the stack can hold, for variants with a different stack cap (int)
         :return: extra_pieces (list of pieces removed)
         """
         extra_pieces = []
-        if len(self._stack) > 5:
-            extra_qty = len(self._stack) - 5
+        if len(self._stack) > max_height:
+            extra_qty = len(self._stack) - max_height
             for i in range(extra_qty):
                 extra_pieces.append(self._stack.pop(0))
         return extra_pieces
@@ -145,12 +205,14 @@ class Space:
         Used when making a single or multiple move.
         Returns a list of pieces in reverse order of how they'll be placed on the destination space,
         i.e. the top piece of the stack of moving pieces is at index 0 in piece_stack.
+        The pieces are sliced off the stack in one step rather than popped one at a time.
         :param num_pieces: number of pieces to remove from top (int)
         :return: piece_stack (list of pieces removed)
         """
-        piece_stack = []
-        for i in range(num_pieces):
-            piece_stack.append(self.pop_top())
+        start = max(len(self._stack) - num_pieces, 0)
+        piece_stack = self._stack[start:]
+        del self._stack[start:]
+        piece_stack.reverse()
         return piece_stack
 
     def get_length(self):
@@ -178,29 +240,113 @@ class FocusGame:
     Several methods validate user input for the main gameplay methods, such as is_correct_turn, is_valid_position,
     is_valid_location, and is_valid_piece_num.
     Additionally, there are methods to show current statuses within the game, such as show_pieces, show_reserve, and show_captured.
+    The board size, stack cap, win threshold and opening layout come from a Rules object (see variants.py); the
+    standard rules are used unless others are given.
     """
 
-    def __init__(self, player_a, player_b):
+    def __init__(self, player_a, player_b, rules=None):
         """
         Initializes a Focus Game. Takes in names and playing piece colors of two players and initializes Player objects.
         Player names cannot be identical, and are not case-sensitive.
         Initializes a 6x6 board (as a list of lists) of Space objects, which are each initialized with a Player object's color
         as its first piece in that Space's stack.
+        Also starts an empty history of moves made with apply_move, which is used by undo_move.
+        The index of which stacks each player controls is only built when legal moves are first generated (see
+        index_board), and the Zobrist hash of the position only when it is first asked for (see get_hash), so games that
+        are only played with move_piece do not pay for either.
         Initializes the current_turn attribute to None, so that either player can go first. After the first turn, the
         current_turn attribute will be set to a Player object and checked for equality with the current Player object at
         the start of each turn.
+        The board is laid out from the opening layout of the rules; spaces of the grid that are not on the board (the
+        corners, on a board with edge extensions) are None.
         :param player_a: tuple containing: (player A name, player A color)
         :param player_b: tuple containing: (player B name, player A color)
+        :param rules: rules of the variant to play, or None for the standard rules (Rules object)
         """
+        self._rules = rules if rules is not None else variants.STANDARD_RULES
         self._player_a = Player(player_a[0].upper(), player_a[1].upper())
         self._player_b = Player(player_b[0].upper(), player_b[1].upper())
         self._current_turn = None  # will be Player object
-        self._board = [[Space(self._player_a.get_color()), Space(self._player_a.get_color()), Space(self._player_b.get_color()), Space(self._player_b.get_color()), Space(self._player_a.get_color()), Space(self._player_a.get_color())],
-                      [Space(self._player_b.get_color()), Space(self._player_b.get_color()), Space(self._player_a.get_color()), Space(self._player_a.get_color()), Space(self._player_b.get_color()), Space(self._player_b.get_color())],
-                      [Space(self._player_a.get_color()), Space(self._player_a.get_color()), Space(self._player_b.get_color()), Space(self._player_b.get_color()), Space(self._player_a.get_color()), Space(self._player_a.get_color())],
-                      [Space(self._player_b.get_color()), Space(self._player_b.get_color()), Space(self._player_a.get_color()), Space(self._player_a.get_color()), Space(self._player_b.get_color()), Space(self._player_b.get_color())],
-                      [Space(self._player_a.get_color()), Space(self._player_a.get_color()), Space(self._player_b.get_color()), Space(self._player_b.get_color()), Space(self._player_a.get_color()), Space(self._player_a.get_color())],
-                      [Space(self._player_b.get_color()), Space(self._player_b.get_color()), Space(self._player_a.get_color()), Space(self._player_a.get_color()), Space(self._player_b.get_color()), Space(self._player_b.get_color())]]
+
+        # the starting pieces are laid out once per pair of colors by the rules, so each space is made straight from its
+        # piece, the same way Space.copy makes one, without checking the piece again
+        new_space = Space.__new__
+        self._board = []
+        for row in self._rules.get_opening_pieces(self._player_a.get_color(), self._player_b.get_color()):
+            spaces = []
+            for piece in row:
+                if piece is None:
+                    spaces.append(None)
+                    continue
+                space = new_space(Space)
+                space._stack = [piece] if piece else []
+                spaces.append(space)
+            self._board.append(spaces)
+        self.reset_index()
+
+    def reset_index(self):
+        """
+        Drops the index of controlled stacks and the Zobrist hash, so that they are built again from the board when
+        they are next needed, and clears the undo history.
+        Used when the game is initialized and when a position is loaded with set_position.
+        :return: None
+        """
+        self._owners = {self._player_a.get_color(): 0, self._player_b.get_color(): 1}
+        self._history = []
+
+        # position of each space, and the positions of the stacks each player controls (has on top), for player A and
+        # player B; None until index_board is called, then kept up to date as stacks change
+        self._positions = None
+        self._controlled = None
+
+        # Zobrist hash of the whole position, or None until get_hash is first called
+        self._hash = None
+
+    def index_board(self):
+        """
+        Builds the index of controlled stacks by scanning the board. Called the first time legal moves are generated or
+        the hash is computed; from then on the index is kept up to date by update_controlled_stacks.
+        :return: None
+        """
+        coords = self._rules.get_coords()
+        spaces = [self._board[row][col] for row, col in coords]
+        self._positions = dict(zip(spaces, coords))
+        self._controlled = (set(), set())
+        for space, position in zip(spaces, coords):
+            stack = space.get_stack()
+            if stack:
+                self._controlled[self._owners[stack[-1]]].add(position)
+
+    def set_position(self, cells, reserved, captured, current_turn):
+        """
+        Replaces the whole game state with the given position, in the same form as CompactFocusGame.set_position, so
+        positions saved from either class can be loaded into either class.
+        :param cells: packed stacks (see compact_game.pack_stack), indexed by row * 6 + col, or by cell index for other
+            rules (see Rules.get_coords) (36 ints)
+        :param reserved: reserved counts of player A and player B (2 ints)
+        :param captured: captured counts of player A and player B (2 ints)
+        :param current_turn: 0 for player A's turn, 1 for player B's turn, -1 if either player may move (int)
+        :return: None
+        """
+        colors = (self._player_a.get_color(), self._player_b.get_color())
+        self._player_a = Player(self._player_a.get_name(), colors[0])
+        self._player_b = Player(self._player_b.get_name(), colors[1])
+        players = (self._player_a, self._player_b)
+        for index in range(2):
+            for count in range(reserved[index]):
+                players[index].add_reserved_piece()
+            for count in range(captured[index]):
+                players[index].add_captured_piece()
+        self._current_turn = players[current_turn] if current_turn >= 0 else None
+
+        grid_size = self._rules.get_grid_size()
+        self._board = [[None] * grid_size for row in range(grid_size)]
+        for cell, (row, col) in enumerate(self._rules.get_coords()):
+            space = Space(None)
+            for piece in compact_game.unpack_stack(cells[cell], colors):
+                space.add_piece(piece)
+            self._board[row][col] = space
+        self.reset_index()
 
     def move_piece(self, player_name, orig_coord, dest_coord, num_pieces):
         """
@@ -214,7 +360,7 @@ class FocusGame:
         :return: status message (string)
         """
         player = self.find_player_by_name(player_name)
-        if not self.is_correct_turn(player):
+        if not player or not self.is_correct_turn(player):
             return "Not your turn"
 
         if not self.is_valid_location(player, orig_coord, dest_coord, num_pieces):
@@ -234,6 +380,181 @@ class FocusGame:
         self.change_turn(player)
         return "Successfully moved"
 
+    def clone(self, keep_history=True):
+        """
+        Makes an independent copy of the game, without deepcopy. Every Player and Space is copied, and the index of
+        controlled stacks (if it has been built), the undo history and the hash are carried over to refer to the copies,
+        so the clone can be played or undone on its own.
+        :param keep_history: whether to copy the undo history; without it the clone is smaller and cannot undo moves
+            made before it was cloned (boolean)
+        :return: copy of the game (FocusGame)
+        """
+        game = self.__class__.__new__(self.__class__)
+        game._rules = self._rules
+        players = {self._player_a: self._player_a.copy(), self._player_b: self._player_b.copy(), None: None}
+        game._player_a = players[self._player_a]
+        game._player_b = players[self._player_b]
+        game._current_turn = players[self._current_turn]
+
+        spaces = {None: None}
+        game._board = []
+        for row in self._board:
+            new_row = []
+            for space in row:
+                new_space = space.copy() if space is not None else None
+                spaces[space] = new_space
+                new_row.append(new_space)
+            game._board.append(new_row)
+        if self._controlled is not None:
+            game._positions = {spaces[space]: position for space, position in self._positions.items()}
+            game._controlled = (set(self._controlled[0]), set(self._controlled[1]))
+        else:
+            game._positions = None
+            game._controlled = None
+        game._history = [(players[player], spaces[orig], spaces[dest], num_pieces, extra_pieces, players[turn],
+                          previous_hash)
+                         for player, orig, dest, num_pieces, extra_pieces, turn, previous_hash in self._history] \
+            if keep_history else []
+        game._owners = self._owners
+        game._hash = self._hash
+        return game
+
+    def legal_moves(self, player_name):
+        """
+        Generates every valid move for a given player, without making any of them. Stack moves are generated from the
+        index of stacks the player controls, so only the player's own stacks are looked at.
+        Stack moves are yielded as (orig_coord, dest_coord, num_pieces), and reserved moves as (None, position, 1).
+        No moves are yielded if it is not the player's turn.
+        :param player_name: name of player (string)
+        :return: generator of moves (tuples)
+        """
+        player = self.find_player_by_name(player_name)
+        if not player or not self.is_correct_turn(player):
+            return
+
+        # the moves from each stack are looked up by its position and height in a precomputed table
+        if self._controlled is None:
+            self.index_board()
+        moves_by_position = self._rules.get_moves_by_position()
+        for orig_coord in tuple(self._controlled[self._owners[player.get_color()]]):
+            yield from moves_by_position[orig_coord][self.get_space(orig_coord).get_length()]
+
+        if player.get_reserved_pieces() > 0:
+            for position in self._rules.get_coords():
+                yield None, position, 1
+
+    def apply_move(self, player_name, move):
+        """
+        Makes a move from legal_moves without validating it, and records what changed so that undo_move can restore
+        the previous position. Used by search code to try out moves without copying the whole game.
+        The record holds the player, the origin and destination spaces, the number of pieces moved, the pieces removed
+        from the bottom of the destination stack, and the turn before the move.
+        :param player_name: name of player making move (string)
+        :param move: (orig_coord, dest_coord, num_pieces), or (None, position, 1) for a reserved move (tuple)
+        :return: True if the move won the game, otherwise False (boolean)
+        """
+        player = self.find_player_by_name(player_name)
+        orig_coord, dest_coord, num_pieces = move
+        dest = self.get_space(dest_coord)
+        previous_hash = self._hash
+        if orig_coord is None:
+            orig = None
+            self.place_reserved_piece(dest, player)
+        else:
+            orig = self.get_space(orig_coord)
+            self.make_move(orig, dest, num_pieces)
+
+        extra_pieces = self.check_reserve_and_capture(dest, player)
+        self._history.append((player, orig, dest, num_pieces, extra_pieces, self._current_turn, previous_hash))
+        if self.is_win(player):
+            return True
+        self.change_turn(player)
+        return False
+
+    def undo_move(self):
+        """
+        Undoes the most recent move made with apply_move, putting back any pieces that were removed from the bottom of
+        the destination stack, returning the moved pieces to their origin, and restoring reserved and captured counts
+        and the current turn. The hash is restored from the record rather than updated piece by piece.
+        :return: True if a move was undone, False if there were no moves to undo (boolean)
+        """
+        if not self._history:
+            return False
+        player, orig, dest, num_pieces, extra_pieces, previous_turn, previous_hash = self._history.pop()
+        for piece in extra_pieces:
+            if piece == player.get_color():
+                player.decrement_reserved_pieces()
+            else:
+                player.decrement_captured_pieces()
+        dest.add_pieces_to_bottom(extra_pieces)
+
+        # the hash is restored from the record below, so it is not updated along the way
+        self._hash = None
+        if orig is None:
+            dest.pop_top()
+            player.add_reserved_piece()
+        else:
+            self.make_move(dest, orig, num_pieces)
+            self.update_controlled_stacks(orig)
+        self.update_controlled_stacks(dest)
+        self._current_turn = previous_turn
+        self._hash = previous_hash
+        return True
+
+    def get_hash(self):
+        """
+        Returns the Zobrist hash of the current position, which covers every stack, both players' reserved and captured
+        counts, and whose turn it is. Positions that are the same have the same hash, and CompactFocusGame computes the
+        same hash for the same position.
+        Hashing is lazy: the hash is computed from scratch the first time it is asked for, and from then on it is
+        updated as moves are made and undone. Games that never ask for it, such as games played only through
+        move_piece and reserved_move, never pay for it.
+        :return: hash (64-bit int)
+        """
+        if self._hash is None:
+            self._hash = self.compute_hash()
+        return self._hash
+
+    def compute_hash(self):
+        """
+        Computes the Zobrist hash of the whole position from scratch: every stack, both players' reserved and captured
+        counts, and whose turn it is.
+        :return: hash (64-bit int)
+        """
+        value = self._rules.get_turn_keys()[self.get_turn_index() + 1] ^ self.hash_player_counts(self._player_a) ^ \
+            self.hash_player_counts(self._player_b)
+        if self._positions is None:
+            self.index_board()
+        for space in self._positions:
+            value ^= self.hash_space(space)
+        return value
+
+    def hash_space(self, space):
+        """
+        Computes the part of the hash for the stack on one space.
+        :param space: space on board (Space object)
+        :return: hash (int)
+        """
+        # the same value as zobrist.hash_stack, with the keys for the space looked up by its position
+        keys = self._rules.get_position_keys()[self._positions[space]]
+        owners = self._owners
+        value = 0
+        level = 0
+        for piece in space.get_stack():
+            value ^= keys[level][owners[piece]]
+            level += 1
+        return value
+
+    def hash_player_counts(self, player):
+        """
+        Computes the part of the hash for a player's reserved and captured counts.
+        :param player: player (Player object)
+        :return: hash (int)
+        """
+        return zobrist.hash_counts(self._owners[player.get_color()], player.get_reserved_pieces(),
+                                   player.get_captured_pieces(), self._rules.get_reserved_keys(),
+                                   self._rules.get_captured_keys())
+
     def show_pieces(self, position):
         """
         Shows the stack of pieces at a given space in form of a list, with bottom-most piece at index 0.
@@ -286,8 +607,7 @@ class FocusGame:
 
         # add a reserved piece onto the destination stack, and subtract one from player's reserved pieces
         dest = self.get_space(position)
-        dest.add_piece(player.get_color())
-        player.decrement_reserved_pieces()
+        self.place_reserved_piece(dest, player)
 
         # check for reserve and capture, check for win condition, change turn
         self.check_reserve_and_capture(dest, player)
@@ -295,15 +615,30 @@ class FocusGame:
             return player_name + " Wins"
         self.change_turn(player)
 
+    def place_reserved_piece(self, dest, player):
+        """
+        Adds one of the player's pieces to the top of the destination stack, subtracts one from the player's reserved
+        pieces, and updates the hash (if it is kept) for both changes.
+        :param dest: destination space on board (Space object)
+        :param player: player making move (Player object)
+        :return: None
+        """
+        hashing = self._hash is not None
+        if hashing:
+            self._hash ^= self.hash_space(dest) ^ self.hash_player_counts(player)
+        dest.add_piece(player.get_color())
+        player.decrement_reserved_pieces()
+        if hashing:
+            self._hash ^= self.hash_space(dest) ^ self.hash_player_counts(player)
+
     def is_valid_position(self, position):
         """
-        Checks the the coordinates in the position are valid coordinates.
+        Checks the the coordinates in the position are valid coordinates, by looking them up in the table of board
+        positions.
         :param position: coordinates of space (tuple: (row, col))
         :return: boolean
         """
-        if position[0] < 0 or position[1] < 0 or position[1] > 5 or position[1] > 5:
-            return False
-        return True
+        return self._rules.cell_index(position) != move_tables.OFF_BOARD
 
     def get_space(self, position):
         """
@@ -328,25 +663,73 @@ class FocusGame:
 
     def change_turn(self, current_player):
         """
-        Sets the current_turn attribute, based on who is the current player.
+        Sets the current_turn attribute, based on who is the current player, and updates the hash (if it is kept) for the
+        new turn.
         :param current_player: current player taking turn (Player object)
         :return: None
         """
+        if self._hash is not None:
+            turn_keys = self._rules.get_turn_keys()
+            next_turn = 1 if current_player == self._player_a else 0
+            self._hash ^= turn_keys[self.get_turn_index() + 1] ^ turn_keys[next_turn + 1]
         if current_player == self._player_a:
             self._current_turn = self._player_b
         else:
             self._current_turn = self._player_a
 
+    def get_players(self):
+        """
+        :return: player A and player B (tuple of Player objects)
+        """
+        return self._player_a, self._player_b
+
+    def get_rules(self):
+        """
+        :return: rules of the game (Rules object)
+        """
+        return self._rules
+
+    def get_turn_index(self):
+        """
+        :return: 0 if it is player A's turn, 1 if it is player B's turn, -1 if either player may move (int)
+        """
+        if self._current_turn is None:
+            return -1
+        return self._owners[self._current_turn.get_color()]
+
     def check_reserve_and_capture(self, dest, player):
         """
-        Checks the stack at a given destination for if it has more than 5 pieces.
+        Checks the stack at a given destination for if it has more than 5 pieces (or the stack cap of the rules).
         If it does, calls a method to reserve and capture pieces.
+        Also updates the index of controlled stacks, since a new piece has just been placed on top of the destination.
         :param dest: destination space on board (Space object)
         :param player: current player making move (Player object)
+        :return: extra_pieces (list of pieces removed, empty if none were)
+        """
+        extra_pieces = []
+        if dest.get_length() > self._rules.get_stack_cap():
+            extra_pieces = self.reserve_and_capture_pieces(dest, player)
+        self.update_controlled_stacks(dest)
+        return extra_pieces
+
+    def update_controlled_stacks(self, space):
+        """
+        Updates the index of controlled stacks (if it has been built) for a space whose top piece may have changed.
+        :param space: space on board (Space object)
         :return: None
         """
-        if dest.get_length() > 5:
-            self.reserve_and_capture_pieces(dest, player)
+        if self._controlled is None:
+            return
+        position = self._positions[space]
+        stack = space.get_stack()
+        controlled = self._controlled
+        if stack:
+            owner = self._owners[stack[-1]]
+            controlled[owner].add(position)
+            controlled[1 - owner].discard(position)
+        else:
+            controlled[0].discard(position)
+            controlled[1].discard(position)
 
     def reserve_and_capture_pieces(self, dest, player):
         """
@@ -354,23 +737,30 @@ class FocusGame:
         Then, adds to either the current player's reserved or captured count, based on the colors of the pieces removed.
         :param dest: destination space on board (Space object)
         :param player: current player making move (Player object)
-        :return: None
+        Updates the hash (if it is kept) for the shortened stack and the new counts.
+        :return: extra_pieces (list of pieces removed)
         """
-        extra_pieces = dest.remove_pieces_from_bottom()
+        hashing = self._hash is not None
+        if hashing:
+            self._hash ^= self.hash_space(dest) ^ self.hash_player_counts(player)
+        extra_pieces = dest.remove_pieces_from_bottom(self._rules.get_stack_cap())
         for piece in extra_pieces:
             if piece == player.get_color():
                 player.add_reserved_piece()
             else:
                 player.add_captured_piece()
+        if hashing:
+            self._hash ^= self.hash_space(dest) ^ self.hash_player_counts(player)
+        return extra_pieces
 
     def is_win(self, player):
         """
         Checks for winning condition by checking how many captured pieces the current player has.
-        If current player's captured pieces are at least 6, the player wins.
+        If current player's captured pieces are at least 6 (or the win threshold of the rules), the player wins.
         :param player: current player taking turn (Player object)
         :return: boolean
         """
-        if player.get_captured_pieces() >= 6:
+        if player.get_captured_pieces() >= self._rules.get_win_captures():
             return True
         return False
 
@@ -378,15 +768,23 @@ class FocusGame:
         """Removes pieces from the origin space, and adds them to the destination space.
         Calls a method to remove pieces from the origin space, which are stored in a list named pieces_moved.
         The pieces in pieces_moved are listed in reverse order, i.e. the top piece, which should be added to the
-        destination stack last, is at index 0. Therefore, this method adds pieces to the destination stack starting
-        with the last piece in pieces_moved, and moving toward the front of the list.
+        destination stack last, is at index 0. Therefore, this method reverses pieces_moved and then adds the pieces to
+        the destination stack in one step.
         :param orig: the origin space (Space object)
         :param dest: the destination space (Space object)
+        The origin's entry in the index of controlled stacks is updated here; the destination's is updated by
+        check_reserve_and_capture. The hash (if it is kept) is updated for both stacks.
         :param num_pieces: the number of pieces being moved
         """
+        hashing = self._hash is not None
+        if hashing:
+            self._hash ^= self.hash_space(orig) ^ self.hash_space(dest)
         pieces_moved = orig.remove_pieces_from_top(num_pieces)
-        for i in range(len(pieces_moved)):
-            dest.add_piece(pieces_moved[len(pieces_moved) - 1 - i])
+        pieces_moved.reverse()
+        dest.add_pieces_to_top(pieces_moved)
+        if hashing:
+            self._hash ^= self.hash_space(orig) ^ self.hash_space(dest)
+        self.update_controlled_stacks(orig)
 
     def is_correct_turn(self, player):
         """
@@ -401,14 +799,22 @@ class FocusGame:
     def is_valid_location(self, player, orig_coord, dest_coord, num_pieces):
         """
         Checks if valid locations were given by player when they were attempting to make a move.
+        A move must take at least one piece, so a count below 1 is never valid, not even for a move onto the same space.
         :param player: player currently making move (Player object)
         :param orig_coord: coordinates of origin space, where pieces are moving from (tuple: (row, col))
         :param dest_coord: coordinates of destination space, where pieces are moving to (tuple: (row, col))
         :param num_pieces: number of pieces being moved (int)
         :return: boolean
         """
-        # if invalid origin or destination coordinates
-        if not self.is_valid_position(orig_coord) or not self.is_valid_position(dest_coord):
+        # a move takes at least one piece; the table below also holds 0 for a space and itself and -1 for spaces
+        # that are not in line, which no count may match
+        if num_pieces < 1:
+            return False
+
+        # if invalid origin or destination coordinates; the table holds the straight-line distance between every
+        # pair of spaces on the board
+        spaces_moved = self._rules.coord_distance(orig_coord, dest_coord)
+        if spaces_moved is None:
             return False
 
         # if orig is a stack with their piece not on top
@@ -416,21 +822,8 @@ class FocusGame:
         if orig.get_top() != player.get_color():
             return False
 
-        # invalid location if attempt to move diagonally
-        row_diff = dest_coord[0] - orig_coord[0]
-        col_diff = dest_coord[1] - orig_coord[1]
-        if row_diff != 0 and col_diff != 0:
-            return False
-
-        # invalid location if spaces moved is not equal to number of pieces being moved
-        if row_diff == 0:
-            spaces_moved = abs(col_diff)
-        else:
-            spaces_moved = abs(row_diff)
-        if num_pieces != spaces_moved:
-            return False
-
-        return True
+        # invalid location if the move is diagonal, or spaces moved is not equal to number of pieces being moved
+        return spaces_moved == num_pieces
 
     def is_valid_piece_num(self, orig, num_pieces):
         """
@@ -0,0 +1,330 @@
+#Description: Contains an alpha-beta search AI player for FocusGame with iterative deepening and a time budget.
+
+import time
+
+from compact_game import CompactFocusGame, from_focus_game, COORDS, MAX_STACK, HEIGHT_BITS, HEIGHT_MASK
+from transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+WIN_SCORE = 1000000
+INFINITY = 2 * WIN_SCORE
+
+# scores at least this far from 0 are proven wins or losses (WIN_SCORE less the plies to the end of the game)
+MATE_SCORE = WIN_SCORE // 2
+
+# how often (in nodes) the search checks the clock
+CLOCK_CHECK_INTERVAL = 32
+
+# share of the time budget kept back for the work around the search: copying the game, probing the tablebase and
+# opening book, ordering the root moves, and unwinding the search once the deadline has passed
+TIME_MARGIN = 0.1
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget runs out, to unwind back to the root.
+    """
+    pass
+
+
+def evaluate(game, player):
+    """
+    Scores a position from the point of view of the given player, using captured and reserved counts and the stacks
+    each player controls. Higher is better for the player.
+    :param game: game to score (CompactFocusGame)
+    :param player: player index (int)
+    :return: score (int)
+    """
+    captured = game.get_captured()
+    reserved = game.get_reserved()
+    opponent = 1 - player
+    score = 100 * (captured[player] - captured[opponent]) + 30 * (reserved[player] - reserved[opponent])
+    for code in game.get_cells():
+        height = code & HEIGHT_MASK
+        if height:
+            if (code >> (HEIGHT_BITS + height - 1)) & 1 == player:
+                score += 10 + 2 * height
+            else:
+                score -= 10 + 2 * height
+    return score
+
+
+def to_table_score(value, ply):
+    """
+    Converts a score to be stored in the transposition table. Win and loss scores count plies from the root of the
+    search, so they are stored counting from the position itself instead; otherwise a position reached at a different
+    ply, or in a later search, would be given a win or loss at the wrong distance.
+    :param value: score from the search (int)
+    :param ply: distance of the position from the root (int)
+    :return: score to store (int)
+    """
+    if value >= MATE_SCORE:
+        return value + ply
+    if value <= -MATE_SCORE:
+        return value - ply
+    return value
+
+
+def from_table_score(value, ply):
+    """
+    Converts a score read from the transposition table back to count from the root of the search (see to_table_score).
+    :param value: stored score (int)
+    :param ply: distance of the position from the root (int)
+    :return: score for the search (int)
+    """
+    if value >= MATE_SCORE:
+        return value - ply
+    if value <= -MATE_SCORE:
+        return value + ply
+    return value
+
+
+def capture_count(game, player, move):
+    """
+    Counts how many opponent pieces a move would capture, by working out which pieces would be pushed off the bottom
+    of the destination stack. Used to search captures first.
+    :param game: game the move would be made in (CompactFocusGame)
+    :param player: index of player making the move (int)
+    :param move: (orig, dest, num_pieces) using cell indexes, with orig -1 for a reserved move (tuple)
+    :return: number of opponent pieces captured (int)
+    """
+    orig, dest, num_pieces = move
+    code = game.get_cells()[dest]
+    extra = (code & HEIGHT_MASK) + num_pieces - MAX_STACK
+    if extra <= 0:
+        return 0
+    bits = (code >> HEIGHT_BITS) & ((1 << extra) - 1)
+    opponent_pieces = bin(bits).count("1")
+    if player:
+        return extra - opponent_pieces
+    return opponent_pieces
+
+
+class AlphaBetaPlayer:
+    """
+    Represents an AI player that picks moves using alpha-beta search.
+    The search runs on a CompactFocusGame copy of the game, using push_move and undo_move to try out moves. It deepens
+    one ply at a time until the time budget runs out, and plays the best move from the deepest search that finished.
+    Moves are ordered with the best move from the transposition table first, then captures, then everything else.
+    After each call to choose_move, the depth reached, number of nodes searched, and nodes per second can be read with
+    the getter methods.
+    If an endgame tablebase is given, a proven win at the root is played straight away, and positions in the search
+    that the tablebase has solved are scored from it instead of being searched. If an opening book is given, its move
+    is played without searching whenever the position is in the book.
+    """
+
+    def __init__(self, time_limit=0.05, max_depth=32, table=None, tablebase=None, opening_book=None):
+        """
+        Initializes the AI player.
+        :param time_limit: wall-clock time allowed per move, in seconds (float)
+        :param max_depth: deepest search to try, in plies (int)
+        :param table: transposition table to use, shared between moves (TranspositionTable, or None for a new one)
+        :param tablebase: solved endgame positions to consult (endgame.EndgameTablebase), or None
+        :param opening_book: opening book to consult before searching (opening_book.OpeningBook), or None
+        """
+        self._time_limit = time_limit
+        self._max_depth = max_depth
+        self._table = table if table is not None else TranspositionTable()
+        self._tablebase = tablebase
+        self._opening_book = opening_book
+        self._deadline = float("inf")  # no deadline until choose_move sets one
+        self._nodes = 0
+        self._depth = 0
+        self._elapsed = 0
+
+    def choose_move(self, game, player_name):
+        """
+        Picks a move for the given player.
+        :param game: game to pick a move in (FocusGame or CompactFocusGame)
+        :param player_name: name of player to move (string)
+        :return: move in the same form as legal_moves (tuple), or None if the player has no move right now
+        """
+        start = time.perf_counter()
+        self._deadline = start + self._time_limit * (1 - TIME_MARGIN)
+        self._nodes = 0
+        self._depth = 0
+
+        if isinstance(game, CompactFocusGame):
+            search_game = game.clone()
+        else:
+            search_game = from_focus_game(game)
+        player = search_game.find_player_by_name(player_name)
+        moves = []
+        if player >= 0 and search_game.is_correct_turn(player):
+            moves = search_game.generate_moves(player)
+        if not moves:
+            self._elapsed = time.perf_counter() - start
+            return None
+
+        if self._tablebase is not None and self._tablebase.covers(search_game):
+            stored = self._tablebase.probe(search_game, player_name)
+            if stored is not None and stored[0] > 0 and stored[3] is not None:
+                self._elapsed = time.perf_counter() - start
+                return stored[3]
+
+        if self._opening_book is not None:
+            book_move = self._opening_book.choose_move(search_game, player_name)
+            if book_move is not None:
+                self._elapsed = time.perf_counter() - start
+                return book_move
+
+        best_move = self.order_moves(search_game, player, moves, None)[0]
+
+        if len(moves) > 1:
+            for depth in range(1, self._max_depth + 1):
+                try:
+                    best_move = self.search_root(search_game.clone(), player, depth, best_move)
+                except SearchTimeout:
+                    break
+                self._depth = depth
+
+        self._elapsed = time.perf_counter() - start
+        orig, dest, num_pieces = best_move
+        return (COORDS[orig] if orig >= 0 else None), COORDS[dest], num_pieces
+
+    def search_root(self, game, player, depth, previous_best):
+        """
+        Searches every move at the root to the given depth, starting with the best move from the previous depth. The
+        clock is checked before each root move, since a single root move can take a while to search at high depths.
+        :param game: game to search (CompactFocusGame)
+        :param player: index of player to move (int)
+        :param depth: depth to search to (int)
+        :param previous_best: best move from the previous, shallower search (tuple)
+        :return: best move (tuple)
+        """
+        alpha = -INFINITY
+        best_move = previous_best
+        for move in self.order_moves(game, player, game.generate_moves(player), previous_best):
+            if time.perf_counter() > self._deadline:
+                raise SearchTimeout()
+            if game.push_move(player, *move):
+                value = WIN_SCORE
+            else:
+                value = -self.search(game, 1 - player, depth - 1, -INFINITY, -alpha, 1)
+            game.undo_move()
+            if value > alpha:
+                alpha = value
+                best_move = move
+        self._table.store(game.get_hash(), depth, alpha, EXACT, best_move)
+        return best_move
+
+    def search(self, game, player, depth, alpha, beta, ply):
+        """
+        Negamax alpha-beta search from the point of view of the player to move.
+        :param game: game to search (CompactFocusGame)
+        :param player: index of player to move (int)
+        :param depth: remaining depth (int)
+        :param alpha: lower bound of the search window (int)
+        :param beta: upper bound of the search window (int)
+        :param ply: distance from the root, used to prefer faster wins (int)
+        :return: score for the player to move (int)
+        """
+        self._nodes += 1
+        if self._nodes % CLOCK_CHECK_INTERVAL == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+        key = game.get_hash()
+        entry = self._table.lookup(key)
+        table_move = None
+        if entry is not None:
+            table_move = entry[4]
+            if entry[1] >= depth:
+                value = from_table_score(entry[2], ply)
+                flag = entry[3]
+                if flag == EXACT or (flag == LOWER_BOUND and value >= beta) or (flag == UPPER_BOUND and value <= alpha):
+                    return value
+
+        # the tablebase is only probed at the leaves and where the table has nothing, since covers scans the board
+        if self._tablebase is not None and (entry is None or depth <= 0) and self._tablebase.covers(game):
+            stored = self._tablebase.probe_game(game)
+            if stored is not None and stored[0] != 0:
+                # a win or loss proven by the endgame solver, distance plies away counting the ply that ends the game:
+                # a capture is scored on the winner's ply, and having no move on the loser's ply
+                if stored[0] > 0:
+                    return WIN_SCORE - ply - stored[1] + 1
+                return -WIN_SCORE + ply + max(stored[1] - 1, 0)
+
+        if depth <= 0:
+            return evaluate(game, player)
+
+        moves = game.generate_moves(player)
+        if not moves:
+            # a player who cannot move has lost
+            return -WIN_SCORE + ply
+
+        original_alpha = alpha
+        best_value = -INFINITY
+        best_move = None
+        for move in self.order_moves(game, player, moves, table_move):
+            if game.push_move(player, *move):
+                value = WIN_SCORE - ply
+            else:
+                value = -self.search(game, 1 - player, depth - 1, -beta, -alpha, ply + 1)
+            game.undo_move()
+            if value > best_value:
+                best_value = value
+                best_move = move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self._table.store(key, depth, to_table_score(best_value, ply), flag, best_move)
+        return best_value
+
+    def order_moves(self, game, player, moves, first_move):
+        """
+        Sorts moves so that the given first move (usually from the transposition table) comes first, followed by the
+        moves that capture the most opponent pieces.
+        :param game: game the moves would be made in (CompactFocusGame)
+        :param player: index of player making the moves (int)
+        :param moves: moves to sort (list of tuples)
+        :param first_move: move to put first, or None (tuple)
+        :return: sorted moves (list of tuples)
+        """
+        scored = []
+        for move in moves:
+            if move == first_move:
+                score = MAX_STACK + 1
+            else:
+                score = capture_count(game, player, move)
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for score, move in scored]
+
+    def get_nodes(self):
+        """
+        :return: number of positions searched during the last choose_move (int)
+        """
+        return self._nodes
+
+    def get_depth(self):
+        """
+        :return: deepest search that finished during the last choose_move (int)
+        """
+        return self._depth
+
+    def get_elapsed(self):
+        """
+        :return: time taken by the last choose_move, in seconds (float)
+        """
+        return self._elapsed
+
+    def get_nodes_per_second(self):
+        """
+        :return: search speed during the last choose_move (float)
+        """
+        if self._elapsed <= 0:
+            return 0.0
+        return self._nodes / self._elapsed
+
+    def get_table(self):
+        """
+        :return: the transposition table used by the search (TranspositionTable)
+        """
+        return self._table
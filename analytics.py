@@ -0,0 +1,271 @@
+#Description: Contains bulk statistics over recorded FocusGame games, streamed from record files across a process pool.
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from compact_game import CompactFocusGame, BOARD_SIZE, NUM_CELLS
+from move_tables import CELL_INDEX
+from records import read_games
+
+# how each game ended, as counted by GameStats
+CAPTURE = "capture"
+NO_MOVES = "no moves"
+NO_WINNER = "no winner"
+ENDINGS = (CAPTURE, NO_MOVES, NO_WINNER)
+
+
+class GameStats:
+    """
+    Represents statistics gathered from any number of recorded games. Games are added one at a time and only running
+    totals are kept, so memory use does not grow with the number of games; the length and capture histograms are
+    keyed by move number, so they grow only with the length of the longest game.
+    Two GameStats can be merged, so each worker process can count its own files and the results added together.
+    The first mover of a game is the player who made its first move. A game won without a winning capture was won
+    because the loser had no legal move.
+    Cell counts are indexed by row * 6 + col: stack moves leaving and entering each cell, reserved pieces placed on
+    each cell, and moves that captured pieces on each cell.
+    """
+
+    def __init__(self):
+        """
+        Initializes empty statistics.
+        """
+        self._games = 0
+        self._moves = 0
+        self._reserved_moves = 0
+        self._first_mover_wins = 0
+        self._second_mover_wins = 0
+        self._wins = [0, 0]
+        self._endings = dict.fromkeys(ENDINGS, 0)
+        self._lengths = {}
+        self._captures = {}
+        self._first_captures = {}
+        self._origins = [0] * NUM_CELLS
+        self._destinations = [0] * NUM_CELLS
+        self._placements = [0] * NUM_CELLS
+        self._capture_cells = [0] * NUM_CELLS
+
+    def add_game(self, record):
+        """
+        Replays a recorded game through a CompactFocusGame and adds it to the statistics.
+        :param record: recorded game (GameRecord)
+        :return: None
+        """
+        game = CompactFocusGame(*record.get_players())
+        captured = game.get_captured()
+        push_move = game.push_move
+        origins = self._origins
+        destinations = self._destinations
+        placements = self._placements
+        capture_cells = self._capture_cells
+        captures = self._captures
+        first_capture = 0
+        reserved_moves = 0
+        won_by_capture = False
+        move_number = 0
+
+        moves = record.get_moves()
+        for player, (orig_coord, dest_coord, num_pieces) in moves:
+            move_number += 1
+            dest = CELL_INDEX[dest_coord]
+            if orig_coord is None:
+                orig = -1
+                reserved_moves += 1
+                placements[dest] += 1
+            else:
+                orig = CELL_INDEX[orig_coord]
+                origins[orig] += 1
+                destinations[dest] += 1
+            before = captured[player]
+            won_by_capture = push_move(player, orig, dest, num_pieces)
+            if captured[player] != before:
+                captures[move_number] = captures.get(move_number, 0) + 1
+                capture_cells[dest] += 1
+                if not first_capture:
+                    first_capture = move_number
+            if won_by_capture:
+                break
+
+        self._games += 1
+        self._moves += len(moves)
+        self._reserved_moves += reserved_moves
+        self._lengths[len(moves)] = self._lengths.get(len(moves), 0) + 1
+        if first_capture:
+            self._first_captures[first_capture] = self._first_captures.get(first_capture, 0) + 1
+
+        winner = record.get_winner()
+        if winner is None:
+            self._endings[NO_WINNER] += 1
+            return
+        self._endings[CAPTURE if won_by_capture else NO_MOVES] += 1
+        self._wins[winner] += 1
+        if moves and moves[0][0] == winner:
+            self._first_mover_wins += 1
+        else:
+            self._second_mover_wins += 1
+
+    def add_stream(self, stream):
+        """
+        Adds every game in a record file, reading one game at a time.
+        :param stream: binary file object to read from (see records.read_games)
+        :return: None
+        """
+        for record in read_games(stream):
+            self.add_game(record)
+
+    def merge(self, other):
+        """
+        Adds the statistics gathered by another GameStats to this one.
+        :param other: statistics to add (GameStats)
+        :return: None
+        """
+        self._games += other._games
+        self._moves += other._moves
+        self._reserved_moves += other._reserved_moves
+        self._first_mover_wins += other._first_mover_wins
+        self._second_mover_wins += other._second_mover_wins
+        for mine, theirs in ((self._wins, other._wins), (self._origins, other._origins),
+                             (self._destinations, other._destinations), (self._placements, other._placements),
+                             (self._capture_cells, other._capture_cells)):
+            for index, count in enumerate(theirs):
+                mine[index] += count
+        for mine, theirs in ((self._endings, other._endings), (self._lengths, other._lengths),
+                             (self._captures, other._captures), (self._first_captures, other._first_captures)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+
+    def get_games(self):
+        """
+        :return: number of games added (int)
+        """
+        return self._games
+
+    def get_first_mover_win_rate(self):
+        """
+        :return: fraction of games with a winner that were won by the player who moved first (float)
+        """
+        decided = self._first_mover_wins + self._second_mover_wins
+        return self._first_mover_wins / decided if decided else 0.0
+
+    def get_average_length(self):
+        """
+        :return: mean number of moves per game (float)
+        """
+        return self._moves / self._games if self._games else 0.0
+
+    def get_reserved_move_rate(self):
+        """
+        :return: fraction of all moves that were reserved moves (float)
+        """
+        return self._reserved_moves / self._moves if self._moves else 0.0
+
+    def get_average_capture_move(self):
+        """
+        :return: mean move number of moves that captured pieces (float)
+        """
+        total = sum(self._captures.values())
+        return sum(number * count for number, count in self._captures.items()) / total if total else 0.0
+
+    def get_heatmap(self, kind="origins"):
+        """
+        :param kind: "origins", "destinations", "placements" or "captures" (string)
+        :return: counts for each cell, as 6 rows of 6 (list of lists of ints)
+        """
+        counts = {"origins": self._origins, "destinations": self._destinations, "placements": self._placements,
+                  "captures": self._capture_cells}.get(kind)
+        if counts is None:
+            raise ValueError("Unknown heatmap: " + str(kind))
+        return [counts[row * BOARD_SIZE:(row + 1) * BOARD_SIZE] for row in range(BOARD_SIZE)]
+
+    def summary(self):
+        """
+        :return: every statistic, ready to be saved as JSON (dict)
+        """
+        return {
+            "games": self._games,
+            "moves": self._moves,
+            "average_length": self.get_average_length(),
+            "wins": {"player_a": self._wins[0], "player_b": self._wins[1]},
+            "first_mover_wins": self._first_mover_wins,
+            "second_mover_wins": self._second_mover_wins,
+            "first_mover_win_rate": self.get_first_mover_win_rate(),
+            "endings": dict(self._endings),
+            "reserved_moves": self._reserved_moves,
+            "reserved_move_rate": self.get_reserved_move_rate(),
+            "average_capture_move": self.get_average_capture_move(),
+            "lengths": dict(sorted(self._lengths.items())),
+            "captures_by_move": dict(sorted(self._captures.items())),
+            "first_capture_by_move": dict(sorted(self._first_captures.items())),
+            "heatmaps": dict((kind, self.get_heatmap(kind))
+                             for kind in ("origins", "destinations", "placements", "captures")),
+        }
+
+
+def analyze_file(path):
+    """
+    Gathers statistics from every game in one record file. Runs in a worker process.
+    :param path: path of the record file (string)
+    :return: statistics (GameStats)
+    """
+    stats = GameStats()
+    with open(path, "rb", buffering=1 << 20) as stream:
+        stats.add_stream(stream)
+    return stats
+
+
+def analyze_files(paths, workers=None, progress=None):
+    """
+    Gathers statistics from many record files, one file per task, across a pool of worker processes. Each worker
+    streams its file and sends back only its totals, which are merged as they arrive.
+    :param paths: paths of the record files (list of strings)
+    :param workers: number of worker processes, or None for one per CPU; 1 reads files in this process (int)
+    :param progress: function called with each file's path and statistics as it finishes, or None (function)
+    :return: statistics for all the files (GameStats)
+    """
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    total = GameStats()
+    if workers == 1:
+        for path in paths:
+            stats = analyze_file(path)
+            total.merge(stats)
+            if progress is not None:
+                progress(path, stats)
+        return total
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = dict((executor.submit(analyze_file, path), path) for path in paths)
+        for future in as_completed(futures):
+            stats = future.result()
+            total.merge(stats)
+            if progress is not None:
+                progress(futures[future], stats)
+    return total
+
+
+def main():
+    """
+    Prints statistics for record files from the command line.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Gather statistics from FocusGame record files.")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    stats = analyze_files(args.paths, workers=args.workers)
+    summary = stats.summary()
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(summary, file, indent=2, sort_keys=True)
+    print("games:", stats.get_games())
+    print("average length: %.1f moves" % stats.get_average_length())
+    print("first mover win rate: %.3f" % stats.get_first_mover_win_rate())
+    print("reserved move rate: %.4f" % stats.get_reserved_move_rate())
+    print("endings:", summary["endings"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#Description: Contains a NumPy engine that plays one move in each of thousands of FocusGame games at once.
+
+import numpy as np
+
+from compact_game import CompactFocusGame, BOARD_SIZE, NUM_CELLS, MAX_STACK, WIN_CAPTURES, HEIGHT_BITS, HEIGHT_MASK, \
+    OPENING_CELLS
+from move_tables import MOVE_TABLE, DIRECTIONS
+
+# piece values in the pieces array
+EMPTY = 0
+PIECE_A = 1
+PIECE_B = 2
+
+# The longest a stack can be before it is cut back down: 5 pieces moved onto 5.
+MAX_MERGED = 2 * MAX_STACK
+
+# Every move has a fixed action number. Stack moves are numbered by origin cell, then direction (up, down, left,
+# right), then distance 1-5, the same layout as move_tables.MOVE_TABLE; reserved moves onto each cell come after all
+# the stack moves.
+NUM_STACK_ACTIONS = NUM_CELLS * len(DIRECTIONS) * MAX_STACK
+NUM_ACTIONS = NUM_STACK_ACTIONS + NUM_CELLS
+
+
+def _build_action_tables():
+    """
+    Builds the origin, destination and number of pieces for every action number. Off-board destinations are -1, and
+    reserved moves have origin -1.
+    :return: origins, destinations, and numbers of pieces (tuple of int arrays)
+    """
+    origins = np.full(NUM_ACTIONS, -1, dtype=np.int64)
+    destinations = np.full(NUM_ACTIONS, -1, dtype=np.int64)
+    num_pieces = np.ones(NUM_ACTIONS, dtype=np.int64)
+    origins[:NUM_STACK_ACTIONS] = np.repeat(np.arange(NUM_CELLS), len(DIRECTIONS) * MAX_STACK)
+    destinations[:NUM_STACK_ACTIONS] = np.array(MOVE_TABLE, dtype=np.int64).reshape(-1)
+    num_pieces[:NUM_STACK_ACTIONS] = np.tile(np.arange(1, MAX_STACK + 1), NUM_CELLS * len(DIRECTIONS))
+    destinations[NUM_STACK_ACTIONS:] = np.arange(NUM_CELLS)
+    return origins, destinations, num_pieces
+
+
+ACTION_ORIGINS, ACTION_DESTINATIONS, ACTION_NUM_PIECES = _build_action_tables()
+
+
+def action_to_move(action):
+    """
+    Converts an action number into a move in the same form as FocusGame.legal_moves.
+    :param action: action number (int)
+    :return: (orig_coord, dest_coord, num_pieces), or (None, position, 1) for a reserved move (tuple)
+    """
+    orig = int(ACTION_ORIGINS[action])
+    dest = int(ACTION_DESTINATIONS[action])
+    orig_coord = divmod(orig, BOARD_SIZE) if orig >= 0 else None
+    return orig_coord, divmod(dest, BOARD_SIZE), int(ACTION_NUM_PIECES[action])
+
+
+def move_to_action(move):
+    """
+    Converts a move in the same form as FocusGame.legal_moves into its action number.
+    :param move: (orig_coord, dest_coord, num_pieces), or (None, position, 1) for a reserved move (tuple)
+    :return: action number (int)
+    """
+    orig_coord, dest_coord, num_pieces = move
+    dest = dest_coord[0] * BOARD_SIZE + dest_coord[1]
+    if orig_coord is None:
+        return NUM_STACK_ACTIONS + dest
+    row_diff = dest_coord[0] - orig_coord[0]
+    col_diff = dest_coord[1] - orig_coord[1]
+    direction = DIRECTIONS.index(((row_diff > 0) - (row_diff < 0), (col_diff > 0) - (col_diff < 0)))
+    orig = orig_coord[0] * BOARD_SIZE + orig_coord[1]
+    return (orig * len(DIRECTIONS) + direction) * MAX_STACK + num_pieces - 1
+
+
+class BatchFocusGame:
+    """
+    Represents a batch of independent Focus games stored in NumPy arrays, so that one move can be made in every game
+    with a handful of array operations:
+    pieces (K x 6 x 6 x 5): the piece in each slot of each stack, bottom-most piece in slot 0 (0 empty, 1 A, 2 B)
+    heights (K x 6 x 6): the number of pieces in each stack
+    reserved and captured (K x 2): each player's reserved and captured counts
+    current_turn (K): the index of the player whose turn it is, or -1 if either player may move
+    won (K): whether a player has won the game
+    Moves are made with the same rules as FocusGame: merged stacks taller than 5 lose pieces from the bottom, which go
+    to the moving player's reserve or captures, and capturing 6 pieces wins.
+    """
+
+    def __init__(self, num_games):
+        """
+        Initializes a batch of games, all at the opening position.
+        :param num_games: number of games in the batch (int)
+        """
+        self._num_games = num_games
+        self._pieces = np.zeros((num_games, BOARD_SIZE, BOARD_SIZE, MAX_STACK), dtype=np.int8)
+        self._heights = np.zeros((num_games, BOARD_SIZE, BOARD_SIZE), dtype=np.int8)
+        self._reserved = np.zeros((num_games, 2), dtype=np.int16)
+        self._captured = np.zeros((num_games, 2), dtype=np.int16)
+        self._current_turn = np.full(num_games, -1, dtype=np.int8)
+        self._won = np.zeros(num_games, dtype=bool)
+        for cell in range(NUM_CELLS):
+            self.set_stack(slice(None), cell, OPENING_CELLS[cell])
+
+    def set_stack(self, games, cell, code):
+        """
+        Sets the stack at one cell of the given games from a packed stack (see compact_game.pack_stack).
+        :param games: which games to set (index, slice, or array of indexes)
+        :param cell: index of the cell, row * 6 + col (int)
+        :param code: packed stack (int)
+        :return: None
+        """
+        row, col = divmod(cell, BOARD_SIZE)
+        height = code & HEIGHT_MASK
+        bits = code >> HEIGHT_BITS
+        self._heights[games, row, col] = height
+        self._pieces[games, row, col, :] = EMPTY
+        for level in range(height):
+            self._pieces[games, row, col, level] = PIECE_B if (bits >> level) & 1 else PIECE_A
+
+    def load_game(self, index, game):
+        """
+        Copies the position of a CompactFocusGame into one game of the batch.
+        :param index: index of the game in the batch (int)
+        :param game: game to copy (CompactFocusGame)
+        :return: None
+        """
+        cells = game.get_cells()
+        for cell in range(NUM_CELLS):
+            self.set_stack(index, cell, cells[cell])
+        self._reserved[index] = game.get_reserved()
+        self._captured[index] = game.get_captured()
+        self._current_turn[index] = game.get_current_turn()
+        self._won[index] = max(game.get_captured()) >= WIN_CAPTURES
+
+    def get_game(self, index, player_a=("PlayerA", "Red"), player_b=("PlayerB", "Green")):
+        """
+        Copies one game of the batch into a CompactFocusGame, e.g. to check it against the scalar engine.
+        :param index: index of the game in the batch (int)
+        :param player_a: tuple containing: (player A name, player A color)
+        :param player_b: tuple containing: (player B name, player B color)
+        :return: game (CompactFocusGame)
+        """
+        pieces = self._pieces[index].reshape(NUM_CELLS, MAX_STACK)
+        heights = self._heights[index].reshape(NUM_CELLS)
+        cells = []
+        for cell in range(NUM_CELLS):
+            bits = 0
+            for level in range(int(heights[cell])):
+                if pieces[cell, level] == PIECE_B:
+                    bits |= 1 << level
+            cells.append(int(heights[cell]) | (bits << HEIGHT_BITS))
+        game = CompactFocusGame(player_a, player_b)
+        game.set_position(cells, [int(count) for count in self._reserved[index]],
+                          [int(count) for count in self._captured[index]], int(self._current_turn[index]))
+        return game
+
+    def legal_mask(self, players):
+        """
+        Works out which actions are legal in each game for the given player, without checking whose turn it is.
+        Games that have been won have no legal actions.
+        :param players: index of the player to move in each game (int array of length K)
+        :return: legal actions (bool array of K x NUM_ACTIONS)
+        """
+        players = np.asarray(players)
+        heights = self._heights.reshape(self._num_games, NUM_CELLS).astype(np.int64)
+        pieces = self._pieces.reshape(self._num_games, NUM_CELLS, MAX_STACK)
+        top_level = np.maximum(heights - 1, 0)
+        tops = np.take_along_axis(pieces, top_level[:, :, None], axis=2)[:, :, 0]
+        controlled = (heights > 0) & (tops == (players + 1)[:, None])
+
+        stack_origins = ACTION_ORIGINS[:NUM_STACK_ACTIONS]
+        mask = np.zeros((self._num_games, NUM_ACTIONS), dtype=bool)
+        mask[:, :NUM_STACK_ACTIONS] = controlled[:, stack_origins] & \
+            (ACTION_NUM_PIECES[:NUM_STACK_ACTIONS] <= heights[:, stack_origins]) & \
+            (ACTION_DESTINATIONS[:NUM_STACK_ACTIONS] >= 0)
+        has_reserve = self._reserved[np.arange(self._num_games), players] > 0
+        mask[:, NUM_STACK_ACTIONS:] = has_reserve[:, None]
+        mask[self._won] = False
+        return mask
+
+    def random_actions(self, players, rng):
+        """
+        Picks a random legal action for each game, or -1 for games where the player has no legal action.
+        :param players: index of the player to move in each game (int array of length K)
+        :param rng: random number generator (numpy.random.Generator)
+        :return: actions (int array of length K)
+        """
+        mask = self.legal_mask(players)
+        scores = np.where(mask, rng.random(mask.shape), -1.0)
+        actions = scores.argmax(axis=1)
+        actions[~mask.any(axis=1)] = -1
+        return actions
+
+    def step(self, players, actions):
+        """
+        Makes one move in every game that has an action, like FocusGame.apply_move: the move is not validated.
+        Games with action -1 (and games already won) are left unchanged.
+        :param players: index of the player making the move in each game (int array of length K)
+        :param actions: action number for each game, or -1 to skip a game (int array of length K)
+        :return: which games were won by this move (bool array of length K)
+        """
+        players = np.asarray(players, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        won_now = np.zeros(self._num_games, dtype=bool)
+        games = np.nonzero((actions >= 0) & ~self._won)[0]
+        if len(games) == 0:
+            return won_now
+
+        players = players[games]
+        actions = actions[games]
+        orig = ACTION_ORIGINS[actions]
+        dest = ACTION_DESTINATIONS[actions]
+        num_pieces = ACTION_NUM_PIECES[actions]
+        is_reserve = orig < 0
+        safe_orig = np.where(is_reserve, 0, orig)
+
+        pieces = self._pieces.reshape(self._num_games, NUM_CELLS, MAX_STACK)
+        heights = self._heights.reshape(self._num_games, NUM_CELLS)
+        orig_height = np.where(is_reserve, 1, heights[games, safe_orig].astype(np.int64))
+        dest_height = heights[games, dest].astype(np.int64)
+        keep = orig_height - num_pieces
+
+        # Lay out the merged stack in slots 0-9: the destination's pieces, then the pieces moved on top of them.
+        slots = np.arange(MAX_MERGED)[None, :]
+        dest_pieces = pieces[games[:, None], dest[:, None], np.minimum(slots, MAX_STACK - 1)]
+        orig_slots = np.clip(keep[:, None] + slots - dest_height[:, None], 0, MAX_STACK - 1)
+        moved_pieces = pieces[games[:, None], safe_orig[:, None], orig_slots]
+        moved_pieces = np.where(is_reserve[:, None], (players + 1)[:, None], moved_pieces)
+        from_dest = slots < dest_height[:, None]
+        from_orig = (slots >= dest_height[:, None]) & (slots < (dest_height + num_pieces)[:, None])
+        merged = np.where(from_dest, dest_pieces, np.where(from_orig, moved_pieces, EMPTY)).astype(np.int8)
+
+        # Remove the moved pieces from the origin.
+        stack_games = games[~is_reserve]
+        stack_orig = orig[~is_reserve]
+        cleared = np.arange(MAX_STACK)[None, :] >= keep[~is_reserve][:, None]
+        pieces[stack_games, stack_orig] = np.where(cleared, EMPTY, pieces[stack_games, stack_orig])
+        heights[stack_games, stack_orig] = keep[~is_reserve]
+
+        # Cut the merged stack down to 5 pieces from the bottom, reserving and capturing what was removed.
+        total = dest_height + num_pieces
+        extra = np.maximum(total - MAX_STACK, 0)
+        removed = slots < extra[:, None]
+        own_removed = (removed & (merged == (players + 1)[:, None])).sum(axis=1)
+        self._reserved[games, players] += own_removed.astype(np.int16)
+        self._captured[games, players] += (extra - own_removed).astype(np.int16)
+        self._reserved[games[is_reserve], players[is_reserve]] -= 1
+
+        kept_slots = extra[:, None] + np.arange(MAX_STACK)[None, :]
+        kept = np.take_along_axis(merged, np.minimum(kept_slots, MAX_MERGED - 1), axis=1)
+        pieces[games, dest] = np.where(kept_slots < total[:, None], kept, EMPTY)
+        heights[games, dest] = np.minimum(total, MAX_STACK)
+
+        # Check for wins, and change turns in the games that were not won.
+        won = self._captured[games, players] >= WIN_CAPTURES
+        self._won[games[won]] = True
+        won_now[games[won]] = True
+        self._current_turn[games[~won]] = 1 - players[~won]
+        return won_now
+
+    def get_pieces(self):
+        """
+        :return: the piece in each slot of each stack (int8 array of K x 6 x 6 x 5)
+        """
+        return self._pieces
+
+    def get_heights(self):
+        """
+        :return: height of each stack (int8 array of K x 6 x 6)
+        """
+        return self._heights
+
+    def get_reserved(self):
+        """
+        :return: reserved counts of player A and player B in each game (int16 array of K x 2)
+        """
+        return self._reserved
+
+    def get_captured(self):
+        """
+        :return: captured counts of player A and player B in each game (int16 array of K x 2)
+        """
+        return self._captured
+
+    def get_current_turn(self):
+        """
+        :return: index of the player to move in each game, or -1 if either player may move (int8 array of length K)
+        """
+        return self._current_turn
+
+    def get_won(self):
+        """
+        :return: whether each game has been won (bool array of length K)
+        """
+        return self._won
+
+    def get_num_games(self):
+        """
+        :return: number of games in the batch (int)
+        """
+        return self._num_games
@@ -0,0 +1,614 @@
+#Description: Contains a reproducible benchmark suite for FocusGame and the engines built on it, with JSON output and baseline comparison.
+
+import argparse
+import atexit
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+from FocusGame import FocusGame, Space
+from compact_game import CompactFocusGame, COORDS, HEIGHT_MASK, MAX_STACK
+from alphabeta import AlphaBetaPlayer
+from mcts import MCTSPlayer
+from position_db import PositionDatabase, POSITION_SIZE, serialize_position, deserialize_position
+from selfplay import PLAYER_A, PLAYER_B
+from transposition import TranspositionTable
+
+try:
+    import numpy
+    from batch_engine import BatchFocusGame
+    from evaluation import evaluate_batch
+except ImportError:
+    numpy = None
+
+FORMAT_VERSION = 1
+DEFAULT_SEED = 12345
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 0.10
+
+# metadata that must match for two results to be compared at all, since the benchmark inputs depend on them
+INPUT_METADATA = ("version", "seed", "scale")
+
+# metadata that should match for timings to be comparable; compare_metadata warns about differences
+ENVIRONMENT_METADATA = ("python", "implementation", "machine", "repeats")
+
+# statuses given to each benchmark by compare_results
+OK = "ok"
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+NEW = "new"
+MISSING = "missing"
+
+
+def to_coord_move(move):
+    """
+    :param move: (orig, dest, num_pieces) using cell indexes, with orig -1 for a reserved move (tuple)
+    :return: the same move in legal_moves form (tuple)
+    """
+    orig, dest, num_pieces = move
+    return (COORDS[orig] if orig >= 0 else None), COORDS[dest], num_pieces
+
+
+def is_overflow(game, move):
+    """
+    :param game: game the move would be made in (CompactFocusGame)
+    :param move: (orig, dest, num_pieces) using cell indexes (tuple)
+    :return: whether the move would push pieces off the bottom of the destination stack (boolean)
+    """
+    return (game.get_cells()[move[1]] & HEIGHT_MASK) + move[2] > MAX_STACK
+
+
+def sample_positions(rng, count, wanted):
+    """
+    Plays random games and collects positions in which the player to move has a move of the wanted kind.
+    :param rng: random number generator (random.Random)
+    :param count: number of positions to collect (int)
+    :param wanted: function of (game, move) that returns whether a move is of the wanted kind (function)
+    :return: (packed position, index of player to move, move using cell indexes) (list of tuples)
+    """
+    samples = []
+    while len(samples) < count:
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        player = rng.randrange(2)
+        for ply in range(400):
+            moves = game.generate_moves(player)
+            if not moves:
+                break
+            if ply > 0:
+                matching = [move for move in moves if wanted(game, move)]
+                if matching:
+                    samples.append((serialize_position(game), player, rng.choice(matching)))
+                    if len(samples) == count:
+                        break
+            if game.push_move(player, *rng.choice(moves)):
+                break
+            player = 1 - player
+    return samples
+
+
+def load_focus_game(position):
+    """
+    :param position: packed position (bytes)
+    :return: game at the position (FocusGame)
+    """
+    game = FocusGame(PLAYER_A, PLAYER_B)
+    game.set_position(*deserialize_position(position))
+    return game
+
+
+def make_space(stack):
+    """
+    :param stack: colors of the pieces, bottom piece first (list of strings)
+    :return: space holding the pieces (Space)
+    """
+    space = Space(None)
+    for piece in stack:
+        space.add_piece(piece)
+    return space
+
+
+def bench_construction(rng, scale):
+    """
+    FocusGame.__init__ from the two player tuples.
+    """
+    count = int(2000 * scale)
+
+    def run():
+        for index in range(count):
+            FocusGame(PLAYER_A, PLAYER_B)
+    return run, count
+
+
+def bench_clone(rng, scale):
+    """
+    FocusGame.clone on positions sampled from random games.
+    """
+    samples = sample_positions(rng, int(500 * scale), lambda game, move: True)
+    games = [load_focus_game(position) for position, player, move in samples]
+
+    def run():
+        for game in games:
+            game.clone()
+    return run, len(games)
+
+
+def bench_move_piece(rng, scale, capture):
+    """
+    FocusGame.move_piece on positions sampled from random games, with moves that do or do not push pieces off the
+    bottom of the destination stack.
+    """
+    samples = sample_positions(rng, int(2000 * scale),
+                               lambda game, move: move[0] >= 0 and is_overflow(game, move) == capture)
+    names = (PLAYER_A[0], PLAYER_B[0])
+
+    def setup():
+        return [(load_focus_game(position), names[player], to_coord_move(move))
+                for position, player, move in samples]
+
+    def run(cases):
+        for game, name, (orig, dest, num_pieces) in cases:
+            game.move_piece(name, orig, dest, num_pieces)
+    return run, len(samples), setup
+
+
+def bench_move_piece_simple(rng, scale):
+    """
+    FocusGame.move_piece without reserving or capturing.
+    """
+    return bench_move_piece(rng, scale, False)
+
+
+def bench_move_piece_capture(rng, scale):
+    """
+    FocusGame.move_piece where pieces are reserved or captured.
+    """
+    return bench_move_piece(rng, scale, True)
+
+
+def bench_reserved_move(rng, scale):
+    """
+    FocusGame.reserved_move on positions sampled from random games.
+    """
+    samples = sample_positions(rng, int(1000 * scale), lambda game, move: move[0] < 0)
+    names = (PLAYER_A[0], PLAYER_B[0])
+
+    def setup():
+        return [(load_focus_game(position), names[player], COORDS[move[1]]) for position, player, move in samples]
+
+    def run(cases):
+        for game, name, position in cases:
+            game.reserved_move(name, position)
+    return run, len(samples), setup
+
+
+def bench_remove_pieces_from_top(rng, scale):
+    """
+    Space.remove_pieces_from_top, taking 1 to 5 pieces off a stack of 5.
+    """
+    count = int(20000 * scale)
+    amounts = [rng.randint(1, 5) for index in range(count)]
+    stacks = [[rng.choice(("RED", "GREEN")) for piece in range(5)] for index in range(count)]
+
+    def setup():
+        return [make_space(stack) for stack in stacks]
+
+    def run(spaces):
+        for space, amount in zip(spaces, amounts):
+            space.remove_pieces_from_top(amount)
+    return run, count, setup
+
+
+def bench_remove_pieces_from_bottom(rng, scale):
+    """
+    Space.remove_pieces_from_bottom on stacks of 6 to 10 pieces.
+    """
+    count = int(20000 * scale)
+    stacks = [[rng.choice(("RED", "GREEN")) for piece in range(rng.randint(6, 10))] for index in range(count)]
+
+    def setup():
+        return [make_space(stack) for stack in stacks]
+
+    def run(spaces):
+        for space in spaces:
+            space.remove_pieces_from_bottom()
+    return run, count, setup
+
+
+def bench_legal_moves(rng, scale):
+    """
+    FocusGame.legal_moves, listing every move in positions sampled from random games.
+    """
+    samples = sample_positions(rng, int(500 * scale), lambda game, move: True)
+    names = (PLAYER_A[0], PLAYER_B[0])
+    cases = [(load_focus_game(position), names[player]) for position, player, move in samples]
+
+    def run():
+        for game, name in cases:
+            for move in game.legal_moves(name):
+                pass
+    return run, len(cases)
+
+
+def play_random_games(game_class, seeds, max_moves=400):
+    """
+    Plays random games to the end through legal_moves and apply_move.
+    :param game_class: FocusGame or CompactFocusGame (class)
+    :param seeds: seed of each game (list of ints)
+    :param max_moves: number of moves after which a game is stopped (int)
+    :return: total number of moves made (int)
+    """
+    total = 0
+    for seed in seeds:
+        rng = random.Random(seed)
+        game = game_class(PLAYER_A, PLAYER_B)
+        names = (PLAYER_A[0], PLAYER_B[0])
+        player = seed % 2
+        for ply in range(max_moves):
+            moves = list(game.legal_moves(names[player]))
+            if not moves:
+                break
+            total += 1
+            if game.apply_move(names[player], rng.choice(moves)):
+                break
+            player = 1 - player
+    return total
+
+
+def bench_random_game(rng, scale, game_class):
+    """
+    Complete random games; one operation is one move, including generating the legal moves.
+    """
+    seeds = [rng.getrandbits(32) for index in range(max(1, int(20 * scale)))]
+    count = play_random_games(game_class, seeds)
+
+    def run():
+        play_random_games(game_class, seeds)
+    return run, count
+
+
+def bench_random_game_focus(rng, scale):
+    """
+    Complete random games with FocusGame.
+    """
+    return bench_random_game(rng, scale, FocusGame)
+
+
+def bench_random_game_compact(rng, scale):
+    """
+    Complete random games with CompactFocusGame.
+    """
+    return bench_random_game(rng, scale, CompactFocusGame)
+
+
+def bench_batch_engine(rng, scale):
+    """
+    BatchFocusGame playing random moves in 1024 games at once; one operation is one move in one game.
+    """
+    num_games = 1024
+    steps = max(1, int(50 * scale))
+    seed = rng.getrandbits(32)
+
+    def setup():
+        return BatchFocusGame(num_games), numpy.random.default_rng(seed)
+
+    def run(state):
+        batch, batch_rng = state
+        players = numpy.zeros(num_games, dtype=numpy.int8)
+        for step in range(steps):
+            batch.step(players, batch.random_actions(players, batch_rng))
+            players ^= 1
+    return run, num_games * steps, setup
+
+
+def bench_alphabeta(rng, scale):
+    """
+    AlphaBetaPlayer.choose_move searching to depth 3 on positions sampled from random games.
+    """
+    samples = sample_positions(rng, max(1, int(10 * scale)), lambda game, move: True)
+    names = (PLAYER_A[0], PLAYER_B[0])
+    games = []
+    for position, player, move in samples:
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        game.set_position(*deserialize_position(position))
+        games.append((game, names[player]))
+
+    def run():
+        ai = AlphaBetaPlayer(time_limit=float("inf"), max_depth=3)
+        for game, name in games:
+            ai.choose_move(game, name)
+    return run, len(games)
+
+
+def bench_mcts(rng, scale):
+    """
+    MCTSPlayer.choose_move with a fixed number of rollouts from the opening; one operation is one rollout.
+    """
+    iterations = max(1, int(500 * scale))
+    seed = rng.getrandbits(32)
+    game = CompactFocusGame(PLAYER_A, PLAYER_B)
+
+    def run():
+        MCTSPlayer(iterations=iterations, time_limit=None, seed=seed).choose_move(game, PLAYER_A[0])
+    return run, iterations
+
+
+def bench_transposition_table(rng, scale):
+    """
+    TranspositionTable.store followed by lookup, with random keys.
+    """
+    count = int(20000 * scale)
+    keys = [rng.getrandbits(64) for index in range(count)]
+    depths = [rng.randrange(8) for index in range(count)]
+
+    def run():
+        table = TranspositionTable(capacity=1 << 12)
+        for key, depth in zip(keys, depths):
+            table.store(key, depth, 0)
+        for key in keys:
+            table.lookup(key)
+    return run, 2 * count
+
+
+def bench_position_db(rng, scale):
+    """
+    PositionDatabase.lookup_position on positions sampled from random games, half of which are stored.
+    """
+    samples = sample_positions(rng, int(2000 * scale), lambda game, move: True)
+    entries = {}
+    for position, player, move in samples:
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        game.set_position(*deserialize_position(position))
+        entries[position] = game.get_hash()
+    entries = list(entries.items())
+    directory = tempfile.mkdtemp()
+    database = PositionDatabase(os.path.join(directory, "bench.fgpd"), capacity=4 * len(entries))
+    for position, key in entries[::2]:
+        database.store_position(key, position, (1, 0, 0, 0))
+
+    def cleanup():
+        database.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    atexit.register(cleanup)
+
+    def run():
+        for position, key in entries:
+            database.lookup_position(key, position)
+    return run, len(entries)
+
+
+def bench_evaluate_batch(rng, scale):
+    """
+    evaluation.evaluate_batch on positions sampled from random games.
+    """
+    positions = b"".join(position for position, player, move in
+                         sample_positions(rng, int(4000 * scale), lambda game, move: True))
+
+    def run():
+        evaluate_batch(positions)
+    return run, len(positions) // POSITION_SIZE
+
+
+BENCHMARKS = [
+    ("focusgame_init", bench_construction),
+    ("focusgame_clone", bench_clone),
+    ("move_piece_simple", bench_move_piece_simple),
+    ("move_piece_capture", bench_move_piece_capture),
+    ("reserved_move", bench_reserved_move),
+    ("space_remove_pieces_from_top", bench_remove_pieces_from_top),
+    ("space_remove_pieces_from_bottom", bench_remove_pieces_from_bottom),
+    ("legal_moves", bench_legal_moves),
+    ("random_game_focusgame", bench_random_game_focus),
+    ("random_game_compact", bench_random_game_compact),
+    ("batch_engine_step", bench_batch_engine),
+    ("alphabeta_depth3", bench_alphabeta),
+    ("mcts_rollouts", bench_mcts),
+    ("transposition_table", bench_transposition_table),
+    ("position_db_lookup", bench_position_db),
+    ("evaluate_batch", bench_evaluate_batch),
+]
+
+
+def run_benchmark(function, seed, repeats, scale):
+    """
+    Runs one benchmark several times and times it. A benchmark function returns a function to time and the number of
+    operations it does, and optionally a setup function that is called (untimed) before each run and whose result
+    is passed to it, for operations that change the objects they are run on.
+    :param function: benchmark function (function)
+    :param seed: seed for the benchmark's random inputs (int)
+    :param repeats: number of timed runs (int)
+    :param scale: multiplier for the amount of work done (float)
+    :return: timings (dict)
+    """
+    benchmark = function(random.Random(seed), scale)
+    run, ops = benchmark[0], benchmark[1]
+    setup = benchmark[2] if len(benchmark) > 2 else None
+    times = []
+    for repeat in range(repeats):
+        arguments = (setup(),) if setup is not None else ()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            run(*arguments)
+            times.append(time.perf_counter_ns() - start)
+        finally:
+            gc.enable()
+    best = min(times) / ops
+    return {
+        "ops": ops,
+        "repeats": repeats,
+        "best_ns": best,
+        "median_ns": statistics.median(times) / ops,
+        "ops_per_second": 1e9 / best if best > 0 else 0.0,
+    }
+
+
+def run_benchmarks(seed=DEFAULT_SEED, repeats=DEFAULT_REPEATS, scale=1.0, names=None, progress=None):
+    """
+    Runs the benchmark suite. Each benchmark's inputs come from its own seed, worked out from the suite's seed and the
+    benchmark's name, so results do not depend on which other benchmarks are run or added.
+    :param seed: seed for the whole suite (int)
+    :param repeats: number of timed runs of each benchmark (int)
+    :param scale: multiplier for the amount of work done (float)
+    :param names: substrings to select benchmarks by name, or None for all (list of strings)
+    :param progress: function called with each benchmark's name and timings as it finishes, or None (function)
+    :return: results, ready to be saved as JSON (dict)
+    """
+    results = {}
+    for name, function in BENCHMARKS:
+        if names and not any(part in name for part in names):
+            continue
+        if function in (bench_batch_engine, bench_evaluate_batch) and numpy is None:
+            continue
+        results[name] = run_benchmark(function, (seed << 32) ^ zlib.crc32(name.encode("utf-8")), repeats, scale)
+        if progress is not None:
+            progress(name, results[name])
+    metadata = describe_run(seed, repeats, scale)
+    metadata["benchmarks"] = results
+    return metadata
+
+
+def describe_run(seed, repeats, scale):
+    """
+    Describes how and where a benchmark run was made, for the results file.
+    :param seed: seed for the whole suite (int)
+    :param repeats: number of timed runs of each benchmark (int)
+    :param scale: multiplier for the amount of work done (float)
+    :return: metadata (dict)
+    """
+    return {
+        "version": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "repeats": repeats,
+        "scale": scale,
+    }
+
+
+def compare_metadata(current, baseline):
+    """
+    Checks that results can be compared with a baseline. Results run on different inputs (another seed, scale or
+    results format) are refused; results from another Python version, implementation or machine, or with another
+    number of repeats, can be compared but are warned about.
+    :param current: results from run_benchmarks (dict)
+    :param baseline: earlier results from run_benchmarks (dict)
+    :return: warnings (list of strings)
+    """
+    for key in INPUT_METADATA:
+        if current.get(key) != baseline.get(key):
+            raise ValueError("Baseline was run with %s %r, not %r" % (key, baseline.get(key), current.get(key)))
+    return ["Baseline was run with %s %r, not %r" % (key, baseline.get(key), current.get(key))
+            for key in ENVIRONMENT_METADATA if current.get(key) != baseline.get(key)]
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results against a baseline, using the best time per operation of each benchmark. Raises ValueError if
+    the baseline was run on different inputs (see compare_metadata).
+    :param current: results from run_benchmarks (dict)
+    :param baseline: earlier results from run_benchmarks (dict)
+    :param threshold: fraction by which a benchmark must be slower to count as a regression (float)
+    :return: (name, baseline ns per op, current ns per op, ratio, status) for every benchmark (list of tuples)
+    """
+    compare_metadata(current, baseline)
+    rows = []
+    current_benchmarks = current["benchmarks"]
+    baseline_benchmarks = baseline["benchmarks"]
+    for name in current_benchmarks:
+        now = current_benchmarks[name]["best_ns"]
+        if name not in baseline_benchmarks:
+            rows.append((name, None, now, None, NEW))
+            continue
+        before = baseline_benchmarks[name]["best_ns"]
+        ratio = now / before if before > 0 else 1.0
+        if ratio > 1 + threshold:
+            status = REGRESSION
+        elif ratio < 1 - threshold:
+            status = IMPROVEMENT
+        else:
+            status = OK
+        rows.append((name, before, now, ratio, status))
+    for name in baseline_benchmarks:
+        if name not in current_benchmarks:
+            rows.append((name, baseline_benchmarks[name]["best_ns"], None, None, MISSING))
+    return rows
+
+
+def format_ns(value):
+    """
+    :param value: time in nanoseconds, or None (float)
+    :return: time for display (string)
+    """
+    if value is None:
+        return "-"
+    if value >= 1e6:
+        return "%.2f ms" % (value / 1e6)
+    if value >= 1e3:
+        return "%.2f us" % (value / 1e3)
+    return "%.0f ns" % value
+
+
+def main():
+    """
+    Runs the benchmark suite from the command line. Exits with status 1 if any benchmark regressed against the
+    baseline, and with status 2 if the baseline was run on different inputs.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Benchmark FocusGame and its engines.")
+    parser.add_argument("--output", help="file to save results to as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown that counts as a regression, as a fraction")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the amount of work done")
+    parser.add_argument("--filter", nargs="*", help="only run benchmarks whose names contain one of these")
+    args = parser.parse_args()
+
+    def progress(name, timings):
+        print("%-32s %12s/op %14.0f ops/s" % (name, format_ns(timings["best_ns"]), timings["ops_per_second"]),
+              file=sys.stderr)
+
+    # the baseline is checked before running, so that a run that cannot be compared is not wasted
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        try:
+            warnings = compare_metadata(describe_run(args.seed, args.repeats, args.scale), baseline)
+        except ValueError as error:
+            print("Cannot compare with baseline: %s" % error, file=sys.stderr)
+            sys.exit(2)
+        for warning in warnings:
+            print("Warning: %s; timings may not be comparable" % warning, file=sys.stderr)
+
+    results = run_benchmarks(args.seed, args.repeats, args.scale, args.filter, progress)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    if baseline is not None:
+        regressed = False
+        for name, before, now, ratio, status in compare_results(results, baseline, args.threshold):
+            change = "%+.1f%%" % ((ratio - 1) * 100) if ratio is not None else "-"
+            print("%-32s %12s %12s %9s  %s" % (name, format_ns(before), format_ns(now), change, status),
+                  file=sys.stderr)
+            regressed = regressed or status == REGRESSION
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,591 @@
+#Description: Contains a compact, array-backed state engine with the same public API as FocusGame.
+
+from zobrist import CELL_KEYS, TURN_KEYS, hash_counts
+from move_tables import COORDS, DISTANCES, MOVES_BY_HEIGHT, OFF_BOARD, cell_index, coord_distance
+
+BOARD_SIZE = 6
+NUM_CELLS = BOARD_SIZE * BOARD_SIZE
+MAX_STACK = 5
+WIN_CAPTURES = 6
+
+# Each stack is packed into one small int: the low 3 bits hold the height, and the bits above hold the owner of each
+# piece (0 for player A, 1 for player B), with the bottom piece in the lowest owner bit.
+HEIGHT_BITS = 3
+HEIGHT_MASK = (1 << HEIGHT_BITS) - 1
+
+# number of player B pieces in a group of owner bits, used when stripping pieces from the bottom of a stack
+_ONES = [bin(bits).count("1") for bits in range(1 << MAX_STACK)]
+
+
+def _controlled_height(code, player):
+    """
+    :param code: packed stack (int)
+    :param player: player index (int)
+    :return: height of the stack if the player's piece is on top of it, otherwise 0 (int)
+    """
+    height = code & HEIGHT_MASK
+    if 1 <= height <= MAX_STACK and (code >> (HEIGHT_BITS + height - 1)) & 1 == player:
+        return height
+    return 0
+
+
+# For each player, a translation table (see bytes.translate) that maps every packed stack to its height if the
+# player controls it and to 0 otherwise, so that the cells a player controls are found by scanning the board in C.
+_CONTROLLED_HEIGHTS = tuple(bytes(_controlled_height(code, player) for code in range(256)) for player in range(2))
+
+_A = 1
+_B = 1 | (1 << HEIGHT_BITS)
+OPENING_CELLS = bytes([_A, _A, _B, _B, _A, _A,
+                       _B, _B, _A, _A, _B, _B,
+                       _A, _A, _B, _B, _A, _A,
+                       _B, _B, _A, _A, _B, _B,
+                       _A, _A, _B, _B, _A, _A,
+                       _B, _B, _A, _A, _B, _B])
+
+
+def pack_stack(stack, color_b):
+    """
+    Packs a stack of color strings (bottom piece at index 0) into a single int.
+    Used to convert a FocusGame Space's stack into the compact encoding.
+    :param stack: list of piece colors (list of strings)
+    :param color_b: color of player B's pieces (string)
+    :return: packed stack (int)
+    """
+    bits = 0
+    for level in range(len(stack)):
+        if stack[level] == color_b:
+            bits |= 1 << level
+    return len(stack) | (bits << HEIGHT_BITS)
+
+
+# (orig, dest, distance) for every pair of cells in line with each other, keyed by origin and then destination
+# coordinates, so that move_piece finds both cells and checks the direction and distance of a move with two lookups
+_LINE_MOVES = dict((COORDS[orig], dict((COORDS[dest], (orig, dest, DISTANCES[orig][dest]))
+                                       for dest in range(NUM_CELLS) if DISTANCES[orig][dest] > 0))
+                   for orig in range(NUM_CELLS))
+
+# names, colors and name lookup shared by every game between the same two players, keyed by the names and colors
+# given; cleared when it reaches _MAX_PLAYER_PAIRS, so that games between many different players cannot grow it forever
+_PLAYER_PAIRS = {}
+_MAX_PLAYER_PAIRS = 1024
+
+
+def _player_pair(player_a, player_b):
+    """
+    Looks up, or builds, what games between two players share: their names and colors in upper case, and the index
+    find_player_by_name gives for each name as given and in upper case.
+    :param player_a: tuple containing: (player A name, player A color)
+    :param player_b: tuple containing: (player B name, player B color)
+    :return: names, colors and name lookup (tuple: (tuple, tuple, dict))
+    """
+    key = (player_a[0], player_a[1], player_b[0], player_b[1])
+    pair = _PLAYER_PAIRS.get(key)
+    if pair is None:
+        names = (player_a[0].upper(), player_b[0].upper())
+        lookup = {}
+        for name in (player_a[0], player_b[0], names[0], names[1]):
+            lookup[name] = 0 if name.upper() == names[0] else 1
+        pair = (names, (player_a[1].upper(), player_b[1].upper()), lookup)
+        if len(_PLAYER_PAIRS) >= _MAX_PLAYER_PAIRS:
+            _PLAYER_PAIRS.clear()
+        _PLAYER_PAIRS[key] = pair
+    return pair
+
+
+def unpack_stack(code, colors):
+    """
+    Unpacks a packed stack back into a list of color strings, with bottom-most piece at index 0.
+    :param code: packed stack (int)
+    :param colors: colors of player A and player B (tuple of strings)
+    :return: stack (list)
+    """
+    bits = code >> HEIGHT_BITS
+    return [colors[(bits >> level) & 1] for level in range(code & HEIGHT_MASK)]
+
+
+class CompactFocusGame:
+    """
+    Represents the Focus game using a flat 36-cell bytearray instead of a list of lists of Space objects. Each cell holds
+    one packed stack (see pack_stack), so moving pieces, reserving and capturing are done with a few bit operations
+    instead of list and string manipulation.
+    Players are referred to internally by index (0 for player A, 1 for player B), and their reserved and captured counts
+    are kept in two-item lists.
+    The public methods (move_piece, reserved_move, show_pieces, show_reserve, show_captured) take the same parameters
+    and return the same values as the FocusGame methods of the same name, so the two classes can be used interchangeably.
+    """
+    __slots__ = ("_names", "_colors", "_lookup", "_reserved", "_captured", "_current_turn", "_cells", "_history",
+                 "_hash")
+
+    def __init__(self, player_a, player_b):
+        """
+        Initializes a compact Focus game. Takes in names and playing piece colors of two players, same as FocusGame.
+        The current_turn attribute is initialized to -1, so that either player can go first.
+        :param player_a: tuple containing: (player A name, player A color)
+        :param player_b: tuple containing: (player B name, player B color)
+        """
+        self._names, self._colors, self._lookup = _player_pair(player_a, player_b)
+        self.set_position(OPENING_CELLS, (0, 0), (0, 0), -1)
+
+    def set_position(self, cells, reserved, captured, current_turn):
+        """
+        Replaces the whole game state with the given position and clears the undo history. The hash is computed again
+        when it is next asked for. Used to start the game, and to load positions copied from elsewhere.
+        :param cells: packed stacks, indexed by row * 6 + col (36 ints)
+        :param reserved: reserved counts of player A and player B (2 ints)
+        :param captured: captured counts of player A and player B (2 ints)
+        :param current_turn: index of the player whose turn it is, or -1 if either player may move (int)
+        :return: None
+        """
+        self._cells = bytearray(cells)
+        self._reserved = list(reserved)
+        self._captured = list(captured)
+        self._current_turn = current_turn  # will be player index
+        self._history = []
+
+        # Zobrist hash of the whole position, computed the same way as FocusGame's, or None until get_hash is first
+        # called
+        self._hash = None
+
+    def clone(self):
+        """
+        Makes an independent copy of the game, including its undo history.
+        :return: copy of the game (CompactFocusGame)
+        """
+        game = CompactFocusGame.__new__(CompactFocusGame)
+        game._names = self._names
+        game._colors = self._colors
+        game._lookup = self._lookup
+        game._reserved = self._reserved[:]
+        game._captured = self._captured[:]
+        game._current_turn = self._current_turn
+        game._cells = bytearray(self._cells)
+        game._history = self._history[:]
+        game._hash = self._hash
+        return game
+
+    def move_piece(self, player_name, orig_coord, dest_coord, num_pieces):
+        """
+        Checks for correct player turn, valid origin and destination locations, and valid number of pieces.
+        If everything is valid, moves the pieces, reserves and captures, checks for a win, and changes current turn.
+        :param player_name: name of player taking turn (string)
+        :param orig_coord: coordinates of origin space, where pieces are moving from (tuple: (row, col))
+        :param dest_coord: coordinates of destination space, where pieces are moving to (tuple: (row, col))
+        :param num_pieces: number of pieces to move from origin space
+        :return: status message (string)
+        """
+        player = self._lookup.get(player_name)
+        if player is None:
+            player = self.find_player_by_name(player_name)
+        current_turn = self._current_turn
+        if player < 0 or (current_turn >= 0 and player != current_turn):
+            return "Not your turn"
+
+        # the same checks as is_valid_location, with lookups for both cells and the distance between them
+        try:
+            orig, dest, distance = _LINE_MOVES[orig_coord][dest_coord]
+        except KeyError:
+            # off the board, the same space, or not in a straight line
+            return "Invalid location"
+        except TypeError:
+            # unhashable coordinates, such as lists
+            return self.move_piece(player_name, tuple(orig_coord), tuple(dest_coord), num_pieces)
+        cells = self._cells
+        code = cells[orig]
+        height = code & HEIGHT_MASK
+        bits = code >> HEIGHT_BITS
+        if height == 0 or (bits >> (height - 1)) & 1 != player or distance != num_pieces:
+            return "Invalid location"
+        if num_pieces > height:
+            return "Invalid number of pieces"
+
+        if self._hash is None:
+            # make_move without the hash, and reserve_and_capture_pieces when no pieces come off the bottom
+            keep = height - num_pieces
+            cells[orig] = keep | ((bits & ((1 << keep) - 1)) << HEIGHT_BITS)
+            dest_code = cells[dest]
+            dest_height = dest_code & HEIGHT_MASK
+            height = dest_height + num_pieces
+            bits = (dest_code >> HEIGHT_BITS) | ((bits >> keep) << dest_height)
+            if height <= MAX_STACK:
+                cells[dest] = height | (bits << HEIGHT_BITS)
+                self._current_turn = 1 - player
+                return "Successfully moved"
+        else:
+            height, bits = self.make_move(orig, dest, num_pieces)
+        self.reserve_and_capture_pieces(dest, player, height, bits)
+
+        if self._captured[player] >= WIN_CAPTURES:
+            return player_name + " Wins"
+
+        self.change_turn(player)
+        return "Successfully moved"
+
+    def legal_moves(self, player_name):
+        """
+        Generates every valid move for a given player, in the same form as FocusGame.legal_moves: stack moves as
+        (orig_coord, dest_coord, num_pieces) and reserved moves as (None, position, 1).
+        No moves are yielded if it is not the player's turn.
+        :param player_name: name of player (string)
+        :return: generator of moves (tuples)
+        """
+        player = self.find_player_by_name(player_name)
+        if player < 0 or not self.is_correct_turn(player):
+            return
+
+        for orig, dest, num_pieces in self.generate_moves(player):
+            yield (COORDS[orig] if orig >= 0 else None), COORDS[dest], num_pieces
+
+    def generate_moves(self, player):
+        """
+        Lists every valid move for a player as (orig, dest, num_pieces) using cell indexes, with orig -1 for reserved
+        moves. Does not check whose turn it is. Used by search code, which works with cell indexes throughout.
+        The board is only 36 bytes, so instead of keeping an index of controlled cells up to date on every move, it is
+        translated into the height of each stack the player controls (0 for the others) in one C-level pass, and the
+        stack moves from each of those cells are looked up in move_tables.MOVES_BY_HEIGHT by that height.
+        :param player: player index (int)
+        :return: moves (list of tuples)
+        """
+        moves = []
+        for by_height, height in zip(MOVES_BY_HEIGHT, self._cells.translate(_CONTROLLED_HEIGHTS[player])):
+            if height:
+                moves += by_height[height]
+
+        if self._reserved[player] > 0:
+            for dest in range(NUM_CELLS):
+                moves.append((-1, dest, 1))
+        return moves
+
+    def apply_move(self, player_name, move):
+        """
+        Makes a move from legal_moves without validating it, and records what changed so that undo_move can restore
+        the previous position. Since every stack fits in one byte, the record only needs the old contents of the two
+        cells involved, the player's old reserved and captured counts, and the turn before the move.
+        :param player_name: name of player making move (string)
+        :param move: (orig_coord, dest_coord, num_pieces), or (None, position, 1) for a reserved move (tuple)
+        :return: True if the move won the game, otherwise False (boolean)
+        """
+        player = self.find_player_by_name(player_name)
+        orig_coord, dest_coord, num_pieces = move
+        dest = dest_coord[0] * BOARD_SIZE + dest_coord[1]
+        orig = -1 if orig_coord is None else orig_coord[0] * BOARD_SIZE + orig_coord[1]
+        return self.push_move(player, orig, dest, num_pieces)
+
+    def push_move(self, player, orig, dest, num_pieces):
+        """
+        Does the work of apply_move, using a player index and cell indexes instead of a name and coordinates.
+        :param player: index of player making move (int)
+        :param orig: index of the origin cell, or -1 for a reserved move (int)
+        :param dest: index of the destination cell (int)
+        :param num_pieces: number of pieces being moved (int)
+        :return: True if the move won the game, otherwise False (boolean)
+        """
+        cells = self._cells
+        self._history.append((player, orig, cells[orig] if orig >= 0 else 0, dest, cells[dest],
+                              self._reserved[player], self._captured[player], self._current_turn, self._hash))
+        if orig < 0:
+            self.place_reserved_piece(dest, player)
+        else:
+            height, bits = self.make_move(orig, dest, num_pieces)
+            self.reserve_and_capture_pieces(dest, player, height, bits)
+
+        if self._captured[player] >= WIN_CAPTURES:
+            return True
+        self.change_turn(player)
+        return False
+
+    def undo_move(self):
+        """
+        Undoes the most recent move made with apply_move or push_move by writing back the recorded cells and counts.
+        :return: True if a move was undone, False if there were no moves to undo (boolean)
+        """
+        if not self._history:
+            return False
+        player, orig, orig_code, dest, dest_code, reserved, captured, previous_turn, previous_hash = self._history.pop()
+        if orig >= 0:
+            self._cells[orig] = orig_code
+        self._cells[dest] = dest_code
+        self._reserved[player] = reserved
+        self._captured[player] = captured
+        self._current_turn = previous_turn
+        self._hash = previous_hash
+        return True
+
+    def get_hash(self):
+        """
+        Returns the Zobrist hash of the current position. It is the same as FocusGame.get_hash for the same position.
+        As in FocusGame, the hash is computed the first time it is asked for and only kept up to date after that, so
+        games that never ask for it do not pay for it.
+        :return: hash (64-bit int)
+        """
+        if self._hash is None:
+            self._hash = self.compute_hash()
+        return self._hash
+
+    def compute_hash(self):
+        """
+        Computes the Zobrist hash of the whole position from scratch.
+        :return: hash (64-bit int)
+        """
+        reserved = self._reserved
+        captured = self._captured
+        value = TURN_KEYS[self._current_turn + 1] ^ hash_counts(0, reserved[0], captured[0]) ^ \
+            hash_counts(1, reserved[1], captured[1])
+        for cell, code in enumerate(self._cells):
+            value ^= CELL_KEYS[cell][code]
+        return value
+
+    def show_pieces(self, position):
+        """
+        Shows the stack of pieces at a given space in form of a list, with bottom-most piece at index 0.
+        :param position: coordinates of space (tuple: (row, col))
+        :return: stack (list)
+        """
+        if not self.is_valid_position(position):
+            return None
+        return unpack_stack(self._cells[position[0] * BOARD_SIZE + position[1]], self._colors)
+
+    def show_reserve(self, player_name):
+        """
+        Shows count of reserved pieces for a given player.
+        :param player_name: name of player (string)
+        :return: count of reserved pieces (int)
+        """
+        player = self.find_player_by_name(player_name)
+        if player >= 0:
+            return self._reserved[player]
+        return
+
+    def show_captured(self, player_name):
+        """
+        Shows count of captured pieces for a given player.
+        :param player_name: name of player (string)
+        :return: count of captured pieces (int)
+        """
+        player = self.find_player_by_name(player_name)
+        if player >= 0:
+            return self._captured[player]
+        return
+
+    def reserved_move(self, player_name, position):
+        """
+        Places one of the player's reserved pieces on top of the stack at the given position, then reserves and
+        captures, checks for a win, and changes turns. Validates the same way as FocusGame.reserved_move.
+        :param player_name: name of player making move (string)
+        :param position: destination of reserve piece (tuple: (row, col))
+        :return: status message (string), or None if the piece was placed without winning
+        """
+        if not self.is_valid_position(position):
+            return
+
+        player = self.find_player_by_name(player_name)
+        if player < 0 or self._reserved[player] == 0:
+            return "No pieces in reserve"
+
+        self.place_reserved_piece(position[0] * BOARD_SIZE + position[1], player)
+        if self._captured[player] >= WIN_CAPTURES:
+            return player_name + " Wins"
+        self.change_turn(player)
+
+    def place_reserved_piece(self, dest, player):
+        """
+        Takes one piece from the player's reserve and adds it to the top of the destination stack, then reserves and
+        captures if the stack is now too tall.
+        :param dest: index of the destination cell (int)
+        :param player: index of player making move (int)
+        :return: None
+        """
+        code = self._cells[dest]
+        height = code & HEIGHT_MASK
+        reserved = self._reserved[player]
+        if self._hash is not None:
+            captured = self._captured[player]
+            self._hash ^= hash_counts(player, reserved, captured) ^ hash_counts(player, reserved - 1, captured)
+        self._reserved[player] = reserved - 1
+        self.reserve_and_capture_pieces(dest, player, height + 1, (code >> HEIGHT_BITS) | (player << height))
+
+    def change_turn(self, player):
+        """
+        Makes it the other player's turn and updates the hash (if it is kept) for the new turn.
+        :param player: index of player who just moved (int)
+        :return: None
+        """
+        if self._hash is not None:
+            self._hash ^= TURN_KEYS[self._current_turn + 1] ^ TURN_KEYS[2 - player]
+        self._current_turn = 1 - player
+
+    def is_valid_position(self, position):
+        """
+        Checks that the coordinates in the position are on the board.
+        :param position: coordinates of space (tuple: (row, col))
+        :return: boolean
+        """
+        return cell_index(position) != OFF_BOARD
+
+    def find_player_by_name(self, name):
+        """
+        Takes in a player's name and returns that player's index.
+        :param name: player's name (string)
+        :return: 0 for player A, 1 for player B, -1 if there is no player with that name (int)
+        """
+        player = self._lookup.get(name)
+        if player is not None:
+            return player
+        name = name.upper()
+        if name == self._names[0]:
+            return 0
+        elif name == self._names[1]:
+            return 1
+        return -1
+
+    def is_correct_turn(self, player):
+        """
+        Checks if it is a given player's turn.
+        :param player: player index (int)
+        :return: boolean
+        """
+        return self._current_turn < 0 or player == self._current_turn
+
+    def is_valid_location(self, player, orig_coord, dest_coord, num_pieces):
+        """
+        Checks that the origin and destination are on the board, that the player's piece is on top of the origin stack,
+        and that the destination is in a straight line from the origin, num_pieces spaces away (see
+        move_tables.coord_distance). At least one piece must be moved.
+        :param player: player index (int)
+        :param orig_coord: coordinates of origin space (tuple: (row, col))
+        :param dest_coord: coordinates of destination space (tuple: (row, col))
+        :param num_pieces: number of pieces being moved (int)
+        :return: boolean
+        """
+        if num_pieces < 1:
+            return False
+        distance = coord_distance(orig_coord, dest_coord)
+        if distance is None:
+            return False
+
+        code = self._cells[cell_index(orig_coord)]
+        height = code & HEIGHT_MASK
+        if height == 0 or (code >> (HEIGHT_BITS + height - 1)) & 1 != player:
+            return False
+        return distance == num_pieces
+
+    def make_move(self, orig, dest, num_pieces):
+        """
+        Removes the top num_pieces pieces from the origin cell and returns the destination stack they form, which may
+        be taller than 5 pieces. The destination cell itself is written by reserve_and_capture_pieces. Updates the hash
+        (if it is kept) for the origin cell.
+        :param orig: index of the origin cell (int)
+        :param dest: index of the destination cell (int)
+        :param num_pieces: the number of pieces being moved (int)
+        :return: height and owner bits of the new destination stack (tuple: (int, int))
+        """
+        cells = self._cells
+        code = cells[orig]
+        keep = (code & HEIGHT_MASK) - num_pieces
+        bits = code >> HEIGHT_BITS
+        new_code = keep | ((bits & ((1 << keep) - 1)) << HEIGHT_BITS)
+        if self._hash is not None:
+            self._hash ^= CELL_KEYS[orig][code] ^ CELL_KEYS[orig][new_code]
+        cells[orig] = new_code
+        dest_code = cells[dest]
+        dest_height = dest_code & HEIGHT_MASK
+        return dest_height + num_pieces, (dest_code >> HEIGHT_BITS) | ((bits >> keep) << dest_height)
+
+    def reserve_and_capture_pieces(self, dest, player, height, bits):
+        """
+        Stores a stack in the destination cell. If the stack has more than 5 pieces, removes pieces from the bottom
+        until it has 5, adding the player's own pieces to their reserve and the opponent's pieces to their captures.
+        Updates the hash (if it is kept) for the destination cell and any changed counts.
+        :param dest: index of the destination cell (int)
+        :param player: index of player making move (int)
+        :param height: height of the new stack (int)
+        :param bits: owner bits of the new stack (int)
+        :return: None
+        """
+        if height > MAX_STACK:
+            extra = height - MAX_STACK
+            removed_b = _ONES[bits & ((1 << extra) - 1)]
+            own = removed_b if player else extra - removed_b
+            reserved = self._reserved[player]
+            captured = self._captured[player]
+            self._reserved[player] = reserved + own
+            self._captured[player] = captured + extra - own
+            if self._hash is not None:
+                self._hash ^= hash_counts(player, reserved, captured) ^ \
+                    hash_counts(player, reserved + own, captured + extra - own)
+            bits >>= extra
+            height = MAX_STACK
+        code = height | (bits << HEIGHT_BITS)
+        if self._hash is not None:
+            self._hash ^= CELL_KEYS[dest][self._cells[dest]] ^ CELL_KEYS[dest][code]
+        self._cells[dest] = code
+
+    def is_win(self, player):
+        """
+        Checks if the player has captured at least 6 pieces.
+        :param player: player index (int)
+        :return: boolean
+        """
+        return self._captured[player] >= WIN_CAPTURES
+
+    def get_reserved(self):
+        """
+        :return: reserved counts of player A and player B (list of ints)
+        """
+        return self._reserved
+
+    def get_captured(self):
+        """
+        :return: captured counts of player A and player B (list of ints)
+        """
+        return self._captured
+
+    def get_colors(self):
+        """
+        :return: colors of player A and player B (tuple of strings)
+        """
+        return self._colors
+
+    def get_names(self):
+        """
+        :return: names of player A and player B (tuple of strings)
+        """
+        return self._names
+
+    def get_cells(self):
+        """
+        :return: packed stacks, indexed by row * 6 + col (bytearray)
+        """
+        return self._cells
+
+    def get_controlled(self):
+        """
+        Finds the stacks each player controls (has on top) by scanning the board.
+        :return: cell indexes of the stacks each player controls, for player A and player B (tuple of 2 lists)
+        """
+        cells = self._cells
+        return tuple([cell for cell, height in enumerate(cells.translate(_CONTROLLED_HEIGHTS[player])) if height]
+                     for player in range(2))
+
+    def get_current_turn(self):
+        """
+        :return: index of the player whose turn it is, or -1 if either player may move (int)
+        """
+        return self._current_turn
+
+
+def from_focus_game(game):
+    """
+    Makes a CompactFocusGame with the same players and position as a FocusGame.
+    The new game's undo history is empty. Only games played with the standard rules can be copied.
+    :param game: game to copy (FocusGame)
+    :return: compact copy of the game (CompactFocusGame)
+    """
+    if not game.get_rules().is_standard():
+        raise ValueError("CompactFocusGame only plays the standard rules")
+    player_a, player_b = game.get_players()
+    compact = CompactFocusGame((player_a.get_name(), player_a.get_color()), (player_b.get_name(), player_b.get_color()))
+    compact.set_position([pack_stack(game.show_pieces(position), player_b.get_color()) for position in COORDS],
+                         (player_a.get_reserved_pieces(), player_b.get_reserved_pieces()),
+                         (player_a.get_captured_pieces(), player_b.get_captured_pieces()),
+                         game.get_turn_index())
+    return compact
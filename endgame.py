@@ -0,0 +1,380 @@
+#Description: Contains an exact endgame solver for FocusGame and an on-disk tablebase of solved positions.
+
+import argparse
+import random
+import struct
+
+from compact_game import CompactFocusGame, from_focus_game, BOARD_SIZE, COORDS, WIN_CAPTURES
+from alphabeta import capture_count
+from position_db import PositionDatabase, serialize_position, NO_MOVE, MAX_LOAD
+from records import encode_move, decode_move
+
+# results, from the point of view of the player to move
+WIN = 1
+LOSS = -1
+UNKNOWN = 0
+
+# Values stored for each position in a tablebase: result, distance in plies to the end of the game (see
+# EndgameSolver), depth the position was searched to, and the best move packed with records.encode_move (NO_MOVE if there is none).
+TABLEBASE_FORMAT = struct.Struct("<bBBH")
+
+DEFAULT_MAX_DEPTH = 6
+ENDGAME_STACKS = 4
+ENDGAME_CAPTURE_MARGIN = 2
+
+
+class SolverLimit(Exception):
+    """
+    Raised inside the solver when the node limit is reached, to unwind back to the root.
+    """
+    pass
+
+
+def is_endgame(game, max_stacks=ENDGAME_STACKS, capture_margin=ENDGAME_CAPTURE_MARGIN):
+    """
+    Checks whether a position is small enough to be worth solving exactly: a player controls at most max_stacks
+    stacks, and a player has captured at least WIN_CAPTURES - capture_margin pieces.
+    :param game: game to check (CompactFocusGame)
+    :param max_stacks: most stacks the player with fewer stacks may control (int)
+    :param capture_margin: most captures the player closest to winning may still need (int)
+    :return: boolean
+    """
+    controlled = game.get_controlled()
+    if min(len(controlled[0]), len(controlled[1])) > max_stacks:
+        return False
+    return max(game.get_captured()) >= WIN_CAPTURES - capture_margin
+
+
+def to_search_game(game, player_name):
+    """
+    Copies a game into a CompactFocusGame with the given player to move, so that positions are keyed the same way no
+    matter whose turn the original game records.
+    :param game: game to copy (FocusGame or CompactFocusGame)
+    :param player_name: name of player to move (string)
+    :return: copy of the game (CompactFocusGame), and index of player to move, or -1 if there is no player with
+        that name (tuple)
+    """
+    search_game = game.clone() if isinstance(game, CompactFocusGame) else from_focus_game(game)
+    player = search_game.find_player_by_name(player_name)
+    if player >= 0 and search_game.get_current_turn() != player:
+        search_game.set_position(search_game.get_cells(), search_game.get_reserved(), search_game.get_captured(),
+                                 player)
+    return search_game, player
+
+
+def to_coord_move(move):
+    """
+    :param move: (orig, dest, num_pieces) using cell indexes, with orig -1 for a reserved move (tuple), or None
+    :return: the same move in legal_moves form (tuple), or None
+    """
+    if move is None:
+        return None
+    orig, dest, num_pieces = move
+    return (COORDS[orig] if orig >= 0 else None), COORDS[dest], num_pieces
+
+
+def to_cell_move(move):
+    """
+    :param move: move in legal_moves form (tuple), or None
+    :return: the same move using cell indexes, with orig -1 for a reserved move (tuple), or None
+    """
+    if move is None:
+        return None
+    orig_coord, dest_coord, num_pieces = move
+    orig = orig_coord[0] * BOARD_SIZE + orig_coord[1] if orig_coord is not None else -1
+    return orig, dest_coord[0] * BOARD_SIZE + dest_coord[1], num_pieces
+
+
+class EndgameSolver:
+    """
+    Represents a solver that proves whether the player to move wins or loses, and in how many plies, by searching every
+    line of play up to a depth limit. A player who captures WIN_CAPTURES pieces wins, and a player with no legal move
+    loses.
+    Distances are exact: a win is the fewest plies the winner needs against any defense, and a loss is the most plies
+    the loser can hold out. Distances count the ply that ends the game, whether it is the winner's capturing move or
+    the loser's turn with no legal move, so a capture wins at distance 1 and a player with no move has lost at distance
+    1. A result at distance d is proven by a search to depth d, and AlphaBetaPlayer scores it the same as its own
+    search would. A position with no forced result within the depth limit is UNKNOWN. Since every line is
+    searched to the limit, positions that repeat are handled like any other.
+    Results are memoized by position hash, so positions reached by different move orders are solved once. A proven
+    result is reused whenever the remaining depth covers its distance, and an UNKNOWN one only for depths no deeper
+    than the one it was searched to. If a tablebase is given, positions missing from the memo are looked up in it,
+    and every position proven during a search is stored in it, along with the root position's result.
+    """
+
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, max_nodes=None, tablebase=None):
+        """
+        Initializes the solver with an empty memo.
+        :param max_depth: depth limit, in plies (int)
+        :param max_nodes: most positions to search per call to solve, or None for no limit (int)
+        :param tablebase: tablebase to check and fill (EndgameTablebase), or None
+        """
+        self._max_depth = max_depth
+        self._max_nodes = max_nodes
+        self._tablebase = tablebase
+        self._memo = {}
+        self._nodes = 0
+
+    def solve(self, game, player_name):
+        """
+        Solves a position for the given player.
+        :param game: game to solve (FocusGame or CompactFocusGame)
+        :param player_name: name of player to move (string)
+        :return: result (WIN, LOSS or UNKNOWN), distance in plies, and best move in the same form as legal_moves,
+            or None if there is no move (tuple)
+        """
+        search_game, player = to_search_game(game, player_name)
+        if player < 0:
+            raise ValueError("No player named " + str(player_name))
+
+        self._nodes = 0
+        try:
+            result, distance, move = self.search(search_game, player, self._max_depth)
+        except SolverLimit:
+            return UNKNOWN, 0, None
+
+        if result == UNKNOWN and self._tablebase is not None and not self._tablebase.is_full():
+            # proven results are stored as they are found; this records how deep the root was searched
+            self._tablebase.store_game(search_game, player, UNKNOWN, 0, self._max_depth, None)
+        return result, distance, to_coord_move(move)
+
+    def search(self, game, player, depth):
+        """
+        Solves the position in the game for the player to move, searching depth plies ahead.
+        :param game: game to search, restored before returning (CompactFocusGame)
+        :param player: index of player to move (int)
+        :param depth: remaining depth (int)
+        :return: result, distance in plies, and best move using cell indexes, or None (tuple)
+        """
+        key = game.get_hash()
+        entry = self._memo.get(key)
+        if entry is None and self._tablebase is not None:
+            stored = self._tablebase.probe_game(game)
+            if stored is not None:
+                entry = (stored[0], stored[1], stored[2], to_cell_move(stored[3]))
+                self._memo[key] = entry
+        if entry is not None:
+            result, distance, searched, move = entry
+            if result != UNKNOWN:
+                # distances are exact, so a result further away than depth cannot be proven within it
+                if distance <= depth:
+                    return result, distance, move
+                return UNKNOWN, 0, None
+            if searched >= depth:
+                return UNKNOWN, 0, None
+
+        self._nodes += 1
+        if self._max_nodes is not None and self._nodes > self._max_nodes:
+            raise SolverLimit()
+        if depth <= 0:
+            return UNKNOWN, 0, None
+
+        moves = game.generate_moves(player)
+        if not moves:
+            # a player who cannot move has lost, on this ply
+            self._memo[key] = (LOSS, 1, depth, None)
+            if self._tablebase is not None and not self._tablebase.is_full():
+                self._tablebase.store_game(game, player, LOSS, 1, depth, None)
+            return LOSS, 1, None
+
+        # captures first, so that a winning capture ends the search at once
+        moves.sort(key=lambda move: capture_count(game, player, move), reverse=True)
+        best_win = None
+        longest_loss = None
+        all_lose = True
+        for move in moves:
+            if game.push_move(player, *move):
+                game.undo_move()
+                best_win = (1, move)
+                break
+            result, distance, reply = self.search(game, 1 - player, depth - 1)
+            game.undo_move()
+            if result == LOSS:
+                if best_win is None or distance + 1 < best_win[0]:
+                    best_win = (distance + 1, move)
+            elif result == WIN:
+                if longest_loss is None or distance + 1 > longest_loss[0]:
+                    longest_loss = (distance + 1, move)
+            else:
+                all_lose = False
+
+        if best_win is not None:
+            entry = (WIN, best_win[0], depth, best_win[1])
+        elif all_lose:
+            entry = (LOSS, longest_loss[0], depth, longest_loss[1])
+        else:
+            entry = (UNKNOWN, 0, depth, None)
+        self._memo[key] = entry
+        if entry[0] != UNKNOWN and self._tablebase is not None and not self._tablebase.is_full():
+            self._tablebase.store_game(game, player, entry[0], entry[1], depth, to_coord_move(entry[3]))
+        return entry[0], entry[1], entry[3]
+
+    def clear(self):
+        """
+        Empties the memo.
+        :return: None
+        """
+        self._memo.clear()
+
+    def get_nodes(self):
+        """
+        :return: number of positions searched during the last call to solve (int)
+        """
+        return self._nodes
+
+    def get_memo_size(self):
+        """
+        :return: number of positions in the memo (int)
+        """
+        return len(self._memo)
+
+
+class EndgameTablebase:
+    """
+    Represents a file of solved positions, stored in a PositionDatabase with TABLEBASE_FORMAT values, so that a
+    position's result, distance and best move are found with one hashed lookup in a memory-mapped file.
+    Positions are stored with the player to move as the current turn.
+    """
+
+    def __init__(self, path, capacity=None):
+        """
+        Opens a tablebase file, creating it if it does not exist.
+        :param path: path of the file (string)
+        :param capacity: number of slots, required when creating a file (int)
+        """
+        self._database = PositionDatabase(path, capacity, TABLEBASE_FORMAT)
+
+    def covers(self, game):
+        """
+        Checks whether a position is the kind the tablebase holds, so that callers can skip looking up other
+        positions.
+        :param game: game (CompactFocusGame)
+        :return: boolean
+        """
+        return is_endgame(game)
+
+    def probe(self, game, player_name):
+        """
+        Looks up a position.
+        :param game: game (FocusGame or CompactFocusGame)
+        :param player_name: name of player to move (string)
+        :return: result, distance in plies, depth searched, and best move in the same form as legal_moves or None
+            (tuple), or None if the position is not stored
+        """
+        search_game, player = to_search_game(game, player_name)
+        if player < 0:
+            return None
+        return self.probe_game(search_game)
+
+    def probe_game(self, game):
+        """
+        Looks up a position for the player whose turn it is.
+        :param game: game with the player to move as its current turn (CompactFocusGame)
+        :return: same as probe
+        """
+        values = self._database.lookup_position(game.get_hash(), serialize_position(game))
+        if values is None:
+            return None
+        result, distance, depth, word = values
+        move = decode_move(word)[1] if word != NO_MOVE else None
+        return result, distance, depth, move
+
+    def store_game(self, game, player, result, distance, depth, move):
+        """
+        Stores a solved position, replacing any result already stored for it.
+        :param game: game with the player to move as its current turn (CompactFocusGame)
+        :param player: index of player to move (int)
+        :param result: WIN, LOSS or UNKNOWN (int)
+        :param distance: distance in plies (int)
+        :param depth: depth the position was searched to (int)
+        :param move: best move in the same form as legal_moves, or None (tuple)
+        :return: None
+        """
+        word = encode_move(player, move) if move is not None else NO_MOVE
+        self._database.store_position(game.get_hash(), serialize_position(game),
+                                      (result, min(distance, 255), min(depth, 255), word))
+
+    def is_full(self):
+        """
+        :return: whether another position can no longer be stored (boolean)
+        """
+        return len(self._database) + 1 > self._database.get_capacity() * MAX_LOAD
+
+    def close(self):
+        """
+        Writes changes to disk and closes the file.
+        :return: None
+        """
+        self._database.close()
+
+    def __enter__(self):
+        """
+        :return: the tablebase, for use in a with statement (EndgameTablebase)
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Closes the file at the end of a with statement.
+        :return: None
+        """
+        self.close()
+
+    def __len__(self):
+        """
+        :return: number of stored positions (int)
+        """
+        return len(self._database)
+
+
+def collect_endgames(num_games, seed, max_moves=400):
+    """
+    Plays random games and collects the endgame positions reached (see is_endgame).
+    :param num_games: number of games to play (int)
+    :param seed: seed for the random moves (int)
+    :param max_moves: number of moves after which a game is stopped (int)
+    :return: (game, name of player to move) for each endgame position (list of tuples)
+    """
+    rng = random.Random(seed)
+    positions = []
+    for count in range(num_games):
+        game = CompactFocusGame(("PlayerA", "Red"), ("PlayerB", "Green"))
+        player = count % 2
+        for ply in range(max_moves):
+            moves = game.generate_moves(player)
+            if not moves:
+                break
+            if is_endgame(game):
+                positions.append((game.clone(), game.get_names()[player]))
+            if game.push_move(player, *rng.choice(moves)):
+                break
+            player = 1 - player
+    return positions
+
+
+def main():
+    """
+    Builds or adds to a tablebase from the command line, solving endgame positions reached in random games.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Solve FocusGame endgames into a tablebase file.")
+    parser.add_argument("path")
+    parser.add_argument("--capacity", type=int, default=1 << 16)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=DEFAULT_MAX_DEPTH)
+    parser.add_argument("--max-nodes", type=int, default=200000)
+    args = parser.parse_args()
+
+    counts = {WIN: 0, LOSS: 0, UNKNOWN: 0}
+    with EndgameTablebase(args.path, args.capacity) as tablebase:
+        solver = EndgameSolver(args.depth, args.max_nodes, tablebase)
+        for game, player_name in collect_endgames(args.games, args.seed):
+            result = solver.solve(game, player_name)[0]
+            counts[result] += 1
+        print("positions stored:", len(tablebase))
+    print("wins: %d  losses: %d  unknown: %d" % (counts[WIN], counts[LOSS], counts[UNKNOWN]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#Description: Contains a static position evaluator for FocusGame, for single positions and for batches of positions with NumPy.
+
+from compact_game import CompactFocusGame, from_focus_game, NUM_CELLS, MAX_STACK, HEIGHT_BITS, HEIGHT_MASK
+from move_tables import MOVE_TABLE, MOVES_BY_HEIGHT, OFF_BOARD
+from position_db import POSITION_SIZE
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Features of a position, from the point of view of one player. Each feature is given for the player and then for
+# the opponent.
+#   controlled: stacks with the player's piece on top
+#   height: pieces in the stacks the player controls
+#   reserved, captured: the player's reserved and captured counts
+#   mobility: number of legal moves the player has
+#   threats: moves the player has that would capture opponent pieces by pushing a stack past 5
+#   best_capture: most opponent pieces the player could capture with one move
+FEATURE_NAMES = ("controlled", "opponent_controlled", "height", "opponent_height", "reserved", "opponent_reserved",
+                 "captured", "opponent_captured", "mobility", "opponent_mobility", "threats", "opponent_threats",
+                 "best_capture", "opponent_best_capture")
+NUM_FEATURES = len(FEATURE_NAMES)
+
+DEFAULT_WEIGHTS = (10, -10, 2, -2, 30, -30, 100, -100, 1, -1, 4, -4, 25, -35)
+
+# Every packed stack fits in one byte: 3 height bits and up to 5 owner bits.
+NUM_CODES = 1 << (HEIGHT_BITS + MAX_STACK)
+
+
+def _build_code_tables():
+    """
+    Builds lookup tables indexed by packed stack.
+    :return: height of each stack, owner of its top piece (-1 if empty), and number of each player's pieces that
+        would be captured by moving n pieces onto it, indexed by [code][n][player] (tuple of lists)
+    """
+    heights = []
+    owners = []
+    captures = []
+    for code in range(NUM_CODES):
+        height = code & HEIGHT_MASK
+        bits = code >> HEIGHT_BITS
+        heights.append(height)
+        owners.append((bits >> (height - 1)) & 1 if height else -1)
+        by_pieces = []
+        for num_pieces in range(MAX_STACK + 1):
+            extra = min(height + num_pieces - MAX_STACK, height)
+            if extra <= 0:
+                by_pieces.append((0, 0))
+                continue
+            player_b_pieces = bin(bits & ((1 << extra) - 1)).count("1")
+            # player A captures player B's pieces, and player B captures player A's
+            by_pieces.append((player_b_pieces, extra - player_b_pieces))
+        captures.append(by_pieces)
+    return heights, owners, captures
+
+
+CODE_HEIGHTS, CODE_OWNERS, CODE_CAPTURES = _build_code_tables()
+
+
+def extract_features(game, player):
+    """
+    Works out the features of a position (see FEATURE_NAMES).
+    :param game: game to look at (FocusGame or CompactFocusGame)
+    :param player: index of player whose point of view to use (int)
+    :return: features (list of NUM_FEATURES ints)
+    """
+    if not isinstance(game, CompactFocusGame):
+        game = from_focus_game(game)
+    cells = game.get_cells()
+    reserved = game.get_reserved()
+    captured = game.get_captured()
+    features = [0] * NUM_FEATURES
+    for side, owner in enumerate((player, 1 - player)):
+        controlled = 0
+        height_sum = 0
+        mobility = 0
+        threats = 0
+        best_capture = 0
+        for orig in game.get_controlled()[owner]:
+            height = cells[orig] & HEIGHT_MASK
+            controlled += 1
+            height_sum += height
+            moves = MOVES_BY_HEIGHT[orig][height]
+            mobility += len(moves)
+            for move in moves:
+                capture = CODE_CAPTURES[cells[move[1]]][move[2]][owner]
+                if capture:
+                    threats += 1
+                    if capture > best_capture:
+                        best_capture = capture
+        if reserved[owner]:
+            mobility += NUM_CELLS
+            for code in cells:
+                capture = CODE_CAPTURES[code][1][owner]
+                if capture:
+                    threats += 1
+                    if capture > best_capture:
+                        best_capture = capture
+        features[side] = controlled
+        features[2 + side] = height_sum
+        features[4 + side] = reserved[owner]
+        features[6 + side] = captured[owner]
+        features[8 + side] = mobility
+        features[10 + side] = threats
+        features[12 + side] = best_capture
+    return features
+
+
+def evaluate(game, player, weights=DEFAULT_WEIGHTS):
+    """
+    Scores a position from the point of view of the given player as a weighted sum of its features. Higher is better
+    for the player.
+    :param game: game to score (FocusGame or CompactFocusGame)
+    :param player: player index (int)
+    :param weights: weight of each feature (NUM_FEATURES numbers)
+    :return: score (number)
+    """
+    score = 0
+    for feature, weight in zip(extract_features(game, player), weights):
+        score += feature * weight
+    return score
+
+
+def _build_array_tables():
+    """
+    Copies the lookup tables into NumPy arrays for extract_features_batch.
+    :return: tables (dict of arrays)
+    """
+    move_origins = []
+    move_distances = []
+    move_capture_columns = []
+    for cell in range(NUM_CELLS):
+        for destinations in MOVE_TABLE[cell]:
+            for distance, dest in enumerate(destinations, 1):
+                if dest != OFF_BOARD:
+                    move_origins.append(cell)
+                    move_distances.append(distance)
+                    move_capture_columns.append(dest * (MAX_STACK + 1) + distance)
+    move_counts = [[len(MOVES_BY_HEIGHT[cell][height]) for height in range(MAX_STACK + 1)]
+                   for cell in range(NUM_CELLS)]
+    captures = [[[CODE_CAPTURES[code][num_pieces][player] for num_pieces in range(MAX_STACK + 1)]
+                 for code in range(NUM_CODES)] for player in range(2)]
+    return {
+        "heights": np.array(CODE_HEIGHTS, dtype=np.int8),
+        "owners": np.array(CODE_OWNERS, dtype=np.int8),
+        "captures": np.array(captures, dtype=np.int8),
+        "move_origins": np.array(move_origins, dtype=np.intp),
+        "move_distances": np.array(move_distances, dtype=np.int8),
+        "move_capture_columns": np.array(move_capture_columns, dtype=np.intp),
+        "move_counts": np.array(move_counts, dtype=np.int16),
+    }
+
+
+_array_tables = None
+
+
+def positions_to_arrays(positions):
+    """
+    Unpacks many positions packed by position_db.serialize_position into arrays.
+    :param positions: packed positions (sequence of bytes), or their concatenation (bytes)
+    :return: packed stacks (N x 36), reserved counts (N x 2), captured counts (N x 2), current turn (N) (tuple of
+        int arrays)
+    """
+    data = positions if isinstance(positions, (bytes, bytearray)) else b"".join(positions)
+    raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, POSITION_SIZE)
+    turns = raw[:, NUM_CELLS + 4].view(np.int8)
+    return raw[:, :NUM_CELLS], raw[:, NUM_CELLS:NUM_CELLS + 2], raw[:, NUM_CELLS + 2:NUM_CELLS + 4], turns
+
+
+def extract_features_batch(positions, players=None):
+    """
+    Works out the features of many positions at once, with the same values as extract_features, using NumPy array
+    operations instead of a Python loop per position. Requires NumPy.
+    The features are worked out for player A and player B in every position, using small integer types and lookups in
+    precomputed tables, and then arranged from each position's chosen point of view.
+    :param positions: packed positions (see position_db.serialize_position) (sequence of bytes)
+    :param players: index of player whose point of view to use for each position, or None to use the player whose turn
+        it is (player A when either player may move) (int array of length N)
+    :return: features (int array of N x NUM_FEATURES)
+    """
+    global _array_tables
+    if np is None:
+        raise ImportError("extract_features_batch requires NumPy")
+    if _array_tables is None:
+        _array_tables = _build_array_tables()
+    tables = _array_tables
+
+    cells, reserved, captured, turns = positions_to_arrays(positions)
+    num_positions = len(cells)
+    if players is None:
+        players = np.maximum(turns, 0)
+    players = np.asarray(players, dtype=np.intp)
+
+    heights = tables["heights"][cells]
+    owners = tables["owners"][cells]
+    stack_moves = tables["move_counts"][np.arange(NUM_CELLS), heights]
+    origins = tables["move_origins"]
+    long_enough = heights[:, origins] >= tables["move_distances"]
+    origin_owners = owners[:, origins]
+
+    # features of player A and player B, in the order of FEATURE_NAMES without the opponent's
+    by_player = np.zeros((num_positions, 2, NUM_FEATURES // 2), dtype=np.int64)
+    for player in range(2):
+        controlled = owners == player
+        has_reserve = reserved[:, player] > 0
+        by_player[:, player, 0] = np.count_nonzero(controlled, axis=1)
+        by_player[:, player, 1] = (heights * controlled).sum(axis=1)
+        by_player[:, player, 2] = reserved[:, player]
+        by_player[:, player, 3] = captured[:, player]
+        by_player[:, player, 4] = (stack_moves * controlled).sum(axis=1) + NUM_CELLS * has_reserve
+
+        # pieces captured by moving n pieces onto each cell, then by every legal stack move and reserved piece
+        cell_captures = tables["captures"][player][cells].reshape(num_positions, -1)
+        stack_captures = np.take(cell_captures, tables["move_capture_columns"], axis=1)
+        stack_captures *= (origin_owners == player) & long_enough
+        reserve_captures = cell_captures[:, 1::MAX_STACK + 1] * has_reserve[:, None]
+        by_player[:, player, 5] = np.count_nonzero(stack_captures, axis=1) + \
+            np.count_nonzero(reserve_captures, axis=1)
+        by_player[:, player, 6] = np.maximum(stack_captures.max(axis=1), reserve_captures.max(axis=1))
+
+    rows = np.arange(num_positions)
+    features = np.empty((num_positions, NUM_FEATURES), dtype=np.int64)
+    features[:, 0::2] = by_player[rows, players]
+    features[:, 1::2] = by_player[rows, 1 - players]
+    return features
+
+
+def evaluate_batch(positions, players=None, weights=DEFAULT_WEIGHTS):
+    """
+    Scores many positions at once, with the same values as evaluate. Requires NumPy.
+    :param positions: packed positions (see position_db.serialize_position) (sequence of bytes)
+    :param players: same as for extract_features_batch
+    :param weights: weight of each feature (NUM_FEATURES numbers)
+    :return: scores (array of length N)
+    """
+    return extract_features_batch(positions, players) @ np.asarray(weights)
@@ -0,0 +1,205 @@
+#Description: Contains opt-in call counting, timing and rejection counters for FocusGame games.
+
+import json
+import threading
+import time
+
+# FocusGame methods that are counted and timed
+INSTRUMENTED_METHODS = ("move_piece", "reserved_move", "is_valid_location", "make_move", "reserve_and_capture_pieces")
+
+# methods whose status messages are counted
+STATUS_METHODS = ("move_piece", "reserved_move")
+
+SUCCESS_STATUSES = ("Successfully moved", "Wins")
+
+
+class GameInstrumentation:
+    """
+    Represents a set of counters for one or more FocusGame games: how many times each method in INSTRUMENTED_METHODS
+    is called and how long those calls take, and how many times move_piece and reserved_move return each status.
+    Rejections (any status other than a successful move or a win) are also counted by reason, such as
+    "Not your turn" or "Invalid location". reserved_move returns nothing both after a successful move and for an
+    invalid position, so the two are told apart and the second is counted as "Invalid position".
+    Nothing is added to FocusGame itself. attach replaces the methods of one game object with timed wrappers stored
+    on that object, and detach removes them again, so games that are not attached run exactly as before.
+    Times include time spent in nested instrumented calls, so move_piece's time includes its is_valid_location and
+    make_move calls.
+    The counters are only changed or read while holding a lock, so attached games may be played on several threads,
+    and snapshots taken by the dump thread, without losing counts.
+    """
+
+    def __init__(self):
+        """
+        Initializes empty counters.
+        """
+        self._lock = threading.Lock()
+        self._dump_thread = None
+        self._dump_stop = None
+        self.reset()
+
+    def attach(self, game):
+        """
+        Starts counting and timing calls on a game. Attaching the same game twice has no further effect.
+        :param game: game to instrument (FocusGame)
+        :return: None
+        """
+        if "_instrumentation" in vars(game):
+            return
+        game._instrumentation = self
+        for name in INSTRUMENTED_METHODS:
+            setattr(game, name, self.wrap(game, name, getattr(game, name)))
+
+    def detach(self, game):
+        """
+        Stops counting and timing calls on a game, restoring its own methods.
+        :param game: game that was attached (FocusGame)
+        :return: None
+        """
+        if vars(game).get("_instrumentation") is not self:
+            return
+        for name in INSTRUMENTED_METHODS:
+            delattr(game, name)
+        del game._instrumentation
+
+    def wrap(self, game, name, method):
+        """
+        Makes a wrapper around one of a game's methods that counts and times calls, and counts returned statuses.
+        :param game: game the method belongs to (FocusGame)
+        :param name: name of the method (string)
+        :param method: the game's method (bound method)
+        :return: wrapper (function)
+        """
+        calls = self._calls
+        times = self._times
+        lock = self._lock
+        clock = time.perf_counter_ns
+
+        if name not in STATUS_METHODS:
+            def timed(*args, **kwargs):
+                start = clock()
+                result = method(*args, **kwargs)
+                elapsed = clock() - start
+                with lock:
+                    times[name] += elapsed
+                    calls[name] += 1
+                return result
+            return timed
+
+        def timed_with_status(*args, **kwargs):
+            start = clock()
+            result = method(*args, **kwargs)
+            elapsed = clock() - start
+            with lock:
+                times[name] += elapsed
+                calls[name] += 1
+            self.record_status(game, name, args[1] if len(args) > 1 else kwargs.get("position"), result)
+            return result
+        return timed_with_status
+
+    def record_status(self, game, name, position, result):
+        """
+        Counts the status returned by move_piece or reserved_move.
+        :param game: game the call was made on (FocusGame)
+        :param name: name of the method (string)
+        :param position: second argument of the call, the position for reserved_move
+        :param result: status message returned (string or None)
+        :return: None
+        """
+        if result is None:
+            # reserved_move returns nothing both when it succeeds and when the position is invalid
+            result = "Successfully moved" if type(game).is_valid_position(game, position) else "Invalid position"
+        elif result.endswith(" Wins"):
+            result = "Wins"
+        with self._lock:
+            outcomes = self._outcomes[name]
+            outcomes[result] = outcomes.get(result, 0) + 1
+            if result not in SUCCESS_STATUSES:
+                self._rejections[result] = self._rejections.get(result, 0) + 1
+
+    def snapshot(self):
+        """
+        Copies the current counters.
+        :return: calls, total and mean time in nanoseconds for each method, statuses returned by each method, and
+            rejections by reason (dict)
+        """
+        with self._lock:
+            calls = self._calls.copy()
+            times = self._times.copy()
+            outcomes = dict((name, counts.copy()) for name, counts in self._outcomes.items())
+            rejections = self._rejections.copy()
+        methods = {}
+        for name in INSTRUMENTED_METHODS:
+            methods[name] = {
+                "calls": calls[name],
+                "total_ns": times[name],
+                "mean_ns": times[name] / calls[name] if calls[name] else 0.0,
+            }
+        return {
+            "time": time.time(),
+            "elapsed": time.perf_counter() - self._start,
+            "methods": methods,
+            "outcomes": outcomes,
+            "rejections": rejections,
+        }
+
+    def reset(self):
+        """
+        Sets every counter back to zero. Wrappers that are already attached keep counting into the same counters.
+        :return: None
+        """
+        with self._lock:
+            if hasattr(self, "_calls"):
+                for counters in (self._calls, self._times):
+                    for name in counters:
+                        counters[name] = 0
+                for counts in self._outcomes.values():
+                    counts.clear()
+                self._rejections.clear()
+            else:
+                self._calls = dict.fromkeys(INSTRUMENTED_METHODS, 0)
+                self._times = dict.fromkeys(INSTRUMENTED_METHODS, 0)
+                self._outcomes = dict((name, {}) for name in STATUS_METHODS)
+                self._rejections = {}
+            self._start = time.perf_counter()
+
+    def dump(self, path):
+        """
+        Appends a snapshot to a file as one line of JSON.
+        :param path: path of the file (string)
+        :return: None
+        """
+        with open(path, "a") as file:
+            file.write(json.dumps(self.snapshot(), sort_keys=True) + "\n")
+
+    def start_dumping(self, interval, destination):
+        """
+        Starts a background thread that takes a snapshot every interval seconds and either appends it to a file (see
+        dump) or passes it to a function.
+        :param interval: seconds between snapshots (float)
+        :param destination: path of the file (string), or function called with each snapshot (function)
+        :return: None
+        """
+        self.stop_dumping()
+        if callable(destination):
+            write = lambda: destination(self.snapshot())
+        else:
+            write = lambda: self.dump(destination)
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                write()
+        self._dump_stop = stop
+        self._dump_thread = threading.Thread(target=run, name="instrumentation-dump", daemon=True)
+        self._dump_thread.start()
+
+    def stop_dumping(self):
+        """
+        Stops the background thread started by start_dumping, if there is one.
+        :return: None
+        """
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join()
+            self._dump_thread = None
+            self._dump_stop = None
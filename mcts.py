@@ -0,0 +1,333 @@
+#Description: Contains a Monte Carlo Tree Search AI player for FocusGame with a reusable tree and parallel rollouts.
+
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from compact_game import CompactFocusGame, from_focus_game, COORDS
+from position_db import serialize_position, deserialize_position
+
+ROLLOUT_PLAYERS = (("A", "A"), ("B", "B"))
+DEFAULT_EXPLORATION = math.sqrt(2)
+
+
+def rollout(position, player, seed, max_moves):
+    """
+    Plays random moves from a position until someone wins, the player to move has no legal move (which loses the
+    game), or max_moves moves have been made.
+    :param position: packed position (see position_db.serialize_position) (bytes)
+    :param player: index of player to move (int)
+    :param seed: seed for the random moves (int)
+    :param max_moves: number of moves after which the rollout is a draw (int)
+    :return: index of the winning player, or None for a draw (int)
+    """
+    game = CompactFocusGame(ROLLOUT_PLAYERS[0], ROLLOUT_PLAYERS[1])
+    game.set_position(*deserialize_position(position))
+    rng = random.Random(seed)
+    for count in range(max_moves):
+        moves = game.generate_moves(player)
+        if not moves:
+            return 1 - player
+        if game.push_move(player, *rng.choice(moves)):
+            return player
+        player = 1 - player
+    return None
+
+
+def rollout_batch(jobs):
+    """
+    Runs a batch of rollouts. Runs in a worker process or thread.
+    :param jobs: arguments for rollout (list of tuples)
+    :return: winners (list of ints or None)
+    """
+    return [rollout(*job) for job in jobs]
+
+
+class MCTSNode:
+    """
+    Represents one node of the search tree: the position after a move. Wins are counted for the player who made the
+    move (a draw counts as half a win), so a parent can compare its children directly.
+    terminal is True when the player who made the move has won, either by capturing or because the other player has
+    no legal move.
+    """
+    __slots__ = ("move", "player", "parent", "children", "untried", "visits", "wins", "terminal", "key")
+
+    def __init__(self, move, player, parent, key):
+        """
+        Initializes a node with no visits.
+        :param move: move that led to this node, using cell indexes (tuple), or None for the root
+        :param player: index of player who made the move (int)
+        :param parent: parent node (MCTSNode), or None for the root
+        :param key: hash of the position after the move (int)
+        """
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.children = []
+        self.untried = None  # moves not yet expanded, generated on the first visit
+        self.visits = 0
+        self.wins = 0.0
+        self.terminal = False
+        self.key = key
+
+
+class MCTSPlayer:
+    """
+    Represents an AI player that picks moves with Monte Carlo Tree Search, using UCT to choose which moves to explore
+    and random rollouts to score new positions.
+    Each iteration selects a batch of leaves, one per rollout slot. Nodes on a selected path have their visit counts
+    raised straight away, so the rest of the batch is steered to other leaves. The batch's rollouts are then run
+    together, split across a pool of worker processes or threads.
+    The worker pool is only started by the first batch that has rollouts to split, and is shut down by close, or at
+    the end of a with statement.
+    The tree is kept between moves. On the next call, the node for the current position is found among the root's
+    children and grandchildren (by position hash), so the statistics gathered for that position are reused.
+    If an opening book is given, its move is played without searching whenever the position is in the book.
+    """
+
+    def __init__(self, iterations=None, time_limit=1.0, exploration=DEFAULT_EXPLORATION, workers=1, batch_size=None,
+                 use_threads=False, max_rollout_moves=200, seed=None, opening_book=None):
+        """
+        Initializes the AI player. The search stops when either budget is used up.
+        :param iterations: number of rollouts per move, or None for no limit (int)
+        :param time_limit: wall-clock time per move in seconds, or None for no limit (float)
+        :param exploration: UCT exploration constant (float)
+        :param workers: number of worker processes or threads for rollouts; 1 runs them in this process (int)
+        :param batch_size: number of leaves selected per iteration, or None for 8 per worker (int)
+        :param use_threads: whether to use threads instead of processes for rollouts (boolean)
+        :param max_rollout_moves: number of moves after which a rollout is a draw (int)
+        :param seed: seed for move choices and rollouts, or None (int)
+        :param opening_book: opening book to consult before searching (opening_book.OpeningBook), or None
+        """
+        if iterations is None and time_limit is None:
+            raise ValueError("An iteration or time budget is needed")
+        self._iterations = iterations
+        self._time_limit = time_limit
+        self._exploration = exploration
+        self._workers = workers
+        self._batch_size = batch_size or (1 if workers == 1 else 8 * workers)
+        self._use_threads = use_threads
+        self._max_rollout_moves = max_rollout_moves
+        self._rng = random.Random(seed)
+        self._opening_book = opening_book
+        self._executor = None
+        self._root = None
+        self._playouts = 0
+        self._reused_visits = 0
+        self._elapsed = 0.0
+
+    def choose_move(self, game, player_name):
+        """
+        Picks a move for the given player.
+        :param game: game to pick a move in (FocusGame or CompactFocusGame)
+        :param player_name: name of player to move (string)
+        :return: move in the same form as legal_moves (tuple), or None if the player has no move right now
+        """
+        start = time.perf_counter()
+        search_game = game.clone() if isinstance(game, CompactFocusGame) else from_focus_game(game)
+        player = search_game.find_player_by_name(player_name)
+        if player < 0 or not search_game.is_correct_turn(player) or not search_game.generate_moves(player):
+            return None
+
+        if self._opening_book is not None:
+            book_move = self._opening_book.choose_move(search_game, player_name)
+            if book_move is not None:
+                self._playouts = 0
+                self._elapsed = time.perf_counter() - start
+                return book_move
+
+        self.set_root(search_game.get_hash(), player)
+        self._playouts = 0
+        while True:
+            # the last batch is cut down to the rollouts left, so the search stops at exactly the iteration budget
+            batch_size = self._batch_size
+            if self._iterations is not None:
+                batch_size = max(min(batch_size, self._iterations - self._playouts), 1)
+            self.run_batch(search_game, batch_size)
+            if (self._iterations is not None and self._playouts >= self._iterations) or \
+                    (self._time_limit is not None and time.perf_counter() - start >= self._time_limit):
+                break
+        self._elapsed = time.perf_counter() - start
+
+        best = max(self._root.children, key=lambda child: child.visits)
+        orig, dest, num_pieces = best.move
+        return (COORDS[orig] if orig >= 0 else None), COORDS[dest], num_pieces
+
+    def set_root(self, key, player):
+        """
+        Moves the root of the tree to the current position, reusing the node for it if the tree already has one, and
+        otherwise starting a new tree.
+        :param key: hash of the current position (int)
+        :param player: index of player to move (int)
+        :return: None
+        """
+        self._reused_visits = 0
+        if self._root is not None:
+            candidates = [self._root]
+            for child in self._root.children:
+                candidates.append(child)
+                candidates.extend(child.children)
+            for node in candidates:
+                if node.key == key and node.player != player and not node.terminal:
+                    node.parent = None
+                    self._root = node
+                    self._reused_visits = node.visits
+                    return
+        self._root = MCTSNode(None, 1 - player, None, key)
+
+    def run_batch(self, game, batch_size=None):
+        """
+        Selects a batch of leaves, runs rollouts from them, and backs up the results.
+        :param game: game at the root position, restored before returning (CompactFocusGame)
+        :param batch_size: number of leaves to select, or None for the player's batch size (int)
+        :return: None
+        """
+        leaves = []
+        jobs = []
+        for count in range(batch_size or self._batch_size):
+            node, depth = self.select(game)
+            if node.terminal:
+                leaves.append((node, node.player))
+            else:
+                jobs.append((serialize_position(game), 1 - node.player, self._rng.getrandbits(32),
+                             self._max_rollout_moves))
+                leaves.append((node, -1))
+            for move in range(depth):
+                game.undo_move()
+
+        winners = iter(self.run_rollouts(jobs))
+        for node, winner in leaves:
+            self.backpropagate(node, winner if winner >= 0 else next(winners))
+        self._playouts += len(leaves)
+
+    def select(self, game):
+        """
+        Walks down the tree from the root using UCT, making each move in the game, until it reaches a node with an
+        unexpanded move (which is then expanded) or a terminal node. Visit counts on the path are raised as it goes.
+        :param game: game at the root position (CompactFocusGame)
+        :return: leaf node, and the number of moves made in the game to reach it (tuple: (MCTSNode, int))
+        """
+        node = self._root
+        node.visits += 1
+        depth = 0
+        while not node.terminal:
+            to_move = 1 - node.player
+            if node.untried is None:
+                node.untried = game.generate_moves(to_move)
+                self._rng.shuffle(node.untried)
+                if not node.untried and not node.children:
+                    # the player to move has no legal move, so the player who just moved has won
+                    node.terminal = True
+                    break
+            if node.untried:
+                move = node.untried.pop()
+                won = game.push_move(to_move, *move)
+                depth += 1
+                child = MCTSNode(move, to_move, node, game.get_hash())
+                child.terminal = won
+                child.visits += 1
+                node.children.append(child)
+                return child, depth
+            node = self.best_child(node)
+            game.push_move(node.player, *node.move)
+            depth += 1
+            node.visits += 1
+        return node, depth
+
+    def best_child(self, node):
+        """
+        Chooses the child with the highest UCT score.
+        :param node: node whose children to choose from (MCTSNode)
+        :return: child (MCTSNode)
+        """
+        log_visits = math.log(node.visits)
+        exploration = self._exploration
+        best = None
+        best_score = -1.0
+        for child in node.children:
+            score = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best = child
+                best_score = score
+        return best
+
+    def backpropagate(self, node, winner):
+        """
+        Adds a rollout result to every node from the leaf up to the root. Visits were already counted by select.
+        :param node: leaf node (MCTSNode)
+        :param winner: index of the winning player, or None for a draw (int)
+        :return: None
+        """
+        while node is not None:
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.player:
+                node.wins += 1.0
+            node = node.parent
+
+    def run_rollouts(self, jobs):
+        """
+        Runs rollouts in this process, or split across the worker pool, which is started the first time it is needed.
+        :param jobs: arguments for rollout (list of tuples)
+        :return: winners, in the same order as the jobs (list of ints or None)
+        """
+        if self._workers == 1 or len(jobs) < 2:
+            return rollout_batch(jobs)
+        if self._executor is None:
+            executor_class = ThreadPoolExecutor if self._use_threads else ProcessPoolExecutor
+            self._executor = executor_class(max_workers=self._workers)
+        chunk_size = -(-len(jobs) // self._workers)
+        chunks = [jobs[first:first + chunk_size] for first in range(0, len(jobs), chunk_size)]
+        winners = []
+        for chunk_winners in self._executor.map(rollout_batch, chunks):
+            winners.extend(chunk_winners)
+        return winners
+
+    def close(self):
+        """
+        Shuts down the worker pool, if one was started.
+        :return: None
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        """
+        :return: the player, for use in a with statement (MCTSPlayer)
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Shuts down the worker pool at the end of a with statement.
+        :return: None
+        """
+        self.close()
+
+    def get_playouts(self):
+        """
+        :return: number of rollouts during the last choose_move (int)
+        """
+        return self._playouts
+
+    def get_elapsed(self):
+        """
+        :return: time taken by the last choose_move, in seconds (float)
+        """
+        return self._elapsed
+
+    def get_playouts_per_second(self):
+        """
+        :return: rollout speed during the last choose_move (float)
+        """
+        if self._elapsed <= 0:
+            return 0.0
+        return self._playouts / self._elapsed
+
+    def get_reused_visits(self):
+        """
+        :return: number of visits the root already had from earlier moves at the start of the last choose_move (int)
+        """
+        return self._reused_visits
@@ -0,0 +1,162 @@
+#Description: Contains precomputed move tables for the FocusGame board, used to validate and generate moves with lookups.
+
+BOARD_SIZE = 6
+NUM_CELLS = BOARD_SIZE * BOARD_SIZE
+MAX_DISTANCE = 5  # a stack can hold at most 5 pieces, so no move goes further than 5 spaces
+
+OFF_BOARD = -1
+
+# Directions in the order moves are generated: up, down, left, right.
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def build_coords(board_size, edge_extensions=False):
+    """
+    Lists the spaces of a board in cell index order (row by row). The board is a square of board_size rows and columns;
+    with edge extensions, a strip of board_size - 2 spaces is added along the middle of each edge, as on the original
+    Focus board, and coordinates start from the top-left corner of the square around the strips.
+    :param board_size: number of rows and columns of the square in the middle of the board (int)
+    :param edge_extensions: whether to add the edge strips (boolean)
+    :return: (row, col) coordinates of each cell (list of tuples)
+    """
+    if not edge_extensions:
+        return [divmod(cell, board_size) for cell in range(board_size * board_size)]
+    grid_size = board_size + 2
+    coords = []
+    for row in range(grid_size):
+        for col in range(grid_size):
+            on_edge = row in (0, grid_size - 1) or col in (0, grid_size - 1)
+            # the edge strips leave out the corner and the space next to it at each end
+            if not on_edge or (2 <= row < grid_size - 2 or 2 <= col < grid_size - 2):
+                coords.append((row, col))
+    return coords
+
+
+def build_move_table(coords, max_distance):
+    """
+    Builds the destination of every move on a board.
+    :param coords: coordinates of each cell, from build_coords (list of tuples)
+    :param max_distance: longest move (int)
+    :return: table indexed by [cell][direction][distance - 1], holding the destination cell or OFF_BOARD
+        (list of lists of tuples of ints)
+    """
+    index = build_cell_index(coords)
+    table = []
+    for row, col in coords:
+        by_direction = []
+        for row_step, col_step in DIRECTIONS:
+            destinations = []
+            for distance in range(1, max_distance + 1):
+                destinations.append(index.get((row + row_step * distance, col + col_step * distance), OFF_BOARD))
+            by_direction.append(tuple(destinations))
+        table.append(tuple(by_direction))
+    return table
+
+
+def build_distances(move_table, num_cells):
+    """
+    Builds the number of pieces needed to move between every pair of cells.
+    :param move_table: table from build_move_table (list)
+    :param num_cells: number of cells on the board (int)
+    :return: table indexed by [orig][dest], holding the distance, 0 when orig and dest are the same cell, or -1 when
+        dest cannot be reached from orig in one move (list of lists of ints)
+    """
+    distances = [[-1] * num_cells for cell in range(num_cells)]
+    for orig in range(num_cells):
+        distances[orig][orig] = 0
+        for destinations in move_table[orig]:
+            for distance, dest in enumerate(destinations, 1):
+                if dest != OFF_BOARD:
+                    distances[orig][dest] = distance
+    return distances
+
+
+def build_moves_by_height(move_table, num_cells, max_distance):
+    """
+    Builds the list of stack moves from every cell for every stack height, in the same order as FocusGame.legal_moves:
+    by number of pieces, then direction.
+    :param move_table: table from build_move_table (list)
+    :param num_cells: number of cells on the board (int)
+    :param max_distance: longest move (int)
+    :return: table indexed by [cell][height], holding (orig, dest, num_pieces) moves using cell indexes
+        (list of lists of tuples)
+    """
+    moves_by_height = []
+    for cell in range(num_cells):
+        moves = []
+        by_height = [()]
+        for distance in range(1, max_distance + 1):
+            for destinations in move_table[cell]:
+                if destinations[distance - 1] != OFF_BOARD:
+                    moves.append((cell, destinations[distance - 1], distance))
+            by_height.append(tuple(moves))
+        moves_by_height.append(by_height)
+    return moves_by_height
+
+
+def build_cell_index(coords):
+    """
+    :param coords: coordinates of each cell, from build_coords (list of tuples)
+    :return: cell index of every (row, col) on the board (dict)
+    """
+    return dict((position, cell) for cell, position in enumerate(coords))
+
+
+def build_coord_moves(moves_by_height, coords):
+    """
+    :param moves_by_height: table from build_moves_by_height (list)
+    :param coords: coordinates of each cell, from build_coords (list of tuples)
+    :return: the same moves with coordinates instead of cell indexes, as returned by FocusGame.legal_moves
+        (list of lists of tuples)
+    """
+    return [[tuple((coords[orig], coords[dest], num_pieces) for orig, dest, num_pieces in moves)
+             for moves in by_height] for by_height in moves_by_height]
+
+
+def build_coord_distances(distances, coords):
+    """
+    :param distances: table from build_distances (list)
+    :param coords: coordinates of each cell, from build_coords (list of tuples)
+    :return: distances keyed by pairs of coordinates, so that a move can be checked with one lookup (dict)
+    """
+    return dict(((coords[orig], coords[dest]), distances[orig][dest])
+                for orig in range(len(coords)) for dest in range(len(coords)))
+
+
+# (row, col) coordinates of each cell index
+COORDS = build_coords(BOARD_SIZE)
+
+MOVE_TABLE = build_move_table(COORDS, MAX_DISTANCE)
+DISTANCES = build_distances(MOVE_TABLE, NUM_CELLS)
+MOVES_BY_HEIGHT = build_moves_by_height(MOVE_TABLE, NUM_CELLS, MAX_DISTANCE)
+CELL_INDEX = build_cell_index(COORDS)
+COORD_MOVES_BY_HEIGHT = build_coord_moves(MOVES_BY_HEIGHT, COORDS)
+COORD_DISTANCES = build_coord_distances(DISTANCES, COORDS)
+
+
+def cell_index(position):
+    """
+    Looks up the cell index of a position.
+    :param position: coordinates of space (tuple or list: (row, col))
+    :return: cell index, or OFF_BOARD if the position is not on the board (int)
+    """
+    try:
+        return CELL_INDEX.get(position, OFF_BOARD)
+    except TypeError:
+        # unhashable coordinates, such as a list
+        return CELL_INDEX.get(tuple(position), OFF_BOARD)
+
+
+def coord_distance(orig_coord, dest_coord):
+    """
+    Looks up the number of pieces needed to move between two positions.
+    :param orig_coord: coordinates of origin space (tuple or list: (row, col))
+    :param dest_coord: coordinates of destination space (tuple or list: (row, col))
+    :return: distance, 0 for the same space, -1 if the spaces are not in line, or None if either position is not on
+        the board (int). Neither 0 nor -1 is a number of pieces that can be moved, so callers check the count first.
+    """
+    try:
+        return COORD_DISTANCES.get((orig_coord, dest_coord))
+    except TypeError:
+        # unhashable coordinates, such as lists
+        return COORD_DISTANCES.get((tuple(orig_coord), tuple(dest_coord)))
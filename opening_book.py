@@ -0,0 +1,380 @@
+#Description: Contains an opening book for FocusGame, built from self-play or recorded games and reduced by board symmetry.
+
+import argparse
+from operator import itemgetter
+
+from compact_game import CompactFocusGame, BOARD_SIZE, NUM_CELLS, COORDS
+from endgame import to_search_game
+from move_tables import CELL_INDEX
+from position_db import PositionDatabase, POSITION_FORMAT, STATS_FORMAT, NO_MOVE, MAX_LOAD, deserialize_position
+from records import encode_move, decode_move, read_games
+from selfplay import SelfPlayRunner, MODES, RANDOM, PLAYER_A, PLAYER_B
+from zobrist import CELL_KEYS, TURN_KEYS, hash_counts
+
+DEFAULT_MAX_PLIES = 12
+DEFAULT_MIN_GAMES = 3
+
+# The 8 symmetries of a square board, as functions of (row, col, last row or column): the identity, the three
+# rotations, and the four reflections. The rules treat every direction alike, so a position and its image under any
+# of them have the same value, and the images of the best move are the best moves.
+TRANSFORMS = (
+    lambda row, col, last: (row, col),
+    lambda row, col, last: (col, last - row),
+    lambda row, col, last: (last - row, last - col),
+    lambda row, col, last: (last - col, row),
+    lambda row, col, last: (row, last - col),
+    lambda row, col, last: (last - row, col),
+    lambda row, col, last: (col, row),
+    lambda row, col, last: (last - col, last - row),
+)
+
+
+def build_symmetries(board_size):
+    """
+    Builds where each symmetry sends each cell.
+    :param board_size: number of rows and columns (int)
+    :return: table indexed by [symmetry][cell], holding the cell it is sent to (list of tuples of ints)
+    """
+    last = board_size - 1
+    return [tuple(row * board_size + col for row, col in
+                  (transform(cell // board_size, cell % board_size, last) for cell in range(board_size * board_size)))
+            for transform in TRANSFORMS]
+
+
+SYMMETRIES = build_symmetries(BOARD_SIZE)
+
+# the symmetry that undoes each symmetry
+INVERSES = [next(other for other in range(len(SYMMETRIES))
+                 if all(SYMMETRIES[other][SYMMETRIES[symmetry][cell]] == cell for cell in range(NUM_CELLS)))
+            for symmetry in range(len(SYMMETRIES))]
+
+# For each symmetry, a getter that picks the cells of a position in the order of its image, so that
+# bytes(_LAYOUTS[symmetry](cells)) is the image's packed stacks.
+_LAYOUTS = [itemgetter(*SYMMETRIES[INVERSES[symmetry]]) for symmetry in range(len(SYMMETRIES))]
+
+
+def canonical_symmetries(game):
+    """
+    Works out the canonical form of a position: of the images of the position under the 8 symmetries, the one whose
+    packed stacks come first in byte order. Positions that are images of each other have the same canonical form.
+    A position that is its own image under some symmetry (such as the opening position) is sent to its canonical form
+    by more than one symmetry.
+    :param game: game with the player to move as its current turn (CompactFocusGame)
+    :return: canonical position packed as by position_db.serialize_position (bytes), and every symmetry that sends the
+        position to it, in order (list of ints)
+    """
+    cells = game.get_cells()
+    images = [bytes(layout(cells)) for layout in _LAYOUTS]
+    best = min(images)
+    reserved = game.get_reserved()
+    captured = game.get_captured()
+    return POSITION_FORMAT.pack(best, reserved[0], reserved[1], captured[0], captured[1], game.get_current_turn()), \
+        [symmetry for symmetry, image in enumerate(images) if image == best]
+
+
+def canonical_position(game):
+    """
+    :param game: game with the player to move as its current turn (CompactFocusGame)
+    :return: canonical position (see canonical_symmetries) (bytes), and the first symmetry that sends the position to
+        it (int)
+    """
+    position, symmetries = canonical_symmetries(game)
+    return position, symmetries[0]
+
+
+def position_hash(position):
+    """
+    Computes the Zobrist hash of a packed position, the same as CompactFocusGame.get_hash for that position.
+    :param position: packed position (bytes)
+    :return: hash (64-bit int)
+    """
+    cells, reserved, captured, turn = deserialize_position(position)
+    value = TURN_KEYS[turn + 1] ^ hash_counts(0, reserved[0], captured[0]) ^ hash_counts(1, reserved[1], captured[1])
+    for cell in range(NUM_CELLS):
+        value ^= CELL_KEYS[cell][cells[cell]]
+    return value
+
+
+def transform_move(move, symmetry):
+    """
+    :param move: (orig, dest, num_pieces) using cell indexes, with orig -1 for a reserved move (tuple)
+    :param symmetry: index of symmetry (int)
+    :return: image of the move under the symmetry (tuple)
+    """
+    orig, dest, num_pieces = move
+    cells = SYMMETRIES[symmetry]
+    return (cells[orig] if orig >= 0 else -1), cells[dest], num_pieces
+
+
+def canonical_move(move, symmetries):
+    """
+    Works out the canonical form of a move: the least of its images under the symmetries that send the position to its
+    canonical form. Moves that are images of each other under a symmetry that leaves the position as it is (the mirror
+    images of a move from the opening, for one) have the same canonical form.
+    :param move: (orig, dest, num_pieces) using cell indexes, with orig -1 for a reserved move (tuple)
+    :param symmetries: symmetries from canonical_symmetries for the position the move is made from (list of ints)
+    :return: canonical move, using cell indexes of the canonical position (tuple)
+    """
+    return min(transform_move(move, symmetry) for symmetry in symmetries)
+
+
+def to_cell_move(move):
+    """
+    :param move: move in legal_moves form (tuple)
+    :return: (orig, dest, num_pieces) using cell indexes, with orig -1 for a reserved move (tuple)
+    """
+    orig_coord, dest_coord, num_pieces = move
+    return (CELL_INDEX[tuple(orig_coord)] if orig_coord is not None else -1), CELL_INDEX[tuple(dest_coord)], num_pieces
+
+
+class OpeningBookBuilder:
+    """
+    Represents the statistics gathered from the first moves of many games, from which an opening book is written.
+    Each game is replayed for its first max_plies moves. Every position reached is reduced to its canonical form (see
+    canonical_symmetries), and the move played from it to its canonical form (see canonical_move), so games that
+    differ only by a rotation or reflection of the board count toward the same entries, and so do moves that are
+    mirror images of each other from a position that is its own mirror image. For each position and move, the builder
+    counts wins, losses and draws for the player who made the move.
+    Positions are kept with the player to move as the current turn, so the opening position is a different entry
+    depending on which player moves first.
+    """
+
+    def __init__(self, max_plies=DEFAULT_MAX_PLIES):
+        """
+        Initializes an empty builder.
+        :param max_plies: number of moves of each game to add (int)
+        """
+        self._max_plies = max_plies
+        self._positions = {}
+        self._games = 0
+
+    def add_game(self, moves, winner):
+        """
+        Adds the first moves of a game.
+        :param moves: moves as (player index, move in legal_moves form), in the order they were made (list of tuples)
+        :param winner: index of the winning player, or None if there was no winner (int)
+        :return: None
+        """
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        for player, move in moves[:self._max_plies]:
+            if game.get_current_turn() != player:
+                game.set_position(game.get_cells(), game.get_reserved(), game.get_captured(), player)
+            position, symmetries = canonical_symmetries(game)
+            cell_move = to_cell_move(move)
+            counts = self._positions.setdefault(position, {}).setdefault(canonical_move(cell_move, symmetries),
+                                                                          [0, 0, 0])
+            if winner is None:
+                counts[2] += 1
+            elif winner == player:
+                counts[0] += 1
+            else:
+                counts[1] += 1
+            if game.push_move(player, *cell_move):
+                break
+        self._games += 1
+
+    def add_record(self, record):
+        """
+        Adds a recorded game.
+        :param record: recorded game (records.GameRecord)
+        :return: None
+        """
+        self.add_game(record.get_moves(), record.get_winner())
+
+    def add_selfplay_result(self, result):
+        """
+        Adds a game played by selfplay.play_game with record_moves=True. The first mover starts, and the players
+        take turns from there.
+        :param result: result of the game (dict)
+        :return: None
+        """
+        names = (PLAYER_A[0].upper(), PLAYER_B[0].upper())
+        player = names.index(result["first_mover"].upper())
+        moves = []
+        for move in result["moves"]:
+            moves.append((player, move))
+            player = 1 - player
+        winner = names.index(result["winner"].upper()) if result["winner"] is not None else None
+        self.add_game(moves, winner)
+
+    def choose_moves(self, min_games=DEFAULT_MIN_GAMES):
+        """
+        Picks the book move of every position that was reached in at least min_games games: the move with the best
+        score (wins plus half of draws, per game) among moves played at least min_games times, and of those the most
+        played.
+        :param min_games: fewest games for a position or move to be used (int)
+        :return: wins, losses and draws from the position for the player to move, and the book move, keyed by
+            canonical position (dict of tuples)
+        """
+        entries = {}
+        for position, moves in self._positions.items():
+            totals = [sum(counts[index] for counts in moves.values()) for index in range(3)]
+            if sum(totals) < min_games:
+                continue
+            best = None
+            best_rank = None
+            for move, (wins, losses, draws) in moves.items():
+                games = wins + losses + draws
+                if games < min_games:
+                    continue
+                rank = ((wins + draws / 2) / games, games)
+                if best_rank is None or rank > best_rank:
+                    best = move
+                    best_rank = rank
+            if best is not None:
+                entries[position] = (totals[0], totals[1], totals[2], best)
+        return entries
+
+    def write(self, path, min_games=DEFAULT_MIN_GAMES):
+        """
+        Writes an opening book file holding only the positions that have a book move (see choose_moves). The file is
+        sized to the number of positions, with room for the hash table to stay sparse.
+        :param path: path of the new file (string)
+        :param min_games: fewest games for a position or move to be used (int)
+        :return: number of positions written (int)
+        """
+        entries = self.choose_moves(min_games)
+        capacity = int(len(entries) / (MAX_LOAD * 0.75)) + 1
+        with PositionDatabase(path, capacity, STATS_FORMAT) as database:
+            for position, (wins, losses, draws, move) in entries.items():
+                orig, dest, num_pieces = move
+                word = encode_move(deserialize_position(position)[3],
+                                   ((COORDS[orig] if orig >= 0 else None), COORDS[dest], num_pieces))
+                database.store_position(position_hash(position), position, (wins, losses, draws, word))
+        return len(entries)
+
+    def get_games(self):
+        """
+        :return: number of games added (int)
+        """
+        return self._games
+
+    def __len__(self):
+        """
+        :return: number of distinct canonical positions seen (int)
+        """
+        return len(self._positions)
+
+
+class OpeningBook:
+    """
+    Represents an opening book file written by OpeningBookBuilder: a PositionDatabase of canonical positions, each
+    with the wins, losses and draws of the games that reached it and its book move. A position is looked up by
+    reducing it to its canonical form, and the stored move is sent back through the inverse symmetry, so a lookup
+    costs the same as one PositionDatabase lookup plus 8 permutations of the board.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a book file.
+        :param path: path of the file (string)
+        """
+        self._database = PositionDatabase(path, value_format=STATS_FORMAT)
+
+    def probe(self, game, player_name):
+        """
+        Looks up a position.
+        :param game: game (FocusGame or CompactFocusGame)
+        :param player_name: name of player to move (string)
+        :return: wins, losses and draws for the player to move, and book move in the same form as legal_moves
+            (tuple), or None if the position is not in the book
+        """
+        search_game, player = to_search_game(game, player_name)
+        if player < 0:
+            return None
+        return self.probe_game(search_game)
+
+    def probe_game(self, game):
+        """
+        Looks up a position for the player whose turn it is. The book move is sent back through the first symmetry that
+        sends the position to its canonical form, so a position that is its own mirror image always gets the same one
+        of the mirror images of the book move.
+        :param game: game with the player to move as its current turn (CompactFocusGame)
+        :return: same as probe
+        """
+        position, symmetry = canonical_position(game)
+        values = self._database.lookup_position(position_hash(position), position)
+        if values is None or values[3] == NO_MOVE:
+            return None
+        wins, losses, draws, word = values
+        orig, dest, num_pieces = transform_move(to_cell_move(decode_move(word)[1]), INVERSES[symmetry])
+        return wins, losses, draws, ((COORDS[orig] if orig >= 0 else None), COORDS[dest], num_pieces)
+
+    def choose_move(self, game, player_name):
+        """
+        Gives the book move for a position, if there is one and it is legal.
+        :param game: game (FocusGame or CompactFocusGame)
+        :param player_name: name of player to move (string)
+        :return: move in the same form as legal_moves (tuple), or None
+        """
+        search_game, player = to_search_game(game, player_name)
+        if player < 0:
+            return None
+        entry = self.probe_game(search_game)
+        if entry is None or to_cell_move(entry[3]) not in search_game.generate_moves(player):
+            return None
+        return entry[3]
+
+    def close(self):
+        """
+        Closes the file.
+        :return: None
+        """
+        self._database.close()
+
+    def __enter__(self):
+        """
+        :return: the book, for use in a with statement (OpeningBook)
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Closes the file at the end of a with statement.
+        :return: None
+        """
+        self.close()
+
+    def __len__(self):
+        """
+        :return: number of positions in the book (int)
+        """
+        return len(self._database)
+
+
+def main():
+    """
+    Builds an opening book from the command line, from self-play games or from record files.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Build a FocusGame opening book.")
+    parser.add_argument("path")
+    parser.add_argument("--records", nargs="*", default=None, help="record files to read instead of playing games")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--mode", choices=MODES, default=RANDOM)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--min-games", type=int, default=DEFAULT_MIN_GAMES)
+    args = parser.parse_args()
+
+    builder = OpeningBookBuilder(args.max_plies)
+    if args.records:
+        for path in args.records:
+            with open(path, "rb") as stream:
+                for record in read_games(stream):
+                    builder.add_record(record)
+    else:
+        runner = SelfPlayRunner(args.games, seed=args.seed, workers=args.workers, mode=args.mode,
+                                search_depth=args.depth, record_moves=True)
+        for result in runner.run():
+            builder.add_selfplay_result(result)
+    written = builder.write(args.path, args.min_games)
+    print("games:", builder.get_games())
+    print("positions seen:", len(builder))
+    print("positions written:", written)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#Description: Contains a fixed-width position format and a memory-mapped, hash-indexed on-disk store of positions.
+
+import mmap
+import os
+import struct
+
+from compact_game import CompactFocusGame, from_focus_game
+
+# 36 packed stacks, reserved and captured counts of both players, and the side to move
+POSITION_FORMAT = struct.Struct("<36s4Bb")
+POSITION_SIZE = POSITION_FORMAT.size
+
+# magic, version, value size, capacity, count, and the length of the value format string, which follows the header
+# fields in the rest of the header
+HEADER_FORMAT = struct.Struct("<4sHHQQB")
+HEADER_SIZE = 64
+MAX_FORMAT_LENGTH = HEADER_SIZE - HEADER_FORMAT.size
+MAGIC = b"FGPD"
+VERSION = 2
+
+# Each slot starts with the position's hash and a used flag, followed by the position and its values.
+SLOT_PREFIX_FORMAT = struct.Struct("<QB")
+
+# Values stored for each position by default: wins, losses and draws for the side to move, and the best move packed
+# with records.encode_move (NO_MOVE if there is none).
+STATS_FORMAT = struct.Struct("<IIIH")
+NO_MOVE = 0xFFFF
+
+MAX_LOAD = 0.9
+
+
+def serialize_position(game):
+    """
+    Packs a position into POSITION_SIZE bytes, without any Player or Space objects.
+    :param game: game whose position to pack (FocusGame or CompactFocusGame)
+    :return: packed position (bytes)
+    """
+    if not isinstance(game, CompactFocusGame):
+        game = from_focus_game(game)
+    reserved = game.get_reserved()
+    captured = game.get_captured()
+    return POSITION_FORMAT.pack(bytes(game.get_cells()), reserved[0], reserved[1], captured[0], captured[1],
+                                game.get_current_turn())
+
+
+def deserialize_position(data, offset=0):
+    """
+    Unpacks a position packed by serialize_position.
+    :param data: buffer holding the position (bytes, memoryview or mmap)
+    :param offset: where the position starts in the buffer (int)
+    :return: (cells, reserved, captured, current_turn), the arguments of set_position (tuple)
+    """
+    cells, reserved_a, reserved_b, captured_a, captured_b, turn = POSITION_FORMAT.unpack_from(data, offset)
+    return cells, (reserved_a, reserved_b), (captured_a, captured_b), turn
+
+
+class PositionDatabase:
+    """
+    Represents a file of positions and their values, memory-mapped so that the file can be much larger than RAM and
+    only the pages that are touched are read from disk.
+    The file is a 64-byte header followed by a fixed number of fixed-width slots. A position's slot is found from its
+    Zobrist hash (see FocusGame.get_hash) with linear probing, and the stored position bytes are compared as well so
+    that hash collisions cannot return the wrong entry. Values are read straight out of the mapped file with
+    struct.unpack_from.
+    The values stored with each position are described by value_format, whose format string is saved in the file
+    header, so a file can only be opened with the format it was made with. By
+    default they are win, loss and draw counts and a best move (see STATS_FORMAT and add_result).
+    """
+
+    def __init__(self, path, capacity=None, value_format=STATS_FORMAT):
+        """
+        Opens a position file, creating it if it does not exist.
+        :param path: path of the file (string)
+        :param capacity: number of slots, required when creating a file (int)
+        :param value_format: format of the values stored with each position (struct.Struct)
+        """
+        self._value_format = value_format
+        self._format_string = value_format.format.encode("ascii")
+        if len(self._format_string) > MAX_FORMAT_LENGTH:
+            raise ValueError("Value format strings can be at most %d characters" % MAX_FORMAT_LENGTH)
+        self._slot_size = SLOT_PREFIX_FORMAT.size + POSITION_SIZE + value_format.size
+        if not os.path.exists(path):
+            if not capacity:
+                raise ValueError("A capacity is needed to create a position file")
+            with open(path, "wb") as file:
+                header = HEADER_FORMAT.pack(MAGIC, VERSION, value_format.size, capacity, 0, len(self._format_string))
+                file.write((header + self._format_string).ljust(HEADER_SIZE, b"\0"))
+                file.truncate(HEADER_SIZE + capacity * self._slot_size)
+
+        self._map = None
+        self._file = open(path, "r+b")
+        if os.fstat(self._file.fileno()).st_size < HEADER_SIZE:
+            # too short for a header, which includes an empty file, which cannot be mapped at all
+            self.close()
+            raise ValueError("Not a position file: " + path)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, value_size, self._capacity, self._count, format_length = \
+            HEADER_FORMAT.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not a position file: " + path)
+        if self._map[HEADER_FORMAT.size:HEADER_FORMAT.size + format_length] != self._format_string or \
+                value_size != value_format.size:
+            self.close()
+            raise ValueError("Position file values do not match the given value format")
+        if len(self._map) < HEADER_SIZE + self._capacity * self._slot_size:
+            self.close()
+            raise ValueError("Position file is truncated: " + path)
+
+    def find_slot(self, key, position):
+        """
+        Finds the slot holding a position, or the empty slot where it would go.
+        :param key: hash of the position (int)
+        :param position: packed position (bytes)
+        :return: offset of the slot in the file, and whether the slot holds the position (tuple: (int, boolean))
+        """
+        data = self._map
+        index = key % self._capacity
+        with memoryview(data) as view:
+            for probe in range(self._capacity):
+                offset = HEADER_SIZE + index * self._slot_size
+                slot_key, used = SLOT_PREFIX_FORMAT.unpack_from(data, offset)
+                if not used:
+                    return offset, False
+                position_offset = offset + SLOT_PREFIX_FORMAT.size
+                if slot_key == key and view[position_offset:position_offset + POSITION_SIZE] == position:
+                    return offset, True
+                index += 1
+                if index == self._capacity:
+                    index = 0
+        return -1, False
+
+    def lookup(self, game):
+        """
+        Looks up the values stored for a game's current position.
+        :param game: game (FocusGame or CompactFocusGame)
+        :return: values (tuple in value_format), or None if the position is not stored
+        """
+        return self.lookup_position(game.get_hash(), serialize_position(game))
+
+    def lookup_position(self, key, position):
+        """
+        Looks up the values stored for a packed position.
+        :param key: hash of the position (int)
+        :param position: packed position (bytes)
+        :return: values (tuple in value_format), or None if the position is not stored
+        """
+        offset, found = self.find_slot(key, position)
+        if not found:
+            return None
+        return self._value_format.unpack_from(self._map, offset + SLOT_PREFIX_FORMAT.size + POSITION_SIZE)
+
+    def store(self, game, values):
+        """
+        Stores values for a game's current position, replacing any values already stored for it.
+        :param game: game (FocusGame or CompactFocusGame)
+        :param values: values to store (tuple in value_format)
+        :return: None
+        """
+        self.store_position(game.get_hash(), serialize_position(game), values)
+
+    def store_position(self, key, position, values):
+        """
+        Stores values for a packed position, replacing any values already stored for it.
+        :param key: hash of the position (int)
+        :param position: packed position (bytes)
+        :param values: values to store (tuple in value_format)
+        :return: None
+        """
+        offset, found = self.find_slot(key, position)
+        if not found:
+            if offset < 0 or self._count + 1 > self._capacity * MAX_LOAD:
+                raise ValueError("Position file is full")
+            SLOT_PREFIX_FORMAT.pack_into(self._map, offset, key, 1)
+            self._map[offset + SLOT_PREFIX_FORMAT.size:offset + SLOT_PREFIX_FORMAT.size + POSITION_SIZE] = position
+            self._count += 1
+            HEADER_FORMAT.pack_into(self._map, 0, MAGIC, VERSION, self._value_format.size, self._capacity, self._count,
+                                    len(self._format_string))
+        self._value_format.pack_into(self._map, offset + SLOT_PREFIX_FORMAT.size + POSITION_SIZE, *values)
+
+    def add_result(self, game, result, best_move=None):
+        """
+        Adds one game result to the win/loss/draw counts of a position, for files using STATS_FORMAT.
+        :param game: game (FocusGame or CompactFocusGame)
+        :param result: 1 for a win, -1 for a loss, 0 for a draw, for the side to move (int)
+        :param best_move: best move packed with records.encode_move, or None to keep the stored one (int)
+        :return: None
+        """
+        key = game.get_hash()
+        position = serialize_position(game)
+        values = self.lookup_position(key, position) or (0, 0, 0, NO_MOVE)
+        wins, losses, draws, move = values
+        if result > 0:
+            wins += 1
+        elif result < 0:
+            losses += 1
+        else:
+            draws += 1
+        if best_move is not None:
+            move = best_move
+        self.store_position(key, position, (wins, losses, draws, move))
+
+    def positions(self):
+        """
+        Goes through every stored position in slot order.
+        :return: generator of (key, packed position, values) (tuples)
+        """
+        for index in range(self._capacity):
+            offset = HEADER_SIZE + index * self._slot_size
+            key, used = SLOT_PREFIX_FORMAT.unpack_from(self._map, offset)
+            if used:
+                position_offset = offset + SLOT_PREFIX_FORMAT.size
+                yield key, self._map[position_offset:position_offset + POSITION_SIZE], \
+                    self._value_format.unpack_from(self._map, position_offset + POSITION_SIZE)
+
+    def flush(self):
+        """
+        Writes changes to disk.
+        :return: None
+        """
+        self._map.flush()
+
+    def close(self):
+        """
+        Writes changes to disk and closes the file.
+        :return: None
+        """
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        """
+        :return: the database, for use in a with statement (PositionDatabase)
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Closes the file at the end of a with statement.
+        :return: None
+        """
+        self.close()
+
+    def __len__(self):
+        """
+        :return: number of stored positions (int)
+        """
+        return self._count
+
+    def get_capacity(self):
+        """
+        :return: number of slots in the file (int)
+        """
+        return self._capacity
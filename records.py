@@ -0,0 +1,466 @@
+#Description: Contains a streaming file format for recording FocusGame games, with readers that replay them.
+
+import re
+import struct
+
+from FocusGame import FocusGame
+from compact_game import CompactFocusGame, BOARD_SIZE
+from move_tables import MOVE_TABLE, OFF_BOARD
+
+BINARY_MAGIC = b"FGR\x01"
+TEXT_MAGIC = b"FGR text 1\n"
+
+# chunk tags
+GAME_TAG = b"G"
+MOVE_TAG = b"M"
+SNAPSHOT_TAG = b"S"
+END_TAG = b"E"
+
+# Binary moves are packed into 16 bits: the moving player, a reserved-move flag, then either the destination cell
+# (reserved moves) or the origin cell, direction and distance (stack moves).
+PLAYER_BIT = 1 << 15
+RESERVE_BIT = 1 << 14
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+MOVE_FORMAT = struct.Struct("<H")
+SNAPSHOT_FORMAT = struct.Struct("<I36s4Bb")
+
+DEFAULT_SNAPSHOT_INTERVAL = 32
+
+# player names and colors are written with a one-byte length in the binary format
+MAX_NAME_BYTES = 255
+
+# Text fields are separated by tabs and chunks by newlines, so these are written as backslash escapes.
+TEXT_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+TEXT_UNESCAPES = {escape[1]: character for character, escape in TEXT_ESCAPES.items()}
+ESCAPE_PATTERN = re.compile(r"\\(.)")
+
+
+def encode_move(player, move):
+    """
+    Packs a move into a 16-bit int.
+    :param player: index of player making the move (int)
+    :param move: (orig_coord, dest_coord, num_pieces), or (None, position, 1) for a reserved move (tuple)
+    :return: packed move (int)
+    """
+    orig_coord, dest_coord, num_pieces = move
+    word = PLAYER_BIT if player else 0
+    if orig_coord is None:
+        return word | RESERVE_BIT | (dest_coord[0] * BOARD_SIZE + dest_coord[1])
+    row_diff = dest_coord[0] - orig_coord[0]
+    col_diff = dest_coord[1] - orig_coord[1]
+    direction = DIRECTIONS.index(((row_diff > 0) - (row_diff < 0), (col_diff > 0) - (col_diff < 0)))
+    orig = orig_coord[0] * BOARD_SIZE + orig_coord[1]
+    return word | (orig << 5) | (direction << 3) | (num_pieces - 1)
+
+
+def decode_move(word):
+    """
+    Unpacks a move packed by encode_move.
+    :param word: packed move (int)
+    :return: index of player making the move, and the move (tuple: (int, tuple))
+    """
+    decoded = DECODED_MOVES.get(word)
+    if decoded is not None:
+        return decoded
+    return unpack_move(word)
+
+
+def unpack_move(word):
+    """
+    Does the work of decode_move, without the lookup table.
+    :param word: packed move (int)
+    :return: index of player making the move, and the move (tuple: (int, tuple))
+    """
+    player = 1 if word & PLAYER_BIT else 0
+    if word & RESERVE_BIT:
+        return player, (None, divmod(word & 0x3F, BOARD_SIZE), 1)
+    row, col = divmod((word >> 5) & 0x3F, BOARD_SIZE)
+    row_step, col_step = DIRECTIONS[(word >> 3) & 3]
+    num_pieces = (word & 7) + 1
+    return player, ((row, col), (row + row_step * num_pieces, col + col_step * num_pieces), num_pieces)
+
+
+# Every move that can be made on the board, unpacked once so that reading a file only needs a lookup per move.
+DECODED_MOVES = dict((word, unpack_move(word))
+                     for word in [player_bit | RESERVE_BIT | cell for player_bit in (0, PLAYER_BIT)
+                                  for cell in range(BOARD_SIZE * BOARD_SIZE)] +
+                     [encode_move(player, (divmod(cell, BOARD_SIZE), divmod(dest, BOARD_SIZE), distance))
+                      for player in range(2) for cell in range(BOARD_SIZE * BOARD_SIZE)
+                      for destinations in MOVE_TABLE[cell]
+                      for distance, dest in enumerate(destinations, 1) if dest != OFF_BOARD])
+
+
+def make_move(game, player_name, move):
+    """
+    Makes a recorded move in a game through its public move_piece or reserved_move method.
+    :param game: game to make the move in (FocusGame or CompactFocusGame)
+    :param player_name: name of player making the move (string)
+    :param move: (orig_coord, dest_coord, num_pieces), or (None, position, 1) for a reserved move (tuple)
+    :return: status message returned by the game (string or None)
+    """
+    if move[0] is None:
+        return game.reserved_move(player_name, move[1])
+    return game.move_piece(player_name, move[0], move[1], move[2])
+
+
+class GameRecord:
+    """
+    Represents one recorded game: the two players, the moves made (each with the index of the player who made it),
+    the snapshots of the position taken every few moves, and the winner.
+    Snapshots are stored by the number of moves made before them, as (cells, reserved, captured, current_turn) in
+    the form taken by set_position.
+    """
+
+    def __init__(self, player_a, player_b):
+        """
+        Initializes an empty record.
+        :param player_a: tuple containing: (player A name, player A color)
+        :param player_b: tuple containing: (player B name, player B color)
+        """
+        self._players = (tuple(player_a), tuple(player_b))
+        self._moves = []
+        self._snapshots = {}
+        self._winner = None
+
+    def add_move(self, player, move):
+        """
+        :param player: index of player making the move (int)
+        :param move: move in the same form as legal_moves (tuple)
+        :return: None
+        """
+        self._moves.append((player, move))
+
+    def add_snapshot(self, move_number, snapshot):
+        """
+        :param move_number: number of moves made before the snapshot was taken (int)
+        :param snapshot: (cells, reserved, captured, current_turn) (tuple)
+        :return: None
+        """
+        self._snapshots[move_number] = snapshot
+
+    def set_winner(self, winner):
+        """
+        :param winner: index of the winning player, or None if there was no winner (int)
+        :return: None
+        """
+        self._winner = winner
+
+    def get_players(self):
+        """
+        :return: (name, color) of player A and player B (tuple of tuples)
+        """
+        return self._players
+
+    def get_moves(self):
+        """
+        :return: moves as (player index, move) (list of tuples)
+        """
+        return self._moves
+
+    def get_snapshots(self):
+        """
+        :return: snapshots by move number (dict)
+        """
+        return self._snapshots
+
+    def get_winner(self):
+        """
+        :return: index of the winning player, or None (int)
+        """
+        return self._winner
+
+    def new_game(self, game_class=FocusGame):
+        """
+        :param game_class: FocusGame or CompactFocusGame (class)
+        :return: a new game between the recorded players, at the opening position
+        """
+        return game_class(self._players[0], self._players[1])
+
+    def replay(self, game_class=FocusGame):
+        """
+        Replays the game from the start, yielding after each move.
+        :param game_class: FocusGame or CompactFocusGame (class)
+        :return: generator of (move number, status message, game) (tuples); the same game object is yielded each time
+        """
+        game = self.new_game(game_class)
+        for move_number in range(len(self._moves)):
+            player, move = self._moves[move_number]
+            status = make_move(game, self._players[player][0], move)
+            yield move_number + 1, status, game
+
+    def position_at(self, move_number, game_class=FocusGame):
+        """
+        Builds the position after a given number of moves, starting from the latest snapshot at or before that move
+        instead of from the start of the game.
+        :param move_number: number of moves to make (int)
+        :param game_class: FocusGame or CompactFocusGame (class)
+        :return: game at that position
+        """
+        game = self.new_game(game_class)
+        start = 0
+        for snapshot_move in self._snapshots:
+            if start < snapshot_move <= move_number:
+                start = snapshot_move
+        if start:
+            game.set_position(*self._snapshots[start])
+        for player, move in self._moves[start:move_number]:
+            make_move(game, self._players[player][0], move)
+        return game
+
+
+class GameRecordWriter:
+    """
+    Writes games to a file as they are played. Each chunk (game start, move, snapshot, game end) is written as soon
+    as it happens, so a game can be appended to move by move.
+    The binary format starts with BINARY_MAGIC, and each chunk is a one-byte tag followed by its data: a move takes 3
+    bytes, and a snapshot of the whole position takes 46 bytes. The text format starts with TEXT_MAGIC and has one
+    tab-separated chunk per line.
+    The writer follows each game in a CompactFocusGame so it can write a snapshot every snapshot_interval moves.
+    Player names and colors must be at most MAX_NAME_BYTES long in UTF-8, in either format, so that every game can be
+    written in both. In the text format, backslashes, tabs and newlines in them are written as backslash escapes.
+    """
+
+    def __init__(self, stream, snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL, text=False):
+        """
+        Initializes the writer and writes the file header.
+        :param stream: binary file object to write to
+        :param snapshot_interval: number of moves between snapshots, or 0 for no snapshots (int)
+        :param text: whether to use the text format instead of the binary format (boolean)
+        """
+        self._stream = stream
+        self._snapshot_interval = snapshot_interval
+        self._text = text
+        self._game = None
+        self._move_number = 0
+        stream.write(TEXT_MAGIC if text else BINARY_MAGIC)
+
+    def start_game(self, player_a, player_b):
+        """
+        Starts recording a new game at the opening position.
+        :param player_a: tuple containing: (player A name, player A color)
+        :param player_b: tuple containing: (player B name, player B color)
+        :return: None
+        """
+        fields = [player_a[0], player_a[1], player_b[0], player_b[1]]
+        encoded_fields = [field.encode("utf-8") for field in fields]
+        if any(len(encoded) > MAX_NAME_BYTES for encoded in encoded_fields):
+            raise ValueError("Player names and colors must be at most %d bytes in UTF-8" % MAX_NAME_BYTES)
+        self._game = CompactFocusGame(player_a, player_b)
+        self._move_number = 0
+        if self._text:
+            self.write_line(GAME_TAG, fields)
+        else:
+            data = GAME_TAG
+            for encoded in encoded_fields:
+                data += bytes([len(encoded)]) + encoded
+            self._stream.write(data)
+
+    def record_move(self, player_name, move):
+        """
+        Records a move made in the current game, and writes a snapshot if one is due. The move is assumed to be legal,
+        e.g. one that move_piece or reserved_move has just accepted.
+        :param player_name: name of player making the move (string)
+        :param move: move in the same form as legal_moves (tuple)
+        :return: None
+        """
+        player = self._game.find_player_by_name(player_name)
+        self._game.apply_move(player_name, move)
+        self._move_number += 1
+        if self._text:
+            if move[0] is None:
+                self.write_line(MOVE_TAG, [player, "R", "%d,%d" % tuple(move[1])])
+            else:
+                self.write_line(MOVE_TAG, [player, "%d,%d" % tuple(move[0]), "%d,%d" % tuple(move[1]), move[2]])
+        else:
+            self._stream.write(MOVE_TAG + MOVE_FORMAT.pack(encode_move(player, move)))
+
+        if self._snapshot_interval and self._move_number % self._snapshot_interval == 0:
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        """
+        Writes a snapshot of the current position.
+        :return: None
+        """
+        game = self._game
+        reserved = game.get_reserved()
+        captured = game.get_captured()
+        if self._text:
+            self.write_line(SNAPSHOT_TAG, [self._move_number, bytes(game.get_cells()).hex(), reserved[0], reserved[1],
+                                           captured[0], captured[1], game.get_current_turn()])
+        else:
+            self._stream.write(SNAPSHOT_TAG + SNAPSHOT_FORMAT.pack(self._move_number, bytes(game.get_cells()),
+                                                                   reserved[0], reserved[1], captured[0], captured[1],
+                                                                   game.get_current_turn()))
+
+    def end_game(self, winner_name=None):
+        """
+        Finishes recording the current game.
+        :param winner_name: name of the winning player, or None if there was no winner (string)
+        :return: None
+        """
+        winner = 0 if winner_name is None else self._game.find_player_by_name(winner_name) + 1
+        if self._text:
+            self.write_line(END_TAG, [winner])
+        else:
+            self._stream.write(END_TAG + bytes([winner]))
+        self._game = None
+
+    def write_line(self, tag, fields):
+        """
+        Writes one chunk of the text format.
+        :param tag: chunk tag (bytes)
+        :param fields: values to write after the tag, escaped with escape_field (list)
+        :return: None
+        """
+        self._stream.write(tag + b"".join(b"\t" + escape_field(str(field)).encode("utf-8") for field in fields) +
+                           b"\n")
+
+
+def escape_field(text):
+    """
+    :param text: field of the text format (string)
+    :return: the field with backslashes, tabs and newlines written as backslash escapes (string)
+    """
+    for character, escape in TEXT_ESCAPES.items():
+        text = text.replace(character, escape)
+    return text
+
+
+def unescape_field(text):
+    """
+    :param text: field escaped by escape_field (string)
+    :return: the field as it was before escaping (string)
+    """
+    try:
+        return ESCAPE_PATTERN.sub(lambda match: TEXT_UNESCAPES[match.group(1)], text)
+    except KeyError:
+        raise ValueError("Bad escape in field: " + repr(text))
+
+
+def read_exact(stream, size):
+    """
+    Reads the rest of a binary chunk.
+    :param stream: binary file object to read from
+    :param size: number of bytes (int)
+    :return: data read (bytes)
+    """
+    data = stream.read(size)
+    if len(data) < size:
+        raise ValueError("Truncated record")
+    return data
+
+
+def read_games(stream):
+    """
+    Reads games from a file written by GameRecordWriter, one at a time, so only the game currently being read is held
+    in memory. The format (binary or text) is detected from the file header.
+    :param stream: binary file object to read from
+    :return: generator of games (GameRecord)
+    """
+    header = stream.read(len(BINARY_MAGIC))
+    if header == BINARY_MAGIC:
+        reader = read_binary_chunks(stream)
+    elif header + stream.read(len(TEXT_MAGIC) - len(header)) == TEXT_MAGIC:
+        reader = read_text_chunks(stream)
+    else:
+        raise ValueError("Not a game record file")
+
+    record = None
+    for tag, value in reader:
+        if tag == GAME_TAG:
+            if record is not None:
+                yield record
+            record = GameRecord((value[0], value[1]), (value[2], value[3]))
+        elif tag == MOVE_TAG:
+            record.add_move(*value)
+        elif tag == SNAPSHOT_TAG:
+            record.add_snapshot(value[0], value[1:])
+        elif tag == END_TAG:
+            record.set_winner(value)
+            yield record
+            record = None
+    if record is not None:
+        yield record
+
+
+def read_binary_chunks(stream):
+    """
+    Reads the chunks of a binary game record file after its header.
+    :param stream: binary file object to read from
+    :return: generator of (tag, value) (tuples)
+    """
+    while True:
+        tag = stream.read(1)
+        if not tag:
+            return
+        if tag == MOVE_TAG:
+            yield tag, decode_move(MOVE_FORMAT.unpack(read_exact(stream, MOVE_FORMAT.size))[0])
+        elif tag == SNAPSHOT_TAG:
+            move_number, cells, reserved_a, reserved_b, captured_a, captured_b, turn = \
+                SNAPSHOT_FORMAT.unpack(read_exact(stream, SNAPSHOT_FORMAT.size))
+            yield tag, (move_number, cells, (reserved_a, reserved_b), (captured_a, captured_b), turn)
+        elif tag == GAME_TAG:
+            fields = []
+            for index in range(4):
+                length = read_exact(stream, 1)[0]
+                fields.append(read_exact(stream, length).decode("utf-8"))
+            yield tag, fields
+        elif tag == END_TAG:
+            winner = read_exact(stream, 1)[0]
+            yield tag, (winner - 1 if winner else None)
+        else:
+            raise ValueError("Unknown chunk tag: " + repr(tag))
+
+
+def read_text_chunks(stream):
+    """
+    Reads the chunks of a text game record file after its header.
+    :param stream: binary file object to read from
+    :return: generator of (tag, value) (tuples)
+    """
+    for line in stream:
+        fields = line.decode("utf-8").rstrip("\n").split("\t")
+        tag = fields[0].encode("utf-8")
+        if tag == MOVE_TAG:
+            player = int(fields[1])
+            if fields[2] == "R":
+                yield tag, (player, (None, parse_coord(fields[3]), 1))
+            else:
+                yield tag, (player, (parse_coord(fields[2]), parse_coord(fields[3]), int(fields[4])))
+        elif tag == SNAPSHOT_TAG:
+            yield tag, (int(fields[1]), bytes.fromhex(fields[2]), (int(fields[3]), int(fields[4])),
+                        (int(fields[5]), int(fields[6])), int(fields[7]))
+        elif tag == GAME_TAG:
+            yield tag, [unescape_field(field) for field in fields[1:5]]
+        elif tag == END_TAG:
+            winner = int(fields[1])
+            yield tag, (winner - 1 if winner else None)
+        elif line.strip():
+            raise ValueError("Unknown chunk tag: " + repr(tag))
+
+
+def parse_coord(text):
+    """
+    :param text: coordinates written as "row,col" (string)
+    :return: coordinates (tuple: (row, col))
+    """
+    row, col = text.split(",")
+    return int(row), int(col)
+
+
+def replay_games(stream, game_class=FocusGame):
+    """
+    Replays every game in a file through a game engine, one game at a time.
+    :param stream: binary file object to read from
+    :param game_class: FocusGame or CompactFocusGame (class)
+    :return: generator of (record, game at the end of the record) (tuples)
+    """
+    for record in read_games(stream):
+        game = record.new_game(game_class)
+        players = record.get_players()
+        for player, move in record.get_moves():
+            make_move(game, players[player][0], move)
+        yield record, game
+
@@ -0,0 +1,210 @@
+#Description: Contains a runner that plays large numbers of FocusGame games against itself across a process pool.
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from compact_game import CompactFocusGame, COORDS
+from alphabeta import AlphaBetaPlayer
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+
+RANDOM = "random"
+ALPHABETA = "alphabeta"
+MODES = (RANDOM, ALPHABETA)
+
+
+def game_seed(seed, game_index):
+    """
+    Works out the random seed for one game, so that each game is the same no matter which worker plays it.
+    :param seed: seed for the whole run (int)
+    :param game_index: index of the game in the run (int)
+    :return: seed for the game (int)
+    """
+    return (seed << 32) + game_index
+
+
+def play_game(game_index, seed, mode=RANDOM, search_depth=2, random_opening_moves=4, max_moves=400,
+              record_moves=False):
+    """
+    Plays one complete game from the opening position. Player A moves first in even-numbered games and player B in
+    odd-numbered games. A game ends when a player wins by capturing, when the player to move has no legal move (which
+    loses the game), or after max_moves moves with no winner.
+    In "alphabeta" mode both players use AlphaBetaPlayer at a fixed depth, after random_opening_moves random moves so
+    that games differ from each other.
+    :param game_index: index of the game in the run (int)
+    :param seed: seed for the whole run (int)
+    :param mode: "random" or "alphabeta" (string)
+    :param search_depth: search depth for "alphabeta" mode (int)
+    :param random_opening_moves: number of random moves at the start of "alphabeta" games (int)
+    :param max_moves: number of moves after which the game is stopped with no winner (int)
+    :param record_moves: whether to include the list of moves played in the result (boolean)
+    :return: result (dict)
+    """
+    rng = random.Random(game_seed(seed, game_index))
+    game = CompactFocusGame(PLAYER_A, PLAYER_B)
+    names = game.get_names()
+    ai = AlphaBetaPlayer(time_limit=float("inf"), max_depth=search_depth) if mode == ALPHABETA else None
+    player = game_index % 2
+    first_mover = names[player]
+    winner = None
+    reason = "move limit"
+    moves_played = []
+
+    while len(moves_played) < max_moves:
+        moves = game.generate_moves(player)
+        if not moves:
+            winner = names[1 - player]
+            reason = "no moves"
+            break
+        if ai is None or len(moves_played) < random_opening_moves:
+            orig, dest, num_pieces = rng.choice(moves)
+            move = (COORDS[orig] if orig >= 0 else None), COORDS[dest], num_pieces
+        else:
+            move = ai.choose_move(game, names[player])
+        moves_played.append(move)
+        if game.apply_move(names[player], move):
+            winner = names[player]
+            reason = "capture"
+            break
+        player = 1 - player
+
+    result = {
+        "game": game_index,
+        "seed": game_seed(seed, game_index),
+        "first_mover": first_mover,
+        "winner": winner,
+        "reason": reason,
+        "num_moves": len(moves_played),
+        "captured": list(game.get_captured()),
+        "reserved": list(game.get_reserved()),
+    }
+    if record_moves:
+        result["moves"] = moves_played
+    return result
+
+
+def play_games(first_game, num_games, seed, settings):
+    """
+    Plays a shard of consecutive games. Runs in a worker process.
+    :param first_game: index of the first game in the shard (int)
+    :param num_games: number of games in the shard (int)
+    :param seed: seed for the whole run (int)
+    :param settings: keyword arguments for play_game (dict)
+    :return: results (list of dicts)
+    """
+    return [play_game(game_index, seed, **settings) for game_index in range(first_game, first_game + num_games)]
+
+
+class SelfPlayRunner:
+    """
+    Represents a batch of self-play games. The games are split into shards of consecutive games, which are handed out
+    to a pool of worker processes. Results are passed back one shard at a time, as each shard finishes, and only a
+    few shards per worker are queued at once, so memory use does not grow with the number of games.
+    Every game is seeded from the run's seed and the game's index, so a run gives the same games no matter how many
+    workers are used.
+    """
+
+    def __init__(self, num_games, seed=0, workers=None, shard_size=16, **settings):
+        """
+        Initializes the runner.
+        :param num_games: number of games to play (int)
+        :param seed: seed for the whole run (int)
+        :param workers: number of worker processes, or None for one per CPU; 1 plays games in this process (int)
+        :param shard_size: number of games given to a worker at a time (int)
+        :param settings: keyword arguments for play_game, such as mode, search_depth and max_moves
+        """
+        if settings.get("mode", RANDOM) not in MODES:
+            raise ValueError("Unknown self-play mode: " + str(settings["mode"]))
+        self._num_games = num_games
+        self._seed = seed
+        self._workers = workers or os.cpu_count() or 1
+        self._shard_size = shard_size
+        self._settings = settings
+        self._completed = 0
+        self._elapsed = 0.0
+
+    def run(self):
+        """
+        Plays all the games, yielding each game's result as soon as its shard is finished. Results from different
+        shards can arrive in any order; each result has a "game" key with its index.
+        :return: generator of results (dicts)
+        """
+        start = time.perf_counter()
+        self._completed = 0
+        shards = [(first, min(self._shard_size, self._num_games - first))
+                  for first in range(0, self._num_games, self._shard_size)]
+
+        if self._workers == 1:
+            for first, count in shards:
+                for result in play_games(first, count, self._seed, self._settings):
+                    self._completed += 1
+                    self._elapsed = time.perf_counter() - start
+                    yield result
+            return
+
+        with ProcessPoolExecutor(max_workers=self._workers) as executor:
+            pending = set()
+            next_shard = 0
+            while next_shard < len(shards) or pending:
+                while next_shard < len(shards) and len(pending) < 2 * self._workers:
+                    first, count = shards[next_shard]
+                    pending.add(executor.submit(play_games, first, count, self._seed, self._settings))
+                    next_shard += 1
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        self._completed += 1
+                        self._elapsed = time.perf_counter() - start
+                        yield result
+
+    def get_games_completed(self):
+        """
+        :return: number of games finished so far (int)
+        """
+        return self._completed
+
+    def get_elapsed(self):
+        """
+        :return: time since the run started, as of the last finished game, in seconds (float)
+        """
+        return self._elapsed
+
+    def get_games_per_second(self):
+        """
+        :return: games finished per second so far (float)
+        """
+        if self._elapsed <= 0:
+            return 0.0
+        return self._completed / self._elapsed
+
+
+def main():
+    """
+    Runs a batch of self-play games from the command line and prints a summary.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Play FocusGame games against itself.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--mode", choices=MODES, default=RANDOM)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--max-moves", type=int, default=400)
+    args = parser.parse_args()
+
+    runner = SelfPlayRunner(args.games, seed=args.seed, workers=args.workers, mode=args.mode,
+                            search_depth=args.depth, max_moves=args.max_moves)
+    wins = {}
+    for result in runner.run():
+        wins[result["winner"]] = wins.get(result["winner"], 0) + 1
+    print("games:", runner.get_games_completed())
+    print("wins:", wins)
+    print("games/second: %.1f" % runner.get_games_per_second())
+
+
+if __name__ == "__main__":
+    main()
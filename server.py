@@ -0,0 +1,373 @@
+#Description: Contains an asyncio server that hosts many FocusGame games at once, and a client for talking to it.
+
+import argparse
+import asyncio
+import itertools
+import json
+import struct
+import time
+from collections import deque
+
+from FocusGame import FocusGame
+
+# Every message is a 4-byte big-endian length followed by that many bytes of UTF-8 JSON.
+LENGTH_FORMAT = struct.Struct(">I")
+MAX_MESSAGE_SIZE = 1 << 20
+
+# number of recent request latencies kept for percentiles
+LATENCY_WINDOW = 100000
+
+GAME_OPERATIONS = ("move_piece", "reserved_move", "show_pieces", "show_captured", "show_reserve", "legal_moves")
+
+
+async def read_message(reader):
+    """
+    Reads one framed JSON message.
+    :param reader: stream to read from (asyncio.StreamReader)
+    :return: message (dict), or None if the connection was closed
+    """
+    try:
+        header = await reader.readexactly(LENGTH_FORMAT.size)
+        length = LENGTH_FORMAT.unpack(header)[0]
+        if length > MAX_MESSAGE_SIZE:
+            raise ValueError("Message too large")
+        return json.loads(await reader.readexactly(length))
+    except asyncio.IncompleteReadError:
+        return None
+
+
+def frame_message(message):
+    """
+    Frames a JSON message for sending.
+    :param message: message (dict)
+    :return: framed message (bytes)
+    """
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return LENGTH_FORMAT.pack(len(body)) + body
+
+
+def to_coord(value):
+    """
+    :param value: coordinates sent as a JSON list (list of 2 ints)
+    :return: coordinates (tuple: (row, col))
+    """
+    return int(value[0]), int(value[1])
+
+
+def to_player_name(value):
+    """
+    :param value: player name sent in a request (string)
+    :return: player name (string)
+    """
+    if not isinstance(value, str):
+        raise TypeError("Player name must be a string")
+    return value
+
+
+def to_player(value):
+    """
+    :param value: player sent as a JSON list (list: [name, color])
+    :return: player (tuple: (name, color))
+    """
+    if not isinstance(value, list) or len(value) != 2 or not all(isinstance(field, str) for field in value):
+        raise TypeError("Player must be a list of a name and a color")
+    return value[0], value[1]
+
+
+class FocusGameProtocol(asyncio.Protocol):
+    """
+    Represents one client connection to a FocusGameServer. Incoming bytes are split into messages as they arrive,
+    every complete request is handled straight away, and the responses to all the requests in one read are sent
+    back in a single write.
+    """
+
+    def __init__(self, server):
+        """
+        :param server: server the connection belongs to (FocusGameServer)
+        """
+        self._server = server
+        self._transport = None
+        self._buffer = bytearray()
+
+    def connection_made(self, transport):
+        """
+        :param transport: the connection (asyncio.Transport)
+        :return: None
+        """
+        self._transport = transport
+
+    def data_received(self, data):
+        """
+        Handles every complete request in the data received so far.
+        :param data: bytes received (bytes)
+        :return: None
+        """
+        buffer = self._buffer
+        buffer += data
+        responses = []
+        position = 0
+        while len(buffer) - position >= LENGTH_FORMAT.size:
+            length = LENGTH_FORMAT.unpack_from(buffer, position)[0]
+            if length > MAX_MESSAGE_SIZE:
+                responses.append(frame_message({"id": None, "error": "Message too large"}))
+                self._transport.write(b"".join(responses))
+                self._transport.close()
+                return
+            end = position + LENGTH_FORMAT.size + length
+            if len(buffer) < end:
+                break
+            try:
+                request = json.loads(bytes(buffer[position + LENGTH_FORMAT.size:end]))
+                response = self._server.handle_request(request)
+            except (ValueError, RecursionError) as error:
+                # JSON nested too deeply for the decoder raises RecursionError rather than ValueError
+                response = {"id": None, "error": "Bad request: " + repr(error)}
+            responses.append(frame_message(response))
+            position = end
+        del buffer[:position]
+        if responses:
+            self._transport.write(b"".join(responses))
+
+
+class FocusGameServer:
+    """
+    Represents a server hosting many games, keyed by game id. Clients send requests such as
+    {"id": 1, "op": "move_piece", "game": "g1", "player": "PlayerA", "orig": [0, 0], "dest": [0, 1], "num_pieces": 1}
+    and get back {"id": 1, "result": "Successfully moved"}, or {"id": 1, "error": "..."} if the request was bad.
+    Supported operations are new_game, close_game, stats, and the FocusGame methods move_piece, reserved_move,
+    show_pieces, show_captured, show_reserve and legal_moves, whose results are returned unchanged.
+    Each request is handled from start to finish without giving up control of the event loop, so two requests for
+    the same game can never be interleaved, and no lock is needed, per game or global. Requests are handled in the
+    order they arrive on each connection, and clients may send many requests without waiting for the responses.
+    The time taken to handle each request is recorded, and its percentiles are returned by the stats operation.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, game_class=FocusGame):
+        """
+        Initializes the server. Call start to begin listening.
+        :param host: address to listen on (string)
+        :param port: port to listen on, or 0 to pick a free port (int)
+        :param game_class: FocusGame or CompactFocusGame (class)
+        """
+        self._host = host
+        self._port = port
+        self._game_class = game_class
+        self._games = {}
+        self._game_ids = itertools.count(1)
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._requests = 0
+        self._server = None
+
+    async def start(self):
+        """
+        Starts listening for connections.
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: FocusGameProtocol(self), self._host, self._port)
+        self._port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """
+        Starts listening if needed, and handles connections until the server is closed.
+        :return: None
+        """
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening for connections.
+        :return: None
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def handle_request(self, request):
+        """
+        Handles one request and times it. Any error is sent back as an error response, so a bad request can never
+        close the connection that sent it.
+        :param request: request (any JSON value, but only a dict is a valid request)
+        :return: response (dict)
+        """
+        if not isinstance(request, dict):
+            return {"id": None, "error": "Bad request: request must be a JSON object"}
+        start = time.perf_counter()
+        response = {"id": request.get("id")}
+        try:
+            response["result"] = self.dispatch(request)
+        except (KeyError, TypeError, ValueError, IndexError) as error:
+            response["error"] = "Bad request: " + repr(error)
+        except Exception as error:
+            response["error"] = "Server error: " + repr(error)
+        self._latencies.append(time.perf_counter() - start)
+        self._requests += 1
+        return response
+
+    def dispatch(self, request):
+        """
+        Carries out one request.
+        :param request: request (dict)
+        :return: result of the request
+        """
+        op = request["op"]
+        if op == "new_game":
+            game_id = str(request.get("game") or next(self._game_ids))
+            if game_id in self._games:
+                raise ValueError("Game already exists: " + game_id)
+            self._games[game_id] = self._game_class(to_player(request["player_a"]), to_player(request["player_b"]))
+            return game_id
+        if op == "close_game":
+            return self._games.pop(str(request["game"]), None) is not None
+        if op == "stats":
+            return {"games": len(self._games), "requests": self._requests,
+                    "latency": self.get_latency_percentiles()}
+        if op not in GAME_OPERATIONS:
+            raise ValueError("Unknown operation: " + str(op))
+
+        game = self._games[str(request["game"])]
+        if op == "show_pieces":
+            pieces = game.show_pieces(to_coord(request["position"]))
+            return list(pieces) if pieces is not None else None
+        player = to_player_name(request["player"])
+        if op == "move_piece":
+            return game.move_piece(player, to_coord(request["orig"]), to_coord(request["dest"]),
+                                   int(request["num_pieces"]))
+        if op == "reserved_move":
+            return game.reserved_move(player, to_coord(request["position"]))
+        if op == "show_captured":
+            return game.show_captured(player)
+        if op == "show_reserve":
+            return game.show_reserve(player)
+        return list(game.legal_moves(player))
+
+    def get_latency_percentiles(self, percentiles=(50, 90, 99, 99.9)):
+        """
+        Works out percentiles of the time taken to handle recent requests.
+        :param percentiles: percentiles to work out (tuple of numbers)
+        :return: latency in milliseconds for each percentile, keyed like "p99", plus "max" (dict)
+        """
+        latencies = sorted(self._latencies)
+        result = {}
+        if not latencies:
+            return result
+        for percentile in percentiles:
+            index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+            result["p%g" % percentile] = latencies[index] * 1000
+        result["max"] = latencies[-1] * 1000
+        return result
+
+    def get_port(self):
+        """
+        :return: port the server is listening on (int)
+        """
+        return self._port
+
+    def get_num_games(self):
+        """
+        :return: number of games being hosted (int)
+        """
+        return len(self._games)
+
+
+class FocusGameClient:
+    """
+    Represents a connection to a FocusGameServer. Requests can be sent concurrently; each response is matched to
+    its request by id. Once the connection is closed, or a response cannot be read, every request still waiting and
+    every new request fails with ConnectionError.
+    """
+
+    def __init__(self):
+        """
+        Initializes an unconnected client. Call connect before sending requests.
+        """
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._request_ids = itertools.count(1)
+        self._receiver = None
+        self._closed = False
+
+    async def connect(self, host, port):
+        """
+        Connects to a server.
+        :param host: server address (string)
+        :param port: server port (int)
+        :return: None
+        """
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._receiver = asyncio.ensure_future(self.receive())
+
+    async def receive(self):
+        """
+        Reads responses and hands each one to the request waiting for it, until the connection is closed.
+        :return: None
+        """
+        try:
+            while True:
+                response = await read_message(self._reader)
+                if response is None:
+                    break
+                if not isinstance(response, dict):
+                    raise ValueError("Bad response: " + repr(response))
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except (OSError, TypeError, ValueError):
+            # a reset connection or an unreadable response; the connection cannot be used after either
+            self._writer.close()
+        finally:
+            self._closed = True
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection closed"))
+            self._pending.clear()
+
+    async def request(self, op, **fields):
+        """
+        Sends a request and waits for its response.
+        :param op: operation name (string)
+        :param fields: other fields of the request
+        :return: result of the request
+        """
+        if self._closed:
+            raise ConnectionError("Connection closed")
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        fields["id"] = request_id
+        fields["op"] = op
+        self._writer.write(frame_message(fields))
+        response = await future
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    async def close(self):
+        """
+        Closes the connection.
+        :return: None
+        """
+        self._writer.close()
+        await self._writer.wait_closed()
+        if self._receiver is not None:
+            await self._receiver
+
+
+def main():
+    """
+    Runs the server from the command line.
+    :return: None
+    """
+    parser = argparse.ArgumentParser(description="Host FocusGame games over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(FocusGameServer(args.host, args.port).serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#Description: Tests for the alpha-beta search AI player.
+
+import os
+import random
+import tempfile
+import unittest
+
+from alphabeta import AlphaBetaPlayer, evaluate, to_table_score, from_table_score, WIN_SCORE, INFINITY
+from compact_game import CompactFocusGame
+from endgame import EndgameSolver, EndgameTablebase, WIN, LOSS, UNKNOWN
+from test_helpers import random_endgame, random_positions, winning_moves
+from transposition import TranspositionTable
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+
+def negamax(game, player, depth, ply):
+    """
+    Plain negamax search without pruning or a transposition table, scoring positions the same way as
+    AlphaBetaPlayer.search.
+    :param game: game to search (CompactFocusGame)
+    :param player: index of player to move (int)
+    :param depth: remaining depth (int)
+    :param ply: distance from the root (int)
+    :return: score for the player to move (int)
+    """
+    if depth <= 0:
+        return evaluate(game, player)
+    moves = game.generate_moves(player)
+    if not moves:
+        return -WIN_SCORE + ply
+    best_value = -INFINITY
+    for move in moves:
+        if game.push_move(player, *move):
+            value = WIN_SCORE - ply
+        else:
+            value = -negamax(game, 1 - player, depth - 1, ply + 1)
+        game.undo_move()
+        best_value = max(best_value, value)
+    return best_value
+
+
+class MateScoreTest(unittest.TestCase):
+    """
+    Checks that win and loss scores are stored relative to the position and read back relative to the root.
+    """
+
+    def test_conversion(self):
+        self.assertEqual(to_table_score(WIN_SCORE - 5, 3), WIN_SCORE - 2)
+        self.assertEqual(to_table_score(-WIN_SCORE + 5, 3), -WIN_SCORE + 2)
+        self.assertEqual(from_table_score(WIN_SCORE - 2, 7), WIN_SCORE - 9)
+        self.assertEqual(from_table_score(-WIN_SCORE + 2, 7), -WIN_SCORE + 9)
+        for value in (0, 120, -340):
+            self.assertEqual(to_table_score(value, 4), value)
+            self.assertEqual(from_table_score(value, 4), value)
+
+    def test_stored_win_read_at_another_ply(self):
+        checked = 0
+        for seed in range(20):
+            for game, player in random_positions(seed):
+                if not winning_moves(game, player):
+                    continue
+                searcher = AlphaBetaPlayer(time_limit=60)
+                # a win found with the position at the root, and read back with it one and three plies from the root
+                self.assertEqual(searcher.search(game, player, 1, -INFINITY, INFINITY, 0), WIN_SCORE)
+                for ply in (1, 3):
+                    fresh = AlphaBetaPlayer(time_limit=60).search(game, player, 1, -INFINITY, INFINITY, ply)
+                    self.assertEqual(fresh, WIN_SCORE - ply)
+                    self.assertEqual(searcher.search(game, player, 1, -INFINITY, INFINITY, ply), fresh)
+                checked += 1
+                break
+        self.assertGreater(checked, 0)
+
+
+class SearchTest(unittest.TestCase):
+    """
+    Checks the search against plain negamax, and the moves and timing of choose_move.
+    """
+
+    def test_matches_negamax(self):
+        for seed in range(4):
+            for index, (game, player) in enumerate(random_positions(seed, 60)):
+                if index % 15:
+                    continue
+                with self.subTest(seed=seed, index=index):
+                    searcher = AlphaBetaPlayer(time_limit=60)
+                    self.assertEqual(searcher.search(game.clone(), player, 2, -INFINITY, INFINITY, 0),
+                                     negamax(game.clone(), player, 2, 0))
+
+    def test_plays_winning_move(self):
+        checked = 0
+        for seed in range(20):
+            for game, player in random_positions(seed):
+                if winning_moves(game, player):
+                    move = AlphaBetaPlayer(time_limit=0.05).choose_move(game, NAMES[player])
+                    self.assertTrue(game.apply_move(NAMES[player], move))
+                    checked += 1
+                    break
+        self.assertGreater(checked, 0)
+
+    def test_no_move_out_of_turn(self):
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        game.move_piece("PlayerA", (0, 0), (0, 1), 1)
+        searcher = AlphaBetaPlayer(time_limit=0.01)
+        self.assertIsNone(searcher.choose_move(game, "PlayerA"))
+        self.assertIsNone(searcher.choose_move(game, "Nobody"))
+        self.assertIn(searcher.choose_move(game, "PlayerB"), list(game.legal_moves("PlayerB")))
+
+    def test_keeps_to_time_budget(self):
+        searcher = AlphaBetaPlayer(time_limit=0.05, table=TranspositionTable())
+        for game, player in random_positions(1, 10):
+            move = searcher.choose_move(game, NAMES[player])
+            self.assertIn(move, list(game.legal_moves(NAMES[player])))
+            self.assertGreater(searcher.get_depth(), 0)
+            # the deadline leaves room for the work around the search, with some allowance for a slow machine
+            self.assertLess(searcher.get_elapsed(), 0.075)
+
+
+class TablebaseSearchTest(unittest.TestCase):
+    """
+    Checks that wins and losses read from a tablebase are scored the same as the search would score them.
+    """
+
+    def test_matches_negamax_on_solved_positions(self):
+        depth = 3
+        rng = random.Random(5)
+        results = set()
+        with tempfile.TemporaryDirectory() as directory:
+            with EndgameTablebase(os.path.join(directory, "endgames.db"), 1 << 14) as tablebase:
+                solver = EndgameSolver(depth, tablebase=tablebase)
+                for count in range(60):
+                    game, player = random_endgame(rng)
+                    result, distance, move = solver.solve(game, NAMES[player])
+                    if result == UNKNOWN or not tablebase.covers(game):
+                        continue
+                    with self.subTest(count=count, result=result, distance=distance):
+                        searcher = AlphaBetaPlayer(time_limit=60, tablebase=tablebase)
+                        self.assertEqual(searcher.search(game.clone(), player, depth, -INFINITY, INFINITY, 0),
+                                         negamax(game.clone(), player, depth, 0))
+                    results.add((result, distance))
+        # wins by capture, losses to a capture and losses with no move are all covered
+        self.assertLessEqual({(WIN, 1), (LOSS, 1), (LOSS, 2)}, results)
+
+
+if __name__ == "__main__":
+    unittest.main()
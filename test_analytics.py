@@ -0,0 +1,125 @@
+#Description: Tests for the statistics gathered from record files.
+
+import os
+import tempfile
+import unittest
+
+from analytics import GameStats, analyze_files, CAPTURE, NO_MOVES, NO_WINNER
+from records import GameRecord, GameRecordWriter
+from selfplay import PLAYER_A, PLAYER_B
+from test_helpers import played_games
+
+NAMES = (PLAYER_A[0], PLAYER_B[0])
+REASON_ENDINGS = {"capture": CAPTURE, "no moves": NO_MOVES, "move limit": NO_WINNER}
+
+
+def game_record(moves, winner):
+    """
+    :param moves: moves as (player index, move) (list of tuples)
+    :param winner: index of the winner, or None (int)
+    :return: record of the game (GameRecord)
+    """
+    record = GameRecord(PLAYER_A, PLAYER_B)
+    for player, move in moves:
+        record.add_move(player, move)
+    if winner is not None:
+        record.set_winner(winner)
+    return record
+
+
+def gather(records):
+    """
+    :param records: recorded games (list of GameRecords)
+    :return: statistics for the games (GameStats)
+    """
+    stats = GameStats()
+    for record in records:
+        stats.add_game(record)
+    return stats
+
+
+class GameStatsTest(unittest.TestCase):
+    """
+    Checks the statistics of recorded games against what self-play reported for the same games.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.games = [(game_record(moves, winner), result) for moves, winner, result in played_games(30, 4)]
+        cls.records = [record for record, result in cls.games]
+
+    def test_totals_match_selfplay(self):
+        results = [result for record, result in self.games]
+        summary = gather(self.records).summary()
+        self.assertEqual(summary["games"], len(results))
+        self.assertEqual(summary["moves"], sum(result["num_moves"] for result in results))
+        for ending in (CAPTURE, NO_MOVES, NO_WINNER):
+            self.assertEqual(summary["endings"][ending],
+                             sum(1 for result in results if REASON_ENDINGS[result["reason"]] == ending))
+        self.assertEqual(summary["wins"]["player_a"], sum(1 for result in results if result["winner"] == "PLAYERA"))
+        self.assertEqual(summary["wins"]["player_b"], sum(1 for result in results if result["winner"] == "PLAYERB"))
+        self.assertEqual(summary["first_mover_wins"],
+                         sum(1 for result in results if result["winner"] == result["first_mover"]))
+        self.assertEqual(sum(summary["lengths"].values()), len(results))
+
+        moves = [move for result in results for move in result["moves"]]
+        reserved_moves = sum(1 for move in moves if move[0] is None)
+        self.assertEqual(summary["reserved_moves"], reserved_moves)
+        self.assertEqual(sum(map(sum, summary["heatmaps"]["placements"])), reserved_moves)
+        self.assertEqual(sum(map(sum, summary["heatmaps"]["origins"])), len(moves) - reserved_moves)
+        self.assertEqual(sum(map(sum, summary["heatmaps"]["destinations"])), len(moves) - reserved_moves)
+        self.assertEqual(sum(map(sum, summary["heatmaps"]["captures"])), sum(summary["captures_by_move"].values()))
+        self.assertEqual(sum(summary["first_capture_by_move"].values()),
+                         sum(1 for result in results if sum(result["captured"]) > 0))
+
+    def test_small_game(self):
+        record = GameRecord(PLAYER_A, PLAYER_B)
+        record.add_move(0, ((0, 0), (0, 1), 1))
+        record.add_move(1, ((0, 2), (0, 3), 1))
+        record.add_move(0, ((0, 1), (0, 3), 2))
+        stats = gather([record])
+        summary = stats.summary()
+        self.assertEqual(summary["lengths"], {3: 1})
+        self.assertEqual(summary["endings"], {CAPTURE: 0, NO_MOVES: 0, NO_WINNER: 1})
+        self.assertEqual(stats.get_average_length(), 3.0)
+        self.assertEqual(stats.get_first_mover_win_rate(), 0.0)
+        self.assertEqual(stats.get_reserved_move_rate(), 0.0)
+        self.assertEqual(stats.get_heatmap("origins")[0], [1, 1, 1, 0, 0, 0])
+        self.assertEqual(stats.get_heatmap("destinations")[0], [0, 1, 0, 2, 0, 0])
+        self.assertEqual(summary["captures_by_move"], {})
+        with self.assertRaises(ValueError):
+            stats.get_heatmap("corners")
+
+    def test_merge_matches_single_pass(self):
+        whole = gather(self.records)
+        merged = gather(self.records[:10])
+        merged.merge(gather(self.records[10:]))
+        merged.merge(GameStats())
+        self.assertEqual(merged.summary(), whole.summary())
+
+    def test_analyze_files(self):
+        expected = gather(self.records).summary()
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for index, start in enumerate(range(0, len(self.games), 10)):
+                path = os.path.join(directory, "games%d.rec" % index)
+                with open(path, "wb") as stream:
+                    writer = GameRecordWriter(stream, text=index % 2 == 1)
+                    for record, result in self.games[start:start + 10]:
+                        writer.start_game(PLAYER_A, PLAYER_B)
+                        for player, move in record.get_moves():
+                            writer.record_move(NAMES[player], move)
+                        winner = record.get_winner()
+                        writer.end_game(None if winner is None else NAMES[winner])
+                paths.append(path)
+            for workers in (1, 2):
+                with self.subTest(workers=workers):
+                    finished = []
+                    stats = analyze_files(paths, workers=workers,
+                                          progress=lambda path, stats: finished.append(path))
+                    self.assertEqual(stats.summary(), expected)
+                    self.assertEqual(sorted(finished), paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+#Description: Tests that the NumPy batch engine plays the same games as FocusGame.
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from FocusGame import FocusGame
+from move_tables import COORDS
+
+if np is not None:
+    from batch_engine import BatchFocusGame, action_to_move, move_to_action, NUM_ACTIONS, PIECE_A, PIECE_B
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class BatchEngineTest(unittest.TestCase):
+    """
+    Steps a batch of random games and checks every game against a FocusGame playing the same moves.
+    """
+
+    def assert_same_game(self, batch, index, game):
+        colors = {PIECE_A: "RED", PIECE_B: "GREEN"}
+        pieces = batch.get_pieces()[index]
+        heights = batch.get_heights()[index]
+        for row, col in COORDS:
+            stack = [colors[int(piece)] for piece in pieces[row, col, :heights[row, col]]]
+            self.assertEqual(stack, game.show_pieces((row, col)))
+        self.assertEqual([int(count) for count in batch.get_reserved()[index]],
+                         [game.show_reserve(name) for name in NAMES])
+        self.assertEqual([int(count) for count in batch.get_captured()[index]],
+                         [game.show_captured(name) for name in NAMES])
+
+    def test_actions_round_trip(self):
+        for action in range(NUM_ACTIONS):
+            orig_coord, dest_coord, num_pieces = action_to_move(action)
+            if dest_coord in COORDS:
+                self.assertEqual(move_to_action((orig_coord, dest_coord, num_pieces)), action)
+
+    def test_matches_focus_game(self):
+        num_games = 24
+        batch = BatchFocusGame(num_games)
+        games = [FocusGame(PLAYER_A, PLAYER_B) for index in range(num_games)]
+        players = np.arange(num_games) % 2
+        finished = [False] * num_games
+        rng = np.random.default_rng(11)
+        for step in range(250):
+            mask = batch.legal_mask(players)
+            actions = batch.random_actions(players, rng)
+            for index, game in enumerate(games):
+                if finished[index]:
+                    self.assertEqual(actions[index], -1)
+                    continue
+                legal = set(move_to_action(move) for move in game.legal_moves(NAMES[players[index]]))
+                self.assertEqual(set(np.nonzero(mask[index])[0]), legal)
+                if actions[index] < 0:
+                    # the player to move has no legal move, which ends the game
+                    finished[index] = True
+                    actions[index] = -1
+            won = batch.step(players, actions)
+            for index, game in enumerate(games):
+                if actions[index] < 0:
+                    continue
+                with self.subTest(step=step, game=index):
+                    move = action_to_move(int(actions[index]))
+                    self.assertEqual(bool(won[index]), game.apply_move(NAMES[players[index]], move))
+                    self.assert_same_game(batch, index, game)
+                    if won[index]:
+                        finished[index] = True
+                        self.assertTrue(batch.get_won()[index])
+                    else:
+                        self.assertEqual(batch.get_current_turn()[index], 1 - players[index])
+                players[index] = 1 - players[index]
+            if all(finished):
+                break
+        self.assertTrue(any(batch.get_won()))
+
+    def test_get_and_load_game(self):
+        batch = BatchFocusGame(4)
+        rng = np.random.default_rng(3)
+        players = np.zeros(4, dtype=np.int64)
+        for step in range(40):
+            batch.step(players, batch.random_actions(players, rng))
+            players = 1 - players
+        copy = BatchFocusGame(4)
+        for index in range(4):
+            copy.load_game(index, batch.get_game(index))
+        self.assertTrue(np.array_equal(copy.get_pieces(), batch.get_pieces()))
+        self.assertTrue(np.array_equal(copy.get_heights(), batch.get_heights()))
+        self.assertTrue(np.array_equal(copy.get_reserved(), batch.get_reserved()))
+        self.assertTrue(np.array_equal(copy.get_captured(), batch.get_captured()))
+        self.assertTrue(np.array_equal(copy.get_current_turn(), batch.get_current_turn()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#Description: Tests for the benchmark suite and its baseline comparison.
+
+import copy
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import benchmark
+from benchmark import run_benchmarks, compare_results, compare_metadata, OK, REGRESSION, IMPROVEMENT, NEW, MISSING
+
+
+class BenchmarkTest(unittest.TestCase):
+    """
+    Checks that every benchmark runs, and how results are compared with a baseline.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.results = run_benchmarks(seed=1, repeats=1, scale=0.01)
+
+    def test_every_benchmark_runs(self):
+        names = [name for name, function in benchmark.BENCHMARKS]
+        if benchmark.numpy is None:
+            names = [name for name in names if name not in ("batch_engine_step", "evaluate_batch")]
+        self.assertEqual(sorted(self.results["benchmarks"]), sorted(names))
+        for name, timings in self.results["benchmarks"].items():
+            self.assertGreater(timings["ops"], 0, name)
+            self.assertGreater(timings["best_ns"], 0, name)
+        self.assertEqual((self.results["seed"], self.results["repeats"], self.results["scale"]), (1, 1, 0.01))
+        # results are saved as JSON
+        self.assertEqual(json.loads(json.dumps(self.results)), self.results)
+
+    def test_compare_statuses(self):
+        baseline = copy.deepcopy(self.results)
+        benchmarks = baseline["benchmarks"]
+        benchmarks["focusgame_init"]["best_ns"] = self.results["benchmarks"]["focusgame_init"]["best_ns"] / 2
+        benchmarks["legal_moves"]["best_ns"] = self.results["benchmarks"]["legal_moves"]["best_ns"] * 2
+        del benchmarks["focusgame_clone"]
+        benchmarks["retired"] = {"best_ns": 5.0}
+        statuses = dict((name, status) for name, before, now, ratio, status in compare_results(self.results, baseline))
+        self.assertEqual(statuses["focusgame_init"], REGRESSION)
+        self.assertEqual(statuses["legal_moves"], IMPROVEMENT)
+        self.assertEqual(statuses["focusgame_clone"], NEW)
+        self.assertEqual(statuses["retired"], MISSING)
+        self.assertEqual(statuses["move_piece_simple"], OK)
+
+    def test_refuses_baseline_with_other_inputs(self):
+        for key, value in (("seed", 2), ("scale", 1.0), ("version", benchmark.FORMAT_VERSION + 1)):
+            with self.subTest(key=key):
+                baseline = copy.deepcopy(self.results)
+                baseline[key] = value
+                with self.assertRaises(ValueError):
+                    compare_results(self.results, baseline)
+        baseline = copy.deepcopy(self.results)
+        del baseline["seed"]
+        with self.assertRaises(ValueError):
+            compare_metadata(self.results, baseline)
+
+    def test_warns_about_other_environment(self):
+        self.assertEqual(compare_metadata(self.results, self.results), [])
+        baseline = copy.deepcopy(self.results)
+        baseline["python"] = "2.7.18"
+        baseline["repeats"] = 5
+        warnings = compare_metadata(self.results, baseline)
+        self.assertEqual(len(warnings), 2)
+        self.assertTrue(any("python" in warning for warning in warnings))
+        self.assertEqual(len(compare_results(self.results, baseline)), len(self.results["benchmarks"]))
+
+    def test_command_line_refuses_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            with open(path, "w") as file:
+                json.dump(self.results, file)
+            process = subprocess.run([sys.executable, benchmark.__file__, "--baseline", path, "--seed", "2",
+                                      "--scale", "0.01", "--repeats", "1"], capture_output=True, text=True,
+                                     timeout=120)
+        self.assertEqual(process.returncode, 2)
+        self.assertIn("Cannot compare with baseline", process.stderr)
+        self.assertEqual(process.stdout, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+#Description: Differential tests that play the same inputs through FocusGame and CompactFocusGame.
+
+import random
+import unittest
+
+from FocusGame import FocusGame
+from compact_game import CompactFocusGame
+from move_tables import COORDS
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+# names to try, including one in a different case and one that is not playing
+TRY_NAMES = NAMES + ("playerb", "Nobody")
+
+# positions to try, including some that are off the board
+TRY_POSITIONS = COORDS + [(-1, 0), (0, -1), (6, 0), (0, 6), (6, 6)]
+
+
+def random_input(game, rng):
+    """
+    Picks an input to play: usually a legal move, otherwise a move or reserved move that may well be invalid (wrong
+    turn, off the board, diagonal, too far, zero or negative counts, or an unknown player).
+    :param game: game to pick for (FocusGame or CompactFocusGame)
+    :param rng: random number generator (random.Random)
+    :return: (method name, arguments) (tuple)
+    """
+    if rng.random() < 0.6:
+        name = rng.choice(NAMES)
+        moves = list(game.legal_moves(name))
+        if moves:
+            orig_coord, dest_coord, num_pieces = rng.choice(moves)
+            if orig_coord is None:
+                return "reserved_move", (name, dest_coord)
+            return "move_piece", (name, orig_coord, dest_coord, num_pieces)
+    name = rng.choice(TRY_NAMES)
+    if rng.random() < 0.2:
+        return "reserved_move", (name, rng.choice(TRY_POSITIONS))
+    return "move_piece", (name, rng.choice(TRY_POSITIONS), rng.choice(TRY_POSITIONS), rng.randint(-2, 6))
+
+
+def game_state(game):
+    """
+    Reads everything the public methods show about a game.
+    :param game: game to read (FocusGame or CompactFocusGame)
+    :return: stacks, reserved counts and captured counts (tuple)
+    """
+    return ([game.show_pieces(position) for position in TRY_POSITIONS],
+            [game.show_reserve(name) for name in TRY_NAMES],
+            [game.show_captured(name) for name in TRY_NAMES])
+
+
+class DifferentialTest(unittest.TestCase):
+    """
+    Checks that both classes give the same return values and end up in the same state for the same inputs, valid or
+    not.
+    """
+
+    def test_random_and_invalid_inputs(self):
+        for seed in range(30):
+            game = FocusGame(PLAYER_A, PLAYER_B)
+            compact = CompactFocusGame(PLAYER_A, PLAYER_B)
+            rng = random.Random(seed)
+            for step in range(300):
+                method, args = random_input(game, rng)
+                with self.subTest(seed=seed, step=step, method=method, args=args):
+                    result = getattr(game, method)(*args)
+                    self.assertEqual(getattr(compact, method)(*args), result)
+                    self.assertEqual(game_state(compact), game_state(game))
+                if result is not None and result.endswith(" Wins"):
+                    break
+
+    def test_invalid_inputs_from_opening(self):
+        inputs = [("move_piece", ("PlayerA", (0, 0), (1, 1), 1)),    # diagonal
+                  ("move_piece", ("PlayerA", (0, 0), (0, 2), 1)),    # further than the stack is tall
+                  ("move_piece", ("PlayerA", (0, 0), (0, 6), 1)),    # off the board
+                  ("move_piece", ("PlayerA", (0, 0), (0, 1), 0)),    # no pieces
+                  ("move_piece", ("PlayerA", (0, 0), (0, 1), -1)),   # negative count
+                  ("move_piece", ("PlayerA", (0, 2), (0, 3), 1)),    # the other player's stack
+                  ("move_piece", ("Nobody", (0, 0), (0, 1), 1)),     # unknown player
+                  ("reserved_move", ("PlayerA", (0, 0))),            # no pieces in reserve
+                  ("reserved_move", ("PlayerA", (6, 6))),            # off the board
+                  ("reserved_move", ("Nobody", (0, 0))),             # unknown player
+                  ("move_piece", ("playera", [0, 0], [0, 1], 1)),    # valid, any case and lists for coordinates
+                  ("move_piece", ("PlayerA", (0, 1), (0, 2), 1)),    # wrong turn
+                  ("move_piece", ("PLAYERB", (0, 2), (0, 0), 2)),    # more pieces than the stack holds
+                  ("move_piece", ("PLAYERB", [0, 2], (0, 1), 1))]    # onto a stack of two
+        game = FocusGame(PLAYER_A, PLAYER_B)
+        compact = CompactFocusGame(PLAYER_A, PLAYER_B)
+        for method, args in inputs:
+            with self.subTest(method=method, args=args):
+                self.assertEqual(getattr(compact, method)(*args), getattr(game, method)(*args))
+                self.assertEqual(game_state(compact), game_state(game))
+
+
+if __name__ == "__main__":
+    unittest.main()
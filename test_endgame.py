@@ -0,0 +1,120 @@
+#Description: Tests for the endgame solver and tablebase.
+
+import os
+import random
+import tempfile
+import unittest
+
+from compact_game import CompactFocusGame
+from endgame import EndgameSolver, EndgameTablebase, WIN, LOSS, UNKNOWN, to_cell_move
+from test_helpers import random_endgame
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+DEPTH = 3
+
+
+def minimax(game, player, depth):
+    """
+    Solves a position by plain minimax over every line, with no memo and no move ordering, as a reference for the
+    solver.
+    :param game: game to search, restored before returning (CompactFocusGame)
+    :param player: index of player to move (int)
+    :param depth: remaining depth (int)
+    :return: result and distance in plies (tuple)
+    """
+    if depth <= 0:
+        return UNKNOWN, 0
+    moves = game.generate_moves(player)
+    if not moves:
+        return LOSS, 1
+    wins = []
+    losses = []
+    for move in moves:
+        if game.push_move(player, *move):
+            game.undo_move()
+            wins.append(1)
+            continue
+        result, distance = minimax(game, 1 - player, depth - 1)
+        game.undo_move()
+        if result == LOSS:
+            wins.append(distance + 1)
+        elif result == WIN:
+            losses.append(distance + 1)
+    if wins:
+        return WIN, min(wins)
+    if len(losses) < len(moves):
+        return UNKNOWN, 0
+    return LOSS, max(losses)
+
+
+class EndgameSolverTest(unittest.TestCase):
+    """
+    Checks the solver's results, distances and moves against plain minimax.
+    """
+
+    def test_matches_minimax(self):
+        rng = random.Random(0)
+        # one solver for every position, so results memoized for one position are reused for others
+        solver = EndgameSolver(DEPTH)
+        results = set()
+        for count in range(40):
+            game, player = random_endgame(rng)
+            with self.subTest(count=count):
+                expected = minimax(game, player, DEPTH)
+                result, distance, move = solver.solve(game, NAMES[player])
+                self.assertEqual((result, distance), expected)
+                results.add(result)
+                if result == WIN:
+                    # the move wins at once, or leaves the opponent lost in one ply less
+                    if not game.push_move(player, *to_cell_move(move)):
+                        self.assertEqual(minimax(game, 1 - player, DEPTH - 1), (LOSS, distance - 1))
+        self.assertEqual(results, {WIN, LOSS, UNKNOWN})
+
+    def test_solves_for_named_player(self):
+        game, player = random_endgame(random.Random(3))
+        # the position is solved for the player named, whatever the game's current turn
+        game.set_position(game.get_cells(), game.get_reserved(), game.get_captured(), 1 - player)
+        self.assertEqual(EndgameSolver(DEPTH).solve(game, NAMES[player])[:2],
+                         minimax(game.clone(), player, DEPTH))
+        with self.assertRaises(ValueError):
+            EndgameSolver(DEPTH).solve(game, "Nobody")
+
+    def test_node_limit(self):
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        solver = EndgameSolver(DEPTH, max_nodes=10)
+        self.assertEqual(solver.solve(game, "PlayerA"), (UNKNOWN, 0, None))
+        self.assertEqual(solver.get_nodes(), 11)
+
+
+class EndgameTablebaseTest(unittest.TestCase):
+    """
+    Checks that solved positions are stored in a tablebase and found again by later solvers.
+    """
+
+    def test_results_are_stored_and_reused(self):
+        rng = random.Random(1)
+        positions = [random_endgame(rng) for count in range(20)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "endgames.db")
+            with EndgameTablebase(path, 1 << 12) as tablebase:
+                solver = EndgameSolver(DEPTH, tablebase=tablebase)
+                solved = [solver.solve(game, NAMES[player]) for game, player in positions]
+                self.assertGreater(len(tablebase), 0)
+            with EndgameTablebase(path) as tablebase:
+                for (game, player), (result, distance, move) in zip(positions, solved):
+                    with self.subTest(result=result, distance=distance):
+                        stored = tablebase.probe(game, NAMES[player])
+                        self.assertEqual(stored[:2], (result, distance))
+                        if result != UNKNOWN:
+                            self.assertEqual(stored[3], move)
+                        # a new solver finds the root in the tablebase without searching it
+                        solver = EndgameSolver(DEPTH, tablebase=tablebase)
+                        self.assertEqual(solver.solve(game, NAMES[player])[:2], (result, distance))
+                        self.assertEqual(solver.get_nodes(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
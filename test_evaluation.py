@@ -0,0 +1,110 @@
+#Description: Tests for the static evaluator, one position at a time and in NumPy batches.
+
+import random
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from FocusGame import FocusGame
+from compact_game import CompactFocusGame
+from evaluation import extract_features, evaluate, evaluate_batch, extract_features_batch, FEATURE_NAMES
+from position_db import serialize_position
+from test_helpers import random_positions
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+
+def move_features(game, player):
+    """
+    Works out the move features by making every legal move: mobility, threats and best capture.
+    :param game: game to look at (CompactFocusGame)
+    :param player: index of player (int)
+    :return: number of moves, moves that capture, and most pieces captured by one move (tuple)
+    """
+    game = game.clone()
+    game.set_position(game.get_cells(), game.get_reserved(), game.get_captured(), player)
+    captures = []
+    for move in game.generate_moves(player):
+        before = game.get_captured()[player]
+        game.push_move(player, *move)
+        captures.append(game.get_captured()[player] - before)
+        game.undo_move()
+    return len(captures), sum(1 for capture in captures if capture), max(captures, default=0)
+
+
+class EvaluationTest(unittest.TestCase):
+    """
+    Checks the features of single positions against the moves that can actually be made.
+    """
+
+    def test_features_match_moves(self):
+        for seed in range(10):
+            for game in random_positions(seed, 150, with_player=False):
+                for player in range(2):
+                    features = dict(zip(FEATURE_NAMES, extract_features(game, player)))
+                    mobility, threats, best_capture = move_features(game, player)
+                    self.assertEqual(features["mobility"], mobility)
+                    self.assertEqual(features["threats"], threats)
+                    self.assertEqual(features["best_capture"], best_capture)
+                    self.assertEqual(features["controlled"], len(game.get_controlled()[player]))
+                    self.assertEqual(features["captured"], game.get_captured()[player])
+                    self.assertEqual(features["reserved"], game.get_reserved()[player])
+                    # each opponent feature is the player's feature from the other side
+                    opponent = extract_features(game, 1 - player)
+                    self.assertEqual(extract_features(game, player)[1::2], opponent[0::2])
+
+    def test_focus_game_scores_the_same(self):
+        game = FocusGame(PLAYER_A, PLAYER_B)
+        compact = CompactFocusGame(PLAYER_A, PLAYER_B)
+        rng = random.Random(1)
+        player = 0
+        for count in range(40):
+            for index in range(2):
+                self.assertEqual(extract_features(game, index), extract_features(compact, index))
+                self.assertEqual(evaluate(game, index), evaluate(compact, index))
+            moves = list(compact.legal_moves(NAMES[player]))
+            if not moves:
+                break
+            move = rng.choice(moves)
+            if game.apply_move(NAMES[player], move) != compact.apply_move(NAMES[player], move):
+                self.fail("Games diverged")
+            player = 1 - player
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class EvaluateBatchTest(unittest.TestCase):
+    """
+    Checks that batches of positions get the same features and scores as one position at a time.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.games = [game for seed in range(10) for game in random_positions(seed, 150, with_player=False)]
+        cls.positions = [serialize_position(game) for game in cls.games]
+
+    def test_batch_matches_scalar(self):
+        rng = random.Random(2)
+        players = [rng.randint(0, 1) for game in self.games]
+        weights = [rng.randint(-50, 50) for name in FEATURE_NAMES]
+        features = extract_features_batch(self.positions, players)
+        scores = evaluate_batch(self.positions, players, weights)
+        self.assertEqual(features.shape, (len(self.games), len(FEATURE_NAMES)))
+        for index, (game, player) in enumerate(zip(self.games, players)):
+            self.assertEqual(features[index].tolist(), extract_features(game, player))
+            self.assertEqual(scores[index], evaluate(game, player, weights))
+
+    def test_default_player_is_player_to_move(self):
+        players = [max(game.get_current_turn(), 0) for game in self.games]
+        self.assertEqual(evaluate_batch(self.positions).tolist(), evaluate_batch(self.positions, players).tolist())
+        # the positions may also be given as one bytes object
+        self.assertEqual(evaluate_batch(b"".join(self.positions)).tolist(),
+                         evaluate_batch(self.positions).tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+#Description: Tests for FocusGame's move generation, search support and copying.
+
+import random
+import unittest
+
+from FocusGame import FocusGame
+from compact_game import CompactFocusGame
+from move_tables import COORDS
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+
+def play_random(game, rng, num_moves, first=0):
+    """
+    Plays random legal moves with legal_moves and move_piece / reserved_move.
+    :param game: game to play (FocusGame or CompactFocusGame)
+    :param rng: random number generator (random.Random)
+    :param num_moves: most moves to make (int)
+    :param first: index of the player to move first (int)
+    :return: index of the player to move next, or None if the game was won or the player to move had no moves
+    """
+    player = first
+    for count in range(num_moves):
+        moves = list(game.legal_moves(NAMES[player]))
+        if not moves:
+            return None
+        orig_coord, dest_coord, num_pieces = rng.choice(moves)
+        if orig_coord is None:
+            result = game.reserved_move(NAMES[player], dest_coord)
+        else:
+            result = game.move_piece(NAMES[player], orig_coord, dest_coord, num_pieces)
+        if result is not None and result.endswith(" Wins"):
+            return None
+        player = 1 - player
+    return player
+
+
+def brute_force_moves(game, name):
+    """
+    Finds every stack move move_piece accepts, by trying each one on a copy of the game.
+    :param game: game to look at (FocusGame or CompactFocusGame)
+    :param name: name of player (string)
+    :return: moves (set of tuples)
+    """
+    moves = set()
+    for orig_coord in COORDS:
+        for dest_coord in COORDS:
+            for num_pieces in range(1, 6):
+                result = game.clone().move_piece(name, orig_coord, dest_coord, num_pieces)
+                if result == "Successfully moved" or result.endswith(" Wins"):
+                    moves.add((orig_coord, dest_coord, num_pieces))
+    return moves
+
+
+def snapshot(game):
+    """
+    Reads the whole visible state of a game, including whose turn it is (through the moves each player may make).
+    :param game: game to read (FocusGame or CompactFocusGame)
+    :return: copies of the stacks, reserved and captured counts, and each player's legal moves (tuple)
+    """
+    return ([list(game.show_pieces(position)) for position in COORDS],
+            [(game.show_reserve(name), game.show_captured(name)) for name in NAMES],
+            [sorted(game.legal_moves(name), key=repr) for name in NAMES])
+
+
+class LegalMovesTest(unittest.TestCase):
+    """
+    Checks legal_moves against the moves move_piece accepts.
+    """
+
+    def test_matches_brute_force(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            for seed in range(3):
+                game = game_class(PLAYER_A, PLAYER_B)
+                rng = random.Random(seed)
+                player = 0
+                for step in range(4):
+                    with self.subTest(game_class=game_class.__name__, seed=seed, step=step):
+                        name = NAMES[player]
+                        moves = list(game.legal_moves(name))
+                        self.assertEqual(len(moves), len(set(moves)))
+                        self.assertEqual(set(move for move in moves if move[0] is not None),
+                                         brute_force_moves(game, name))
+                        reserved = [move for move in moves if move[0] is None]
+                        if game.show_reserve(name):
+                            self.assertEqual(reserved, [(None, position, 1) for position in COORDS])
+                        else:
+                            self.assertEqual(reserved, [])
+                    player = play_random(game, rng, 10, player)
+                    if player is None:
+                        break
+
+    def test_both_classes_agree(self):
+        for seed in range(20):
+            game = FocusGame(PLAYER_A, PLAYER_B)
+            compact = CompactFocusGame(PLAYER_A, PLAYER_B)
+            rng = random.Random(seed)
+            player = seed % 2
+            for step in range(200):
+                name = NAMES[player]
+                moves = list(game.legal_moves(name))
+                self.assertEqual(sorted(moves, key=repr), sorted(compact.legal_moves(name), key=repr))
+                if not moves:
+                    break
+                orig_coord, dest_coord, num_pieces = rng.choice(moves)
+                if orig_coord is None:
+                    result = game.reserved_move(name, dest_coord)
+                    self.assertEqual(compact.reserved_move(name, dest_coord), result)
+                else:
+                    result = game.move_piece(name, orig_coord, dest_coord, num_pieces)
+                    self.assertEqual(compact.move_piece(name, orig_coord, dest_coord, num_pieces), result)
+                if result is not None and result.endswith(" Wins"):
+                    break
+                player = 1 - player
+
+    def test_no_moves_out_of_turn(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            game = game_class(PLAYER_A, PLAYER_B)
+            self.assertTrue(list(game.legal_moves("PlayerA")))
+            self.assertTrue(list(game.legal_moves("PlayerB")))
+            game.move_piece("PlayerA", (0, 0), (0, 1), 1)
+            self.assertEqual(list(game.legal_moves("PlayerA")), [])
+            self.assertEqual(list(game.legal_moves("Nobody")), [])
+            self.assertTrue(list(game.legal_moves("PlayerB")))
+
+
+class UndoMoveTest(unittest.TestCase):
+    """
+    Checks that undo_move restores every position passed through with apply_move.
+    """
+
+    def test_undo_restores_each_position(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            for seed in range(10):
+                with self.subTest(game_class=game_class.__name__, seed=seed):
+                    game = game_class(PLAYER_A, PLAYER_B)
+                    rng = random.Random(seed)
+                    snapshots = [snapshot(game)]
+                    player = seed % 2
+                    for step in range(120):
+                        moves = list(game.legal_moves(NAMES[player]))
+                        if not moves:
+                            break
+                        won = game.apply_move(NAMES[player], rng.choice(moves))
+                        snapshots.append(snapshot(game))
+                        if won:
+                            break
+                        player = 1 - player
+                    while len(snapshots) > 1:
+                        self.assertTrue(game.undo_move())
+                        snapshots.pop()
+                        self.assertEqual(snapshot(game), snapshots[-1])
+                    self.assertFalse(game.undo_move())
+
+    def test_apply_move_matches_move_piece(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            for seed in range(10):
+                played = game_class(PLAYER_A, PLAYER_B)
+                applied = game_class(PLAYER_A, PLAYER_B)
+                rng = random.Random(seed)
+                player = seed % 2
+                for step in range(120):
+                    name = NAMES[player]
+                    moves = list(played.legal_moves(name))
+                    if not moves:
+                        break
+                    move = rng.choice(moves)
+                    if move[0] is None:
+                        result = played.reserved_move(name, move[1])
+                    else:
+                        result = played.move_piece(name, *move)
+                    won = result is not None and result.endswith(" Wins")
+                    self.assertEqual(applied.apply_move(name, move), won)
+                    self.assertEqual(snapshot(applied), snapshot(played))
+                    if won:
+                        break
+                    player = 1 - player
+
+    def test_undo_after_set_position(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            game = game_class(PLAYER_A, PLAYER_B)
+            game.apply_move("PlayerA", ((0, 0), (0, 1), 1))
+            cells = CompactFocusGame(PLAYER_A, PLAYER_B).get_cells()
+            game.set_position(cells, (0, 0), (0, 0), -1)
+            # loading a position clears the history, so there is nothing left to undo
+            self.assertFalse(game.undo_move())
+            self.assertEqual(snapshot(game), snapshot(game_class(PLAYER_A, PLAYER_B)))
+
+
+class CloneTest(unittest.TestCase):
+    """
+    Checks that clones can be played and undone without changing the game they were cloned from.
+    """
+
+    def test_clone_is_independent(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            for seed in range(10):
+                with self.subTest(game_class=game_class.__name__, seed=seed):
+                    game = game_class(PLAYER_A, PLAYER_B)
+                    player = play_random(game, random.Random(seed), 20)
+                    if player is None:
+                        continue
+                    before = snapshot(game)
+                    clone = game.clone()
+                    self.assertEqual(snapshot(clone), before)
+                    play_random(clone, random.Random(seed + 100), 20, player)
+                    self.assertEqual(snapshot(game), before)
+                    # and playing the original does not change the clone
+                    after = snapshot(clone)
+                    play_random(game, random.Random(seed + 200), 20, player)
+                    self.assertEqual(snapshot(clone), after)
+
+    def test_clone_undoes_moves_made_before_it(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            with self.subTest(game_class=game_class.__name__):
+                game = game_class(PLAYER_A, PLAYER_B)
+                start = snapshot(game)
+                game.apply_move("PlayerA", ((0, 0), (0, 1), 1))
+                game.apply_move("PlayerB", ((0, 2), (0, 3), 1))
+                before = snapshot(game)
+                clone = game.clone()
+                self.assertTrue(clone.undo_move())
+                self.assertTrue(clone.undo_move())
+                self.assertFalse(clone.undo_move())
+                self.assertEqual(snapshot(clone), start)
+                self.assertEqual(snapshot(game), before)
+
+    def test_clone_without_history(self):
+        game = FocusGame(PLAYER_A, PLAYER_B)
+        game.apply_move("PlayerA", ((0, 0), (0, 1), 1))
+        clone = game.clone(keep_history=False)
+        self.assertFalse(clone.undo_move())
+        self.assertEqual(snapshot(clone), snapshot(game))
+        # moves made on the clone can still be undone
+        clone.apply_move("PlayerB", ((0, 2), (0, 3), 1))
+        self.assertTrue(clone.undo_move())
+        self.assertEqual(snapshot(clone), snapshot(game))
+        self.assertTrue(game.undo_move())
+
+    def test_clone_carries_index_and_hash(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            with self.subTest(game_class=game_class.__name__):
+                # a new game has neither an index nor a hash yet, so the clone builds its own
+                game = game_class(PLAYER_A, PLAYER_B)
+                clone = game.clone()
+                self.assertEqual(clone.get_hash(), game.get_hash())
+                self.assertEqual(snapshot(clone), snapshot(game))
+                # once built, they are carried over and kept up to date on the clone alone
+                game.apply_move("PlayerA", ((0, 0), (0, 1), 1))
+                clone = game.clone()
+                self.assertEqual(clone.get_hash(), game.get_hash())
+                clone.apply_move("PlayerB", ((0, 2), (0, 3), 1))
+                self.assertEqual(clone.get_hash(), clone.compute_hash())
+                self.assertNotEqual(clone.get_hash(), game.get_hash())
+                self.assertEqual(game.get_hash(), game.compute_hash())
+                self.assertTrue(clone.undo_move())
+                self.assertEqual(clone.get_hash(), game.get_hash())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#Description: Random games and positions shared by the tests.
+
+import random
+
+from compact_game import CompactFocusGame, HEIGHT_BITS, NUM_CELLS
+from move_tables import COORDS
+from selfplay import play_game, PLAYER_A, PLAYER_B
+
+NAMES = (PLAYER_A[0], PLAYER_B[0])
+
+
+def random_game(seed, num_moves):
+    """
+    Plays a random game from the opening, with player A moving first for even seeds and player B for odd seeds. The
+    game is set to the player to move before each move, so its current turn always names that player.
+    :param seed: random seed (int)
+    :param num_moves: most moves to play (int)
+    :return: generator of (game, index of player to move, move about to be made in generate_moves form, or None if
+        the player has no move) (tuples); the game is the one being played, so it must not be changed
+    """
+    game = CompactFocusGame(PLAYER_A, PLAYER_B)
+    rng = random.Random(seed)
+    player = seed % 2
+    game.set_position(game.get_cells(), game.get_reserved(), game.get_captured(), player)
+    for count in range(num_moves):
+        moves = game.generate_moves(player)
+        move = rng.choice(moves) if moves else None
+        yield game, player, move
+        if move is None or game.push_move(player, *move):
+            return
+        player = 1 - player
+
+
+def random_positions(seed, num_moves=200, with_player=True):
+    """
+    Plays a random game (see random_game) and yields a copy of each position passed through, ending with the
+    position where the player to move has no move, if the game gets there.
+    :param seed: random seed (int)
+    :param num_moves: most moves to play (int)
+    :param with_player: whether to yield the index of the player to move along with each game (boolean)
+    :return: generator of (game, index of player to move) (tuples), or of games (CompactFocusGame)
+    """
+    for game, player, move in random_game(seed, num_moves):
+        yield (game.clone(), player) if with_player else game.clone()
+
+
+def random_moves(seed, num_moves=80):
+    """
+    Plays a random game (see random_game) and lists its moves.
+    :param seed: random seed (int)
+    :param num_moves: most moves to play (int)
+    :return: (player name, move in legal_moves form) for each move (list of tuples)
+    """
+    moves = []
+    for game, player, move in random_game(seed, num_moves):
+        if move is None:
+            break
+        orig, dest, num_pieces = move
+        moves.append((NAMES[player], (COORDS[orig] if orig >= 0 else None, COORDS[dest], num_pieces)))
+    return moves
+
+
+def random_endgame(rng):
+    """
+    Makes a small position close to the end of the game: a few short stacks, no reserves, and both players a piece
+    or two from winning.
+    :param rng: random number generator (random.Random)
+    :return: game (CompactFocusGame), and index of player to move (tuple)
+    """
+    cells = [0] * NUM_CELLS
+    for cell in rng.sample(range(NUM_CELLS), 5):
+        height = rng.randint(1, 3)
+        cells[cell] = height | (rng.getrandbits(height) << HEIGHT_BITS)
+    player = rng.randint(0, 1)
+    game = CompactFocusGame(PLAYER_A, PLAYER_B)
+    game.set_position(cells, (0, 0), (rng.randint(4, 5), rng.randint(4, 5)), player)
+    return game, player
+
+
+def played_games(num_games, seed, max_moves=150):
+    """
+    Plays random self-play games (see selfplay.play_game), keeping their moves.
+    :param num_games: number of games (int)
+    :param seed: seed for the games (int)
+    :param max_moves: most moves in a game (int)
+    :return: (moves as (player index, move), index of the winner or None, self-play result) for each game (list of
+        tuples)
+    """
+    games = []
+    for game_index in range(num_games):
+        result = play_game(game_index, seed, max_moves=max_moves, record_moves=True)
+        player = game_index % 2
+        moves = []
+        for move in result["moves"]:
+            moves.append((player, move))
+            player = 1 - player
+        winner = None if result["winner"] is None else [name.upper() for name in NAMES].index(result["winner"])
+        games.append((moves, winner, result))
+    return games
+
+
+def winning_moves(game, player):
+    """
+    :param game: game to look at, restored before returning (CompactFocusGame)
+    :param player: index of player to move (int)
+    :return: moves that win the game straight away (list of tuples)
+    """
+    moves = []
+    for move in game.generate_moves(player):
+        if game.push_move(player, *move):
+            moves.append(move)
+        game.undo_move()
+    return moves
@@ -0,0 +1,107 @@
+#Description: Tests for the opt-in call and rejection counters.
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from FocusGame import FocusGame
+from instrumentation import GameInstrumentation, INSTRUMENTED_METHODS
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+
+
+class GameInstrumentationTest(unittest.TestCase):
+    """
+    Checks what is counted on attached games, that detached games are left alone, and that counts are not lost
+    when several threads share one set of counters.
+    """
+
+    def setUp(self):
+        self._instrumentation = GameInstrumentation()
+        self._game = FocusGame(PLAYER_A, PLAYER_B)
+        self._instrumentation.attach(self._game)
+
+    def tearDown(self):
+        self._instrumentation.stop_dumping()
+
+    def test_counts_calls_and_statuses(self):
+        game = self._game
+        self.assertEqual(game.move_piece("PlayerA", (0, 0), (0, 1), 1), "Successfully moved")
+        self.assertEqual(game.move_piece("PlayerA", (0, 1), (0, 2), 1), "Not your turn")
+        self.assertEqual(game.move_piece("PlayerB", (0, 0), (0, 1), 1), "Invalid location")
+        self.assertIsNone(game.reserved_move("PlayerB", (9, 9)))
+        self.assertEqual(game.reserved_move("PlayerB", (0, 0)), "No pieces in reserve")
+        snapshot = self._instrumentation.snapshot()
+        self.assertEqual(snapshot["methods"]["move_piece"]["calls"], 3)
+        self.assertEqual(snapshot["methods"]["reserved_move"]["calls"], 2)
+        self.assertEqual(snapshot["methods"]["make_move"]["calls"], 1)
+        self.assertGreater(snapshot["methods"]["move_piece"]["total_ns"], 0)
+        self.assertEqual(snapshot["outcomes"]["move_piece"],
+                         {"Successfully moved": 1, "Not your turn": 1, "Invalid location": 1})
+        self.assertEqual(snapshot["outcomes"]["reserved_move"], {"Invalid position": 1, "No pieces in reserve": 1})
+        self.assertEqual(snapshot["rejections"], {"Not your turn": 1, "Invalid location": 1,
+                                                  "Invalid position": 1, "No pieces in reserve": 1})
+
+    def test_detach_and_reset(self):
+        instrumentation = self._instrumentation
+        self._game.move_piece("PlayerA", (0, 0), (0, 1), 1)
+        instrumentation.reset()
+        snapshot = instrumentation.snapshot()
+        self.assertTrue(all(snapshot["methods"][name]["calls"] == 0 for name in INSTRUMENTED_METHODS))
+        self.assertEqual(snapshot["rejections"], {})
+        # attaching twice does not count twice, and attached wrappers keep counting after a reset
+        instrumentation.attach(self._game)
+        self._game.move_piece("PlayerB", (0, 2), (0, 3), 1)
+        self.assertEqual(instrumentation.snapshot()["methods"]["move_piece"]["calls"], 1)
+        instrumentation.detach(self._game)
+        for name in INSTRUMENTED_METHODS:
+            self.assertNotIn(name, vars(self._game))
+        self._game.move_piece("PlayerA", (0, 1), (0, 2), 1)
+        self.assertEqual(instrumentation.snapshot()["methods"]["move_piece"]["calls"], 1)
+
+    def test_counts_from_several_threads(self):
+        instrumentation = self._instrumentation
+        num_threads = 4
+        num_calls = 2000
+        snapshots = []
+        instrumentation.start_dumping(0.001, snapshots.append)
+
+        def play():
+            game = FocusGame(PLAYER_A, PLAYER_B)
+            instrumentation.attach(game)
+            for count in range(num_calls):
+                game.move_piece("Nobody", (0, 0), (0, 1), 1)
+                game.is_valid_location(None, (0, 0), (0, 1), 0)
+
+        threads = [threading.Thread(target=play) for count in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        instrumentation.stop_dumping()
+        snapshot = instrumentation.snapshot()
+        self.assertEqual(snapshot["methods"]["move_piece"]["calls"], num_threads * num_calls)
+        self.assertEqual(snapshot["methods"]["is_valid_location"]["calls"], num_threads * num_calls)
+        self.assertEqual(snapshot["rejections"], {"Not your turn": num_threads * num_calls})
+        # snapshots taken while the threads ran never go backwards
+        calls = [taken["methods"]["move_piece"]["calls"] for taken in snapshots]
+        self.assertEqual(calls, sorted(calls))
+
+    def test_dump_appends_lines(self):
+        self._game.move_piece("PlayerA", (0, 0), (0, 1), 1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "counters.jsonl")
+            self._instrumentation.dump(path)
+            self._instrumentation.dump(path)
+            with open(path) as file:
+                lines = [json.loads(line) for line in file]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1]["methods"]["move_piece"]["calls"], 1)
+        self.assertEqual(lines[1]["outcomes"]["move_piece"], {"Successfully moved": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+#Description: Tests for the Monte Carlo Tree Search AI player.
+
+import threading
+import unittest
+
+from compact_game import CompactFocusGame
+from mcts import MCTSPlayer, rollout
+from position_db import serialize_position
+from test_helpers import random_positions, winning_moves
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+
+class MCTSTest(unittest.TestCase):
+    """
+    Checks rollouts, the moves chosen, and reuse of the tree between moves.
+    """
+
+    def test_rollout_is_seeded(self):
+        position = serialize_position(CompactFocusGame(PLAYER_A, PLAYER_B))
+        for seed in range(10):
+            winner = rollout(position, seed % 2, seed, 300)
+            self.assertIn(winner, (0, 1, None))
+            self.assertEqual(rollout(position, seed % 2, seed, 300), winner)
+        self.assertIsNone(rollout(position, 0, 1, 0))
+
+    def test_legal_and_reproducible(self):
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        moves = [MCTSPlayer(iterations=100, time_limit=None, seed=5).choose_move(game, "PlayerA") for count in range(2)]
+        self.assertEqual(moves[0], moves[1])
+        self.assertIn(moves[0], list(game.legal_moves("PlayerA")))
+
+    def test_plays_winning_move(self):
+        checked = 0
+        for seed in range(10):
+            for game, player in random_positions(seed, 300):
+                if winning_moves(game, player):
+                    searcher = MCTSPlayer(iterations=400, time_limit=None, seed=seed)
+                    move = searcher.choose_move(game, NAMES[player])
+                    self.assertTrue(game.apply_move(NAMES[player], move))
+                    checked += 1
+                    break
+        self.assertGreater(checked, 0)
+
+    def test_reuses_tree(self):
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        searcher = MCTSPlayer(iterations=300, time_limit=None, seed=2)
+        game.apply_move("PlayerA", searcher.choose_move(game, "PlayerA"))
+        self.assertEqual(searcher.get_reused_visits(), 0)
+        # the position after the move chosen is the most visited child of the old root
+        game.apply_move("PlayerB", searcher.choose_move(game, "PlayerB"))
+        self.assertGreater(searcher.get_reused_visits(), 0)
+        self.assertGreaterEqual(searcher.get_playouts(), 300)
+
+    def test_worker_threads(self):
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        with MCTSPlayer(iterations=64, time_limit=None, workers=2, use_threads=True, seed=1) as searcher:
+            self.assertIn(searcher.choose_move(game, "PlayerB"), list(game.legal_moves("PlayerB")))
+            self.assertEqual(searcher.get_playouts(), 64)
+
+    def test_iteration_budget_is_exact(self):
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        for iterations in (1, 5, 17, 40):
+            with self.subTest(iterations=iterations):
+                with MCTSPlayer(iterations=iterations, time_limit=None, workers=2, batch_size=16, use_threads=True,
+                                seed=3) as searcher:
+                    searcher.choose_move(game, "PlayerA")
+                    self.assertEqual(searcher.get_playouts(), iterations)
+
+    def test_pool_started_when_needed(self):
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        threads = threading.active_count()
+        with MCTSPlayer(iterations=1, time_limit=None, workers=2, use_threads=True, seed=4) as searcher:
+            # a single rollout is run in this thread, so no pool is started
+            searcher.choose_move(game, "PlayerA")
+            self.assertEqual(threading.active_count(), threads)
+        with MCTSPlayer(iterations=32, time_limit=None, workers=2, use_threads=True, seed=4) as searcher:
+            searcher.choose_move(game, "PlayerA")
+            self.assertGreater(threading.active_count(), threads)
+        # and the pool is shut down at the end of the with statement
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_no_move_out_of_turn(self):
+        game = CompactFocusGame(PLAYER_A, PLAYER_B)
+        game.move_piece("PlayerA", (0, 0), (0, 1), 1)
+        searcher = MCTSPlayer(iterations=10, time_limit=None)
+        self.assertIsNone(searcher.choose_move(game, "PlayerA"))
+        self.assertIsNone(searcher.choose_move(game, "Nobody"))
+
+    def test_needs_a_budget(self):
+        with self.assertRaises(ValueError):
+            MCTSPlayer(iterations=None, time_limit=None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#Description: Tests for the precomputed move tables and the move validation built on them.
+
+import unittest
+
+import move_tables
+from FocusGame import FocusGame
+from compact_game import CompactFocusGame
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+
+
+class MoveTablesTest(unittest.TestCase):
+    """
+    Checks the tables in move_tables against the rules worked out directly from coordinates.
+    """
+
+    def test_distances_match_coordinates(self):
+        for orig, (orig_row, orig_col) in enumerate(move_tables.COORDS):
+            for dest, (dest_row, dest_col) in enumerate(move_tables.COORDS):
+                row_diff = abs(dest_row - orig_row)
+                col_diff = abs(dest_col - orig_col)
+                if row_diff and col_diff:
+                    expected = -1
+                else:
+                    expected = row_diff + col_diff
+                self.assertEqual(move_tables.DISTANCES[orig][dest], expected)
+                self.assertEqual(move_tables.coord_distance((orig_row, orig_col), (dest_row, dest_col)), expected)
+
+    def test_off_board_positions(self):
+        for position in ((-1, 0), (0, -1), (6, 0), (0, 6), (6, 6)):
+            self.assertEqual(move_tables.cell_index(position), move_tables.OFF_BOARD)
+            self.assertIsNone(move_tables.coord_distance(position, (0, 0)))
+            self.assertIsNone(move_tables.coord_distance((0, 0), position))
+        self.assertEqual(move_tables.cell_index([2, 3]), 15)
+        self.assertEqual(move_tables.coord_distance([0, 0], [0, 3]), 3)
+
+    def test_moves_by_height(self):
+        for cell in range(move_tables.NUM_CELLS):
+            self.assertEqual(len(move_tables.MOVES_BY_HEIGHT[cell][0]), 0)
+            for height in range(1, move_tables.MAX_DISTANCE + 1):
+                expected = set()
+                for dest in range(move_tables.NUM_CELLS):
+                    distance = move_tables.DISTANCES[cell][dest]
+                    if 1 <= distance <= height:
+                        expected.add((cell, dest, distance))
+                moves = move_tables.MOVES_BY_HEIGHT[cell][height]
+                self.assertEqual(len(moves), len(expected))
+                self.assertEqual(set(moves), expected)
+
+
+class MoveValidationTest(unittest.TestCase):
+    """
+    Checks that moves the tables do not allow are turned away by both game classes, without changing the game.
+    """
+
+    def assert_rejected(self, game_class, orig_coord, dest_coord, num_pieces):
+        game = game_class(PLAYER_A, PLAYER_B)
+        before = [list(game.show_pieces(position)) for position in move_tables.COORDS]
+        self.assertEqual(game.move_piece("PlayerA", orig_coord, dest_coord, num_pieces), "Invalid location")
+        self.assertEqual([game.show_pieces(position) for position in move_tables.COORDS], before)
+        # the turn did not pass, so either player may still move first
+        self.assertEqual(game.move_piece("PlayerB", (0, 2), (0, 3), 1), "Successfully moved")
+
+    def test_zero_and_negative_counts(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            for num_pieces in (0, -1, -2):
+                with self.subTest(game_class=game_class.__name__, num_pieces=num_pieces):
+                    # the same space, a space in line, and a space that is not in line
+                    self.assert_rejected(game_class, (0, 0), (0, 0), num_pieces)
+                    self.assert_rejected(game_class, (0, 0), (0, 1), num_pieces)
+                    self.assert_rejected(game_class, (0, 0), (1, 1), num_pieces)
+
+    def test_no_move_without_pieces(self):
+        # before moves of fewer than one piece were turned away, a move of no pieces onto the same space passed the
+        # turn; now it is an invalid location, like every other count the distance does not match
+        game = FocusGame(PLAYER_A, PLAYER_B)
+        compact = CompactFocusGame(PLAYER_A, PLAYER_B)
+        for num_pieces in (0, -1):
+            with self.subTest(num_pieces=num_pieces):
+                self.assertFalse(game.is_valid_location(game.find_player_by_name("PlayerA"), (0, 0), (0, 0),
+                                                        num_pieces))
+                self.assertFalse(compact.is_valid_location(0, (0, 0), (0, 0), num_pieces))
+        self.assertTrue(game.is_valid_location(game.find_player_by_name("PlayerA"), (0, 0), (0, 1), 1))
+        self.assertTrue(compact.is_valid_location(0, (0, 0), (0, 1), 1))
+
+    def test_diagonal_and_off_board_moves(self):
+        for game_class in (FocusGame, CompactFocusGame):
+            with self.subTest(game_class=game_class.__name__):
+                self.assert_rejected(game_class, (0, 0), (1, 1), 1)
+                self.assert_rejected(game_class, (0, 0), (2, 1), 2)
+                self.assert_rejected(game_class, (0, 0), (0, 2), 1)
+                self.assert_rejected(game_class, (0, 0), (0, -1), 1)
+                self.assert_rejected(game_class, (0, 0), (6, 0), 6)
+                self.assert_rejected(game_class, (6, 0), (5, 0), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+#Description: Tests for board symmetries and the opening book.
+
+import os
+import tempfile
+import unittest
+
+from alphabeta import AlphaBetaPlayer
+from compact_game import CompactFocusGame, NUM_CELLS, COORDS
+from opening_book import OpeningBookBuilder, OpeningBook, SYMMETRIES, INVERSES, canonical_position, position_hash, \
+    canonical_symmetries, canonical_move, transform_move, to_cell_move
+from selfplay import PLAYER_A, PLAYER_B
+from test_helpers import played_games, random_positions
+
+NAMES = (PLAYER_A[0], PLAYER_B[0])
+
+
+def image_game(game, symmetry):
+    """
+    :param game: game (CompactFocusGame)
+    :param symmetry: index of symmetry (int)
+    :return: copy of the game with the board sent through the symmetry (CompactFocusGame)
+    """
+    cells = game.get_cells()
+    image = [0] * NUM_CELLS
+    for cell in range(NUM_CELLS):
+        image[SYMMETRIES[symmetry][cell]] = cells[cell]
+    copy = game.clone()
+    copy.set_position(image, game.get_reserved(), game.get_captured(), game.get_current_turn())
+    return copy
+
+
+def image_move(move, symmetry):
+    """
+    :param move: move in legal_moves form (tuple)
+    :param symmetry: index of symmetry (int)
+    :return: image of the move in legal_moves form (tuple)
+    """
+    orig, dest, num_pieces = transform_move(to_cell_move(move), symmetry)
+    return (COORDS[orig] if orig >= 0 else None), COORDS[dest], num_pieces
+
+
+def recorded_game(seed, symmetry=0):
+    """
+    Plays a random self-play game, optionally sending every move through a symmetry.
+    :param seed: seed for the game (int)
+    :param symmetry: index of symmetry (int)
+    :return: moves as (player index, move), and index of the winner or None (tuple)
+    """
+    moves, winner, result = played_games(1, seed, max_moves=30)[0]
+    return [(player, image_move(move, symmetry)) for player, move in moves], winner
+
+
+class SymmetryTest(unittest.TestCase):
+    """
+    Checks that the symmetries send legal moves to legal moves, and that every image of a position has the same
+    canonical form.
+    """
+
+    def test_symmetries_are_permutations(self):
+        self.assertEqual(len(set(SYMMETRIES)), 8)
+        for symmetry, cells in enumerate(SYMMETRIES):
+            self.assertEqual(sorted(cells), list(range(NUM_CELLS)))
+            inverse = SYMMETRIES[INVERSES[symmetry]]
+            self.assertEqual([inverse[cells[cell]] for cell in range(NUM_CELLS)], list(range(NUM_CELLS)))
+
+    def test_images_of_positions(self):
+        for seed in range(5):
+            for game, player in random_positions(seed, 40):
+                position, symmetry = canonical_position(game)
+                for other in range(len(SYMMETRIES)):
+                    with self.subTest(seed=seed, symmetry=other):
+                        image = image_game(game, other)
+                        self.assertEqual(sorted(image.generate_moves(player)),
+                                         sorted(transform_move(move, other) for move in game.generate_moves(player)))
+                        self.assertEqual(canonical_position(image)[0], position)
+                # the canonical form is the image under the symmetry returned, and hashes like a loaded game
+                canonical = image_game(game, symmetry)
+                self.assertEqual(canonical_position(canonical), (position, 0))
+                self.assertEqual(position_hash(position), canonical.get_hash())
+
+
+class OpeningBookTest(unittest.TestCase):
+    """
+    Checks that games which are images of each other count toward the same book entries, and that book moves are
+    sent back through the symmetry when probed.
+    """
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._directory.name, "book.db")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_images_share_entries(self):
+        # games can only be sent through the symmetries that leave the opening position as it is
+        opening = CompactFocusGame(PLAYER_A, PLAYER_B)
+        symmetries = [symmetry for symmetry in range(len(SYMMETRIES))
+                      if image_game(opening, symmetry).get_cells() == opening.get_cells()]
+        self.assertGreater(len(symmetries), 1)
+        moves, winner = recorded_game(1)
+        builder = OpeningBookBuilder(max_plies=8)
+        builder.add_game(moves, winner)
+        seen = len(builder)
+        for symmetry in symmetries:
+            builder.add_game(*recorded_game(1, symmetry))
+        self.assertEqual(len(builder), seen)
+        self.assertEqual(builder.get_games(), len(symmetries) + 1)
+        # every game reached every position, and its move there counted toward the same entry
+        entries = builder.choose_moves(min_games=len(symmetries) + 1)
+        self.assertEqual(len(entries), seen)
+        for wins, losses, draws, move in entries.values():
+            self.assertEqual(wins + losses + draws, len(symmetries) + 1)
+
+    def test_mirrored_moves_share_entries(self):
+        # from the opening, which is its own mirror image, a move and its mirror image are the same book move
+        opening = CompactFocusGame(PLAYER_A, PLAYER_B)
+        opening.set_position(opening.get_cells(), opening.get_reserved(), opening.get_captured(), 0)
+        position, symmetries = canonical_symmetries(opening)
+        self.assertGreater(len(symmetries), 1)
+        builder = OpeningBookBuilder(max_plies=1)
+        for move in opening.generate_moves(0):
+            for symmetry in range(len(SYMMETRIES)):
+                if image_game(opening, symmetry).get_cells() == opening.get_cells():
+                    self.assertEqual(canonical_move(transform_move(move, symmetry), symmetries),
+                                     canonical_move(move, symmetries))
+            builder.add_game([(0, (COORDS[move[0]], COORDS[move[1]], move[2]))], 0)
+        # a move and its mirror image count as one move played twice, which is enough for a book move
+        wins, losses, draws, move = builder.choose_moves(min_games=len(symmetries))[position]
+        self.assertEqual(wins, len(opening.generate_moves(0)))
+
+    def test_probe_sends_move_back(self):
+        moves, winner = recorded_game(2)
+        builder = OpeningBookBuilder(max_plies=4)
+        for count in range(3):
+            builder.add_game(moves, winner)
+        # a move played fewer than min_games times is not a book move
+        builder.add_game(*recorded_game(3))
+        self.assertEqual(builder.write(self._path, min_games=3), 4)
+
+        with OpeningBook(self._path) as book:
+            self.assertEqual(len(book), 4)
+            game = CompactFocusGame(PLAYER_A, PLAYER_B)
+            for player, move in moves[:4]:
+                name = NAMES[player]
+                for symmetry in range(len(SYMMETRIES)):
+                    with self.subTest(move=move, symmetry=symmetry):
+                        image = image_game(game, symmetry)
+                        image.set_position(image.get_cells(), image.get_reserved(), image.get_captured(), player)
+                        entry = book.probe(image, name)
+                        self.assertEqual(book.choose_move(image, name), entry[3])
+                        # the move given is the image of the move played, or a mirror image of it that the position
+                        # cannot tell apart from it
+                        symmetries = canonical_symmetries(image)[1]
+                        self.assertEqual(canonical_move(to_cell_move(entry[3]), symmetries),
+                                         canonical_move(to_cell_move(image_move(move, symmetry)), symmetries))
+                        # and it is the same every time the position is probed
+                        self.assertEqual(book.probe(image_game(image, 0), name), entry)
+                self.assertIsNone(book.probe(game, "Nobody"))
+                game.apply_move(name, move)
+            self.assertIsNone(book.probe(game, NAMES[moves[4][0]]))
+            self.assertIsNone(book.choose_move(game, NAMES[moves[4][0]]))
+
+    def test_players_use_book_moves(self):
+        moves, winner = recorded_game(4)
+        builder = OpeningBookBuilder(max_plies=1)
+        for count in range(3):
+            builder.add_game(moves, winner)
+        builder.write(self._path)
+        with OpeningBook(self._path) as book:
+            player = AlphaBetaPlayer(max_depth=1, opening_book=book)
+            game = CompactFocusGame(PLAYER_A, PLAYER_B)
+            move = player.choose_move(game, NAMES[moves[0][0]])
+            # the move played, or its mirror image, which is the same book move from the opening
+            game.set_position(game.get_cells(), game.get_reserved(), game.get_captured(), moves[0][0])
+            symmetries = canonical_symmetries(game)[1]
+            self.assertEqual(canonical_move(to_cell_move(move), symmetries),
+                             canonical_move(to_cell_move(moves[0][1]), symmetries))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+#Description: Tests for packing positions and for the memory-mapped position database.
+
+import os
+import struct
+import tempfile
+import unittest
+
+from FocusGame import FocusGame
+from compact_game import CompactFocusGame
+from move_tables import COORDS
+from position_db import PositionDatabase, serialize_position, deserialize_position, POSITION_SIZE, NO_MOVE
+from test_helpers import random_positions
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+
+class SerializeTest(unittest.TestCase):
+    """
+    Checks that a packed position loads back into either game class unchanged.
+    """
+
+    def test_round_trip(self):
+        for game in random_positions(4, 60, with_player=False):
+            data = serialize_position(game)
+            self.assertEqual(len(data), POSITION_SIZE)
+            for game_class in (FocusGame, CompactFocusGame):
+                loaded = game_class(PLAYER_A, PLAYER_B)
+                loaded.set_position(*deserialize_position(b"xx" + data, 2))
+                self.assertEqual(serialize_position(loaded), data)
+                self.assertEqual(loaded.get_hash(), game.get_hash())
+                self.assertEqual([loaded.show_pieces(position) for position in COORDS],
+                                 [game.show_pieces(position) for position in COORDS])
+
+
+class PositionDatabaseTest(unittest.TestCase):
+    """
+    Checks storing, looking up and reopening positions in a position file.
+    """
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._directory.name, "positions.fgpd")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_round_trip_through_file(self):
+        games = {}
+        for seed in range(5):
+            for game in random_positions(seed, 60, with_player=False):
+                games[serialize_position(game)] = game
+        with PositionDatabase(self._path, capacity=2 * len(games)) as database:
+            for index, game in enumerate(games.values()):
+                database.store(game, (index, 0, 0, NO_MOVE))
+            self.assertEqual(len(database), len(games))
+
+        with PositionDatabase(self._path) as database:
+            self.assertEqual(len(database), len(games))
+            self.assertEqual(database.get_capacity(), 2 * len(games))
+            for index, game in enumerate(games.values()):
+                self.assertEqual(database.lookup(game), (index, 0, 0, NO_MOVE))
+            self.assertEqual(sorted(position for key, position, values in database.positions()), sorted(games))
+
+    def test_add_result(self):
+        game = FocusGame(PLAYER_A, PLAYER_B)
+        with PositionDatabase(self._path, capacity=16) as database:
+            self.assertIsNone(database.lookup(game))
+            database.add_result(game, 1)
+            database.add_result(game, -1, best_move=42)
+            database.add_result(game, 0)
+            database.add_result(game, 1)
+            self.assertEqual(database.lookup(game), (2, 1, 1, 42))
+            self.assertEqual(len(database), 1)
+            # the same position from the other game class is the same entry
+            self.assertEqual(database.lookup(CompactFocusGame(PLAYER_A, PLAYER_B)), (2, 1, 1, 42))
+
+    def test_hash_collisions(self):
+        positions = [serialize_position(game) for game in random_positions(1, 5, with_player=False)]
+        with PositionDatabase(self._path, capacity=16) as database:
+            for index, position in enumerate(positions):
+                database.store_position(7, position, (index, 0, 0, NO_MOVE))
+            for index, position in enumerate(positions):
+                self.assertEqual(database.lookup_position(7, position), (index, 0, 0, NO_MOVE))
+            self.assertIsNone(database.lookup_position(8, positions[0]))
+
+    def test_full(self):
+        positions = [serialize_position(game) for game in random_positions(2, 20, with_player=False)]
+        with PositionDatabase(self._path, capacity=10) as database:
+            with self.assertRaises(ValueError):
+                for key, position in enumerate(positions):
+                    database.store_position(key, position, (0, 0, 0, NO_MOVE))
+            self.assertEqual(len(database), 9)
+
+    def test_invalid_files(self):
+        with self.assertRaises(ValueError):
+            PositionDatabase(self._path)
+        with open(self._path, "wb") as file:
+            file.write(b"\0" * 1024)
+        with self.assertRaises(ValueError):
+            PositionDatabase(self._path)
+        # an empty file cannot even be mapped
+        open(self._path, "wb").close()
+        with self.assertRaises(ValueError):
+            PositionDatabase(self._path)
+        os.remove(self._path)
+        PositionDatabase(self._path, capacity=8).close()
+        with self.assertRaises(ValueError):
+            PositionDatabase(self._path, value_format=struct.Struct("<I"))
+        # the file is cut short
+        with open(self._path, "r+b") as file:
+            file.truncate(os.path.getsize(self._path) - 1)
+        with self.assertRaises(ValueError):
+            PositionDatabase(self._path)
+
+    def test_value_format_is_checked(self):
+        # formats of the same size are told apart by the format string saved in the header
+        with PositionDatabase(self._path, capacity=8, value_format=struct.Struct("<bBBH")) as database:
+            database.store(CompactFocusGame(PLAYER_A, PLAYER_B), (-1, 2, 3, 4))
+        for value_format in (struct.Struct("<HBBb"), struct.Struct("<BBBH"), struct.Struct("=bBBH")):
+            with self.subTest(value_format=value_format.format):
+                self.assertEqual(value_format.size, 5)
+                with self.assertRaises(ValueError):
+                    PositionDatabase(self._path, value_format=value_format)
+        with PositionDatabase(self._path, value_format=struct.Struct("<bBBH")) as database:
+            self.assertEqual(database.lookup(CompactFocusGame(PLAYER_A, PLAYER_B)), (-1, 2, 3, 4))
+        with self.assertRaises(ValueError):
+            PositionDatabase(self._path, value_format=struct.Struct("<" + "B" * 64))
+
+
+if __name__ == "__main__":
+    unittest.main()
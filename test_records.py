@@ -0,0 +1,144 @@
+#Description: Tests for writing and reading game record files.
+
+import io
+import unittest
+
+from FocusGame import FocusGame
+from compact_game import CompactFocusGame
+from move_tables import COORDS
+from records import GameRecordWriter, read_games, replay_games, encode_move, decode_move, unpack_move, DECODED_MOVES, \
+    BINARY_MAGIC
+from selfplay import PLAYER_A, PLAYER_B
+from test_helpers import played_games
+
+NAMES = (PLAYER_A[0], PLAYER_B[0])
+
+
+def write_games(games, text=False, snapshot_interval=8):
+    """
+    Writes games to an in-memory record file.
+    :param games: games from played_games (list of tuples)
+    :param text: whether to use the text format (boolean)
+    :param snapshot_interval: number of moves between snapshots (int)
+    :return: file contents, ready to be read (io.BytesIO)
+    """
+    stream = io.BytesIO()
+    writer = GameRecordWriter(stream, snapshot_interval=snapshot_interval, text=text)
+    for moves, winner, result in games:
+        writer.start_game(PLAYER_A, PLAYER_B)
+        for player, move in moves:
+            writer.record_move(NAMES[player], move)
+        writer.end_game(None if winner is None else NAMES[winner])
+    stream.seek(0)
+    return stream
+
+
+def show_game(game):
+    """
+    :param game: game to read (FocusGame or CompactFocusGame)
+    :return: copies of the stacks, and reserved and captured counts (tuple)
+    """
+    return ([list(game.show_pieces(position)) for position in COORDS],
+            [(game.show_reserve(name), game.show_captured(name)) for name in NAMES])
+
+
+class MoveEncodingTest(unittest.TestCase):
+    """
+    Checks that every move packs into 16 bits and back.
+    """
+
+    def test_round_trip(self):
+        for word, (player, move) in DECODED_MOVES.items():
+            self.assertEqual(encode_move(player, move), word)
+            self.assertEqual(decode_move(word), (player, move))
+            self.assertEqual(unpack_move(word), (player, move))
+        # 36 reserved moves and 360 stack moves that stay on the board, for each player
+        self.assertEqual(len(DECODED_MOVES), 2 * (36 + 360))
+
+
+class RecordFileTest(unittest.TestCase):
+    """
+    Checks that games written in either format read back the same, and replay to the same positions.
+    """
+
+    def test_round_trip(self):
+        games = played_games(6, 9)
+        for text in (False, True):
+            with self.subTest(text=text):
+                records = list(read_games(write_games(games, text)))
+                self.assertEqual(len(records), len(games))
+                for record, (moves, winner, result) in zip(records, games):
+                    self.assertEqual(record.get_players(), (PLAYER_A, PLAYER_B))
+                    self.assertEqual(record.get_moves(), moves)
+                    self.assertEqual(record.get_winner(), winner)
+                    self.assertEqual(sorted(record.get_snapshots()), list(range(8, len(moves) + 1, 8)))
+
+    def test_replay(self):
+        games = played_games(4, 9)
+        for game_class in (FocusGame, CompactFocusGame):
+            for (record, game), (moves, winner, result) in zip(replay_games(write_games(games), game_class), games):
+                expected = game_class(PLAYER_A, PLAYER_B)
+                for player, move in moves:
+                    expected.apply_move(NAMES[player], move)
+                self.assertEqual(show_game(game), show_game(expected))
+
+    def test_position_at_matches_replay(self):
+        games = played_games(3, 9)
+        for record in read_games(write_games(games, snapshot_interval=5)):
+            positions = [show_game(record.new_game())]
+            for move_number, status, game in record.replay():
+                self.assertNotIn(status, ("Not your turn", "Invalid location", "Invalid number of pieces",
+                                          "No pieces in reserve"))
+                positions.append(show_game(game))
+            for game_class in (FocusGame, CompactFocusGame):
+                for move_number in range(0, len(positions), 3):
+                    self.assertEqual(show_game(record.position_at(move_number, game_class)), positions[move_number])
+
+    def test_not_a_record_file(self):
+        with self.assertRaises(ValueError):
+            list(read_games(io.BytesIO(b"not a record file")))
+        stream = write_games(played_games(1, 9))
+        data = stream.getvalue()
+        with self.assertRaises(ValueError):
+            list(read_games(io.BytesIO(data + b"X")))
+
+    def test_truncated_file(self):
+        data = write_games(played_games(1, 9)).getvalue()
+        # a file cut off between chunks reads as far as it goes, and one cut off in the middle of a chunk fails
+        # with a clear error
+        truncated = 0
+        for length in range(len(BINARY_MAGIC), len(data)):
+            try:
+                list(read_games(io.BytesIO(data[:length])))
+            except ValueError as error:
+                self.assertEqual(str(error), "Truncated record")
+                truncated += 1
+        self.assertGreater(truncated, len(data) // 2)
+
+    def test_names_are_checked_and_escaped(self):
+        for text in (False, True):
+            with self.subTest(text=text):
+                writer = GameRecordWriter(io.BytesIO(), text=text)
+                with self.assertRaises(ValueError):
+                    writer.start_game(("\u00e9" * 128, "Red"), PLAYER_B)
+                writer.start_game(("\u00e9" * 127, "Red"), PLAYER_B)
+        # names and colors holding the characters the text format uses to separate fields and chunks
+        player_a = ("Tab\tName", "Back\\slash")
+        player_b = ("New\nLine\r", "\\t")
+        for text in (False, True):
+            with self.subTest(text=text):
+                stream = io.BytesIO()
+                writer = GameRecordWriter(stream, text=text)
+                writer.start_game(player_a, player_b)
+                writer.record_move(player_a[0], ((0, 0), (0, 1), 1))
+                writer.end_game(player_a[0])
+                stream.seek(0)
+                records = list(read_games(stream))
+                self.assertEqual(len(records), 1)
+                self.assertEqual(records[0].get_players(), (player_a, player_b))
+                self.assertEqual(records[0].get_moves(), [(0, ((0, 0), (0, 1), 1))])
+                self.assertEqual(records[0].get_winner(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#Description: Tests for the self-play runner.
+
+import unittest
+
+from FocusGame import FocusGame
+from selfplay import SelfPlayRunner, play_game, PLAYER_A, PLAYER_B, ALPHABETA
+
+
+class SelfPlayTest(unittest.TestCase):
+    """
+    Checks that self-play games are reproducible and follow the rules.
+    """
+
+    def test_same_games_with_any_number_of_workers(self):
+        results = []
+        for workers in (1, 2):
+            runner = SelfPlayRunner(10, seed=7, workers=workers, shard_size=3, max_moves=150)
+            results.append(sorted(runner.run(), key=lambda result: result["game"]))
+            self.assertEqual(runner.get_games_completed(), 10)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual([result["game"] for result in results[0]], list(range(10)))
+
+    def test_seeds_give_different_games(self):
+        self.assertEqual(play_game(3, 1, record_moves=True), play_game(3, 1, record_moves=True))
+        self.assertNotEqual(play_game(3, 1, record_moves=True)["moves"], play_game(3, 2, record_moves=True)["moves"])
+        self.assertNotEqual(play_game(3, 1, record_moves=True)["moves"], play_game(4, 1, record_moves=True)["moves"])
+
+    def test_recorded_moves_replay(self):
+        for game_index in range(6):
+            result = play_game(game_index, 5, record_moves=True)
+            game = FocusGame(PLAYER_A, PLAYER_B)
+            names = ("PlayerA", "PlayerB")
+            player = game_index % 2
+            self.assertEqual(result["first_mover"], names[player].upper())
+            for orig_coord, dest_coord, num_pieces in result["moves"]:
+                if orig_coord is None:
+                    status = game.reserved_move(names[player], dest_coord)
+                    self.assertIn(status, (None, names[player] + " Wins"))
+                else:
+                    status = game.move_piece(names[player], orig_coord, dest_coord, num_pieces)
+                    self.assertIn(status, ("Successfully moved", names[player] + " Wins"))
+                player = 1 - player
+            self.assertEqual([game.show_captured(name) for name in names], result["captured"])
+            self.assertEqual([game.show_reserve(name) for name in names], result["reserved"])
+            if result["reason"] == "capture":
+                self.assertEqual(result["winner"], names[1 - player].upper())
+
+    def test_alphabeta_mode(self):
+        first = play_game(0, 3, mode=ALPHABETA, search_depth=1, max_moves=30, record_moves=True)
+        self.assertEqual(first, play_game(0, 3, mode=ALPHABETA, search_depth=1, max_moves=30, record_moves=True))
+        self.assertLessEqual(first["num_moves"], 30)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            SelfPlayRunner(1, mode="greedy")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+#Description: Tests for the game server and its client.
+
+import asyncio
+import json
+import unittest
+
+from compact_game import CompactFocusGame
+from server import FocusGameServer, FocusGameClient, LENGTH_FORMAT, frame_message, read_message
+
+PLAYER_A = ["PlayerA", "Red"]
+PLAYER_B = ["PlayerB", "Green"]
+
+
+def frame_raw(body):
+    """
+    :param body: message body, which need not be valid JSON (bytes)
+    :return: framed message (bytes)
+    """
+    return LENGTH_FORMAT.pack(len(body)) + body
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    """
+    Checks requests through a client, and that bad requests get error responses without closing the connection.
+    """
+
+    async def asyncSetUp(self):
+        self._server = FocusGameServer(port=0)
+        await self._server.start()
+        self._client = FocusGameClient()
+        await self._client.connect("127.0.0.1", self._server.get_port())
+
+    async def asyncTearDown(self):
+        await self._client.close()
+        await self._server.close()
+
+    async def test_play_through_client(self):
+        game = await self._client.request("new_game", player_a=PLAYER_A, player_b=PLAYER_B)
+        self.assertEqual(self._server.get_num_games(), 1)
+        result = await self._client.request("move_piece", game=game, player="PlayerA", orig=[0, 0], dest=[0, 1],
+                                            num_pieces=1)
+        self.assertEqual(result, "Successfully moved")
+        self.assertEqual(await self._client.request("show_pieces", game=game, position=[0, 1]), ["RED", "RED"])
+        self.assertEqual(await self._client.request("show_reserve", game=game, player="PlayerA"), 0)
+        moves = await self._client.request("legal_moves", game=game, player="PlayerB")
+        expected = CompactFocusGame(PLAYER_A, PLAYER_B)
+        expected.move_piece("PlayerA", (0, 0), (0, 1), 1)
+        self.assertEqual(len(moves), len(list(expected.legal_moves("PlayerB"))))
+        stats = await self._client.request("stats")
+        self.assertEqual(stats["games"], 1)
+        self.assertIn("p99", stats["latency"])
+        self.assertTrue(await self._client.request("close_game", game=game))
+        self.assertFalse(await self._client.request("close_game", game=game))
+
+    async def test_concurrent_requests(self):
+        games = await asyncio.gather(*[self._client.request("new_game", player_a=PLAYER_A, player_b=PLAYER_B)
+                                       for count in range(20)])
+        self.assertEqual(len(set(games)), 20)
+        results = await asyncio.gather(*[self._client.request("move_piece", game=game, player="PlayerB",
+                                                              orig=[0, 2], dest=[0, 3], num_pieces=1)
+                                         for game in games])
+        self.assertEqual(results, ["Successfully moved"] * 20)
+
+    async def test_bad_requests(self):
+        game = await self._client.request("new_game", player_a=PLAYER_A, player_b=PLAYER_B)
+        bad_requests = [{"op": "fly"},
+                        {"op": "move_piece", "game": "none", "player": "PlayerA"},
+                        {"op": "move_piece", "game": game, "player": 5, "orig": [0, 0], "dest": [0, 1],
+                         "num_pieces": 1},
+                        {"op": "show_reserve", "game": game, "player": None},
+                        {"op": "move_piece", "game": game, "player": "PlayerA", "orig": "ab", "dest": [0, 1],
+                         "num_pieces": 1},
+                        {"op": "new_game", "player_a": [5, "Red"], "player_b": PLAYER_B},
+                        {"op": "new_game", "player_a": "PlayerA", "player_b": PLAYER_B}]
+        for request in bad_requests:
+            with self.subTest(request=request):
+                op = request.pop("op")
+                with self.assertRaises(ValueError):
+                    await self._client.request(op, **request)
+        # an unknown player is told it is not their turn, even before the first move
+        self.assertEqual(await self._client.request("move_piece", game=game, player="Nobody", orig=[0, 0],
+                                                    dest=[0, 1], num_pieces=1), "Not your turn")
+        # the connection is still usable
+        self.assertEqual(await self._client.request("move_piece", game=game, player="PlayerA", orig=[0, 0],
+                                                    dest=[0, 1], num_pieces=1), "Successfully moved")
+
+    async def test_bad_messages_on_raw_connection(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self._server.get_port())
+        try:
+            for body in (b"[1, 2]", b"5", b"{not json", b"\xff\xfe", b"null", b"[" * 100000):
+                writer.write(frame_raw(body))
+                response = await read_message(reader)
+                self.assertIsNone(response["id"])
+                self.assertIn("error", response)
+            writer.write(frame_message({"id": 7, "op": "stats"}))
+            response = await read_message(reader)
+            self.assertEqual(response["id"], 7)
+            self.assertIn("result", response)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+
+class ClientTest(unittest.IsolatedAsyncioTestCase):
+    """
+    Checks that requests fail instead of waiting forever when the connection closes.
+    """
+
+    async def test_requests_fail_when_connection_closes(self):
+        async def close_after_request(reader, writer):
+            await read_message(reader)
+            writer.close()
+
+        server = await asyncio.start_server(close_after_request, "127.0.0.1", 0)
+        client = FocusGameClient()
+        try:
+            await client.connect("127.0.0.1", server.sockets[0].getsockname()[1])
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(client.request("stats"), 5)
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(client.request("stats"), 5)
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+
+    async def test_requests_fail_on_bad_response(self):
+        async def send_garbage(reader, writer):
+            await read_message(reader)
+            writer.write(frame_raw(json.dumps([1, 2]).encode("utf-8")))
+            await writer.drain()
+
+        server = await asyncio.start_server(send_garbage, "127.0.0.1", 0)
+        client = FocusGameClient()
+        try:
+            await client.connect("127.0.0.1", server.sockets[0].getsockname()[1])
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(client.request("stats"), 5)
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(client.request("stats"), 5)
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+
+
+if __name__ == "__main__":
+    unittest.main()
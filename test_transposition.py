@@ -0,0 +1,72 @@
+#Description: Tests for the bounded transposition table.
+
+import unittest
+
+from transposition import TranspositionTable, ALWAYS, DEPTH, LRU, EXACT, LOWER_BOUND
+
+
+class TranspositionTableTest(unittest.TestCase):
+    """
+    Checks storing, looking up and replacing entries under each policy.
+    """
+
+    def test_store_and_lookup(self):
+        for policy in (ALWAYS, DEPTH, LRU):
+            table = TranspositionTable(16, policy)
+            self.assertTrue(table.store(5, 3, 42, LOWER_BOUND, (1, 2, 1)))
+            self.assertEqual(table.lookup(5), (5, 3, 42, LOWER_BOUND, (1, 2, 1)))
+            self.assertIsNone(table.lookup(6))
+            self.assertIn(5, table)
+            self.assertNotIn(6, table)
+            self.assertEqual(len(table), 1)
+            self.assertEqual((table.get_hits(), table.get_misses()), (1, 1))
+            table.clear()
+            self.assertEqual(len(table), 0)
+            self.assertIsNone(table.lookup(5))
+
+    def test_always_replaces(self):
+        table = TranspositionTable(16, ALWAYS)
+        table.store(1, 5, 10)
+        self.assertTrue(table.store(17, 1, 20))
+        self.assertIsNone(table.lookup(1))
+        self.assertEqual(table.lookup(17)[2], 20)
+        self.assertEqual(len(table), 1)
+
+    def test_depth_keeps_deeper_entries(self):
+        table = TranspositionTable(16, DEPTH)
+        table.store(1, 5, 10)
+        self.assertFalse(table.store(17, 4, 20))
+        self.assertEqual(table.lookup(1)[2], 10)
+        self.assertTrue(table.store(17, 5, 30))
+        self.assertEqual(table.lookup(17)[2], 30)
+        # the same position is always updated, even by a shallower search
+        self.assertTrue(table.store(17, 1, 40, EXACT))
+        self.assertEqual(table.lookup(17)[2], 40)
+
+    def test_lru_evicts_least_recently_used(self):
+        table = TranspositionTable(3, LRU)
+        for key in (1, 2, 3):
+            table.store(key, 1, key)
+        table.lookup(1)
+        table.store(4, 1, 4)
+        self.assertNotIn(2, table)
+        for key in (1, 3, 4):
+            self.assertIn(key, table)
+        self.assertEqual(len(table), 3)
+
+    def test_bounded(self):
+        for policy in (ALWAYS, DEPTH, LRU):
+            table = TranspositionTable(8, policy)
+            for key in range(100):
+                table.store(key * 7919, key % 4, key)
+            self.assertLessEqual(len(table), 8)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            TranspositionTable(16, "random")
+        with self.assertRaises(ValueError):
+            TranspositionTable(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+#Description: Tests for the Rules class and games played under variant rules.
+
+import random
+import unittest
+
+import move_tables
+import variants
+from FocusGame import FocusGame
+from variants import Rules, ORIGINAL_RULES, STANDARD_RULES, EMPTY, PLAYER_A, PLAYER_B
+
+PLAYER_A_INFO = ("PlayerA", "Red")
+PLAYER_B_INFO = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+
+class RulesTest(unittest.TestCase):
+    """
+    Checks the tables and opening layouts the rules build, and the arguments they turn away.
+    """
+
+    def test_invalid_arguments(self):
+        for kwargs in ({"board_size": 5}, {"board_size": 0}, {"stack_cap": 0}, {"stack_cap": variants.MAX_STACK_CAP + 1},
+                       {"win_captures": 0}, {"opening": (PLAYER_A,) * 35}, {"opening": (2,) * 36}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    Rules(**kwargs)
+
+    def test_standard_rules_share_move_tables(self):
+        for rules in (STANDARD_RULES, Rules()):
+            self.assertTrue(rules.is_standard())
+            self.assertIs(rules.get_coords(), move_tables.COORDS)
+            self.assertIs(rules.get_cell_indexes(), move_tables.CELL_INDEX)
+        self.assertFalse(ORIGINAL_RULES.is_standard())
+        self.assertFalse(Rules(win_captures=3).is_standard())
+
+    def test_generated_opening_matches_standard_layout(self):
+        rows = [[PLAYER_A, PLAYER_A, PLAYER_B, PLAYER_B, PLAYER_A, PLAYER_A],
+                [PLAYER_B, PLAYER_B, PLAYER_A, PLAYER_A, PLAYER_B, PLAYER_B]] * 3
+        self.assertEqual(STANDARD_RULES.get_opening_rows(), rows)
+        game = FocusGame(PLAYER_A_INFO, PLAYER_B_INFO)
+        colors = ("RED", "GREEN")
+        for row, col in move_tables.COORDS:
+            self.assertEqual(game.show_pieces((row, col)), [colors[rows[row][col]]])
+
+    def test_opening_pieces_are_shared_but_stacks_are_not(self):
+        pieces = STANDARD_RULES.get_opening_pieces("RED", "GREEN")
+        self.assertIs(STANDARD_RULES.get_opening_pieces("RED", "GREEN"), pieces)
+        self.assertEqual(pieces[0], ("RED", "RED", "GREEN", "GREEN", "RED", "RED"))
+        self.assertEqual(ORIGINAL_RULES.get_opening_pieces("RED", "GREEN")[0], (None, None, "", "", "", "", None, None))
+        # games laid out from the same pieces still get stacks of their own
+        first = FocusGame(PLAYER_A_INFO, PLAYER_B_INFO)
+        second = FocusGame(PLAYER_A_INFO, PLAYER_B_INFO)
+        self.assertEqual(first.move_piece("PlayerA", (0, 0), (0, 1), 1), "Successfully moved")
+        self.assertEqual(first.show_pieces((0, 1)), ["RED", "RED"])
+        self.assertEqual(second.show_pieces((0, 0)), ["RED"])
+        self.assertEqual(second.show_pieces((0, 1)), ["RED"])
+
+    def test_original_rules_board(self):
+        self.assertEqual(len(ORIGINAL_RULES.get_coords()), 52)
+        self.assertEqual(ORIGINAL_RULES.get_grid_size(), 8)
+        opening = ORIGINAL_RULES.get_opening()
+        self.assertEqual(opening.count(EMPTY), 16)
+        self.assertEqual((opening.count(PLAYER_A), opening.count(PLAYER_B)), (18, 18))
+        game = FocusGame(PLAYER_A_INFO, PLAYER_B_INFO, ORIGINAL_RULES)
+        for corner in ((0, 0), (0, 1), (1, 0), (7, 7)):
+            self.assertIsNone(game.show_pieces(corner))
+        self.assertEqual(game.show_pieces((0, 2)), [])
+        self.assertEqual(game.show_pieces((1, 1)), ["RED"])
+        # a stack on the middle board can move out onto an edge extension, but not off it into a corner
+        self.assertEqual(game.move_piece("PlayerA", (1, 2), (0, 2), 1), "Successfully moved")
+        self.assertEqual(game.move_piece("PlayerB", (2, 1), (2, 0), 1), "Successfully moved")
+        self.assertEqual(game.move_piece("PlayerA", (0, 2), (0, 1), 1), "Invalid location")
+        self.assertEqual(game.move_piece("PlayerA", (0, 2), (0, 3), 1), "Successfully moved")
+        self.assertEqual(game.show_pieces((0, 3)), ["RED"])
+
+
+class VariantGameTest(unittest.TestCase):
+    """
+    Checks that games under variant rules follow the variant's stack cap and win threshold.
+    """
+
+    def test_stack_cap(self):
+        game = FocusGame(PLAYER_A_INFO, PLAYER_B_INFO, Rules(stack_cap=2))
+        self.assertEqual(game.move_piece("PlayerA", (0, 0), (0, 1), 1), "Successfully moved")
+        self.assertEqual(game.move_piece("PlayerB", (0, 2), (0, 1), 1), "Successfully moved")
+        self.assertEqual(game.show_pieces((0, 1)), ["RED", "GREEN"])
+        self.assertEqual(game.show_captured("PlayerB"), 1)
+        # a stack of two can move no more than two spaces, the cap
+        self.assertEqual(game.move_piece("PlayerA", (0, 4), (0, 5), 1), "Successfully moved")
+        self.assertEqual(game.move_piece("PlayerB", (0, 1), (3, 1), 2), "Invalid location")
+
+    def test_win_threshold(self):
+        game = FocusGame(PLAYER_A_INFO, PLAYER_B_INFO, Rules(stack_cap=2, win_captures=1))
+        self.assertEqual(game.move_piece("PlayerA", (0, 0), (0, 1), 1), "Successfully moved")
+        self.assertEqual(game.move_piece("PlayerB", (0, 2), (0, 1), 1), "PlayerB Wins")
+
+    def test_random_games_on_original_board(self):
+        for seed in range(5):
+            game = FocusGame(PLAYER_A_INFO, PLAYER_B_INFO, ORIGINAL_RULES)
+            game.get_hash()
+            rng = random.Random(seed)
+            player = seed % 2
+            for step in range(150):
+                name = NAMES[player]
+                moves = list(game.legal_moves(name))
+                if not moves:
+                    break
+                for orig_coord, dest_coord, num_pieces in moves:
+                    # every generated move ends on the board, and move_piece accepts it
+                    self.assertIsNotNone(game.show_pieces(dest_coord))
+                    if orig_coord is not None:
+                        result = game.clone().move_piece(name, orig_coord, dest_coord, num_pieces)
+                        self.assertTrue(result == "Successfully moved" or result.endswith(" Wins"))
+                move = rng.choice(moves)
+                won = game.apply_move(name, move)
+                self.assertEqual(game.get_hash(), game.compute_hash())
+                if won:
+                    break
+                player = 1 - player
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+#Description: Tests for the Zobrist hashes kept by FocusGame and CompactFocusGame.
+
+import unittest
+
+import zobrist
+from FocusGame import FocusGame
+from compact_game import CompactFocusGame, OPENING_CELLS
+from test_helpers import random_moves
+
+PLAYER_A = ("PlayerA", "Red")
+PLAYER_B = ("PlayerB", "Green")
+NAMES = ("PlayerA", "PlayerB")
+
+
+class ZobristHashTest(unittest.TestCase):
+    """
+    Checks that the hash kept up to date move by move always equals the hash computed from scratch.
+    """
+
+    def test_opening_hash(self):
+        value = zobrist.TURN_KEYS[0] ^ zobrist.hash_counts(0, 0, 0) ^ zobrist.hash_counts(1, 0, 0)
+        for cell, code in enumerate(OPENING_CELLS):
+            value ^= zobrist.CELL_KEYS[cell][code]
+        self.assertEqual(FocusGame(PLAYER_A, PLAYER_B).get_hash(), value)
+        self.assertEqual(CompactFocusGame(PLAYER_A, PLAYER_B).get_hash(), value)
+
+    def test_cell_keys_match_hash_stack(self):
+        for cell in (0, 17, 35):
+            for code in range(1 << 8):
+                height = code & zobrist.HEIGHT_MASK
+                if height > zobrist.MAX_STACK:
+                    continue
+                owners = [(code >> (zobrist.HEIGHT_BITS + level)) & 1 for level in range(height)]
+                self.assertEqual(zobrist.CELL_KEYS[cell][code], zobrist.hash_stack(cell, owners))
+
+    def test_incremental_hash(self):
+        for seed in range(10):
+            game = FocusGame(PLAYER_A, PLAYER_B)
+            compact = CompactFocusGame(PLAYER_A, PLAYER_B)
+            game.get_hash()
+            compact.get_hash()
+            for name, move in random_moves(seed):
+                game.apply_move(name, move)
+                compact.apply_move(name, move)
+                self.assertEqual(game.get_hash(), game.compute_hash())
+                self.assertEqual(compact.get_hash(), compact.compute_hash())
+                self.assertEqual(game.get_hash(), compact.get_hash())
+
+    def test_hash_after_undo(self):
+        for seed in range(10):
+            for game in (FocusGame(PLAYER_A, PLAYER_B), CompactFocusGame(PLAYER_A, PLAYER_B)):
+                hashes = [game.get_hash()]
+                moves = random_moves(seed)
+                for name, move in moves:
+                    game.apply_move(name, move)
+                    hashes.append(game.get_hash())
+                for count in range(len(moves)):
+                    self.assertTrue(game.undo_move())
+                    hashes.pop()
+                    self.assertEqual(game.get_hash(), hashes[-1])
+                    self.assertEqual(game.get_hash(), game.compute_hash())
+                self.assertFalse(game.undo_move())
+
+    def test_hash_first_asked_mid_game(self):
+        moves = random_moves(3)
+        for game in (FocusGame(PLAYER_A, PLAYER_B), CompactFocusGame(PLAYER_A, PLAYER_B)):
+            middle = len(moves) // 2
+            for name, move in moves[:middle]:
+                game.apply_move(name, move)
+            value = game.get_hash()
+            for name, move in moves[middle:]:
+                game.apply_move(name, move)
+                self.assertEqual(game.get_hash(), game.compute_hash())
+            # undoing past the move where the hash was first asked for still gives the right hash
+            while game.undo_move():
+                self.assertEqual(game.get_hash(), game.compute_hash())
+            self.assertNotEqual(game.get_hash(), value)
+
+    def test_transpositions_hash_the_same(self):
+        one = FocusGame(PLAYER_A, PLAYER_B)
+        two = FocusGame(PLAYER_A, PLAYER_B)
+        for name, orig_coord, dest_coord in (("PlayerA", (0, 0), (0, 1)), ("PlayerB", (0, 2), (0, 3)),
+                                             ("PlayerA", (2, 0), (2, 1)), ("PlayerB", (2, 2), (2, 3))):
+            one.move_piece(name, orig_coord, dest_coord, 1)
+        for name, orig_coord, dest_coord in (("PlayerA", (2, 0), (2, 1)), ("PlayerB", (2, 2), (2, 3)),
+                                             ("PlayerA", (0, 0), (0, 1)), ("PlayerB", (0, 2), (0, 3))):
+            two.move_piece(name, orig_coord, dest_coord, 1)
+        self.assertEqual(one.get_hash(), two.get_hash())
+        self.assertNotEqual(one.get_hash(), FocusGame(PLAYER_A, PLAYER_B).get_hash())
+
+
+if __name__ == "__main__":
+    unittest.main()
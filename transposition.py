@@ -0,0 +1,152 @@
+#Description: Contains a bounded transposition table for storing search results by position hash.
+
+from collections import OrderedDict
+
+# kinds of value stored in an entry
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# replacement policies
+ALWAYS = "always"
+DEPTH = "depth"
+LRU = "lru"
+POLICIES = (ALWAYS, DEPTH, LRU)
+
+
+class TranspositionTable:
+    """
+    Represents a fixed-size table of search results keyed by the Zobrist hash of a position (see FocusGame.get_hash).
+    Each entry is a tuple of (key, depth, value, flag, move), where flag says whether value is exact or a bound.
+    The policy decides what happens when the table is full:
+    "always" and "depth" use one slot per hash (key modulo capacity). With "always", a new entry always replaces the
+    entry in its slot, and with "depth", it only replaces an entry that was searched to the same depth or less.
+    "lru" keeps entries in order of use and evicts the least recently used entry when the table is full.
+    Keeps counts of hits and misses so the table size can be tuned.
+    """
+
+    def __init__(self, capacity=1 << 16, policy=DEPTH):
+        """
+        Initializes an empty table.
+        :param capacity: maximum number of entries (int)
+        :param policy: replacement policy, "always", "depth", or "lru" (string)
+        """
+        if policy not in POLICIES:
+            raise ValueError("Unknown replacement policy: " + str(policy))
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        self._capacity = capacity
+        self._policy = policy
+        self._hits = 0
+        self._misses = 0
+        if policy == LRU:
+            self._entries = OrderedDict()
+        else:
+            self._slots = [None] * capacity
+            self._size = 0
+
+    def store(self, key, depth, value, flag=EXACT, move=None):
+        """
+        Stores a search result, following the table's replacement policy.
+        :param key: hash of the position (int)
+        :param depth: depth the position was searched to (int)
+        :param value: score of the position (int or float)
+        :param flag: EXACT, LOWER_BOUND or UPPER_BOUND (int)
+        :param move: best move found, if any (tuple)
+        :return: True if the entry was stored, False if an existing entry was kept instead (boolean)
+        """
+        entry = (key, depth, value, flag, move)
+        if self._policy == LRU:
+            entries = self._entries
+            if key in entries:
+                entries.move_to_end(key)
+            elif len(entries) >= self._capacity:
+                entries.popitem(last=False)
+            entries[key] = entry
+            return True
+
+        index = key % self._capacity
+        old = self._slots[index]
+        if old is None:
+            self._size += 1
+        elif self._policy == DEPTH and old[0] != key and old[1] > depth:
+            return False
+        self._slots[index] = entry
+        return True
+
+    def lookup(self, key):
+        """
+        Looks up the entry for a position.
+        :param key: hash of the position (int)
+        :return: entry (tuple: (key, depth, value, flag, move)), or None if the position is not in the table
+        """
+        if self._policy == LRU:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        else:
+            entry = self._slots[key % self._capacity]
+            if entry is not None and entry[0] != key:
+                entry = None
+
+        if entry is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return entry
+
+    def __contains__(self, key):
+        """
+        Checks if a position is in the table, without counting it as a hit or miss or changing LRU order.
+        :param key: hash of the position (int)
+        :return: boolean
+        """
+        if self._policy == LRU:
+            return key in self._entries
+        entry = self._slots[key % self._capacity]
+        return entry is not None and entry[0] == key
+
+    def __len__(self):
+        """
+        :return: number of entries in the table (int)
+        """
+        if self._policy == LRU:
+            return len(self._entries)
+        return self._size
+
+    def clear(self):
+        """
+        Removes all entries and resets the hit and miss counts.
+        :return: None
+        """
+        self._hits = 0
+        self._misses = 0
+        if self._policy == LRU:
+            self._entries.clear()
+        else:
+            self._slots = [None] * self._capacity
+            self._size = 0
+
+    def get_capacity(self):
+        """
+        :return: maximum number of entries (int)
+        """
+        return self._capacity
+
+    def get_policy(self):
+        """
+        :return: replacement policy (string)
+        """
+        return self._policy
+
+    def get_hits(self):
+        """
+        :return: number of lookups that found an entry (int)
+        """
+        return self._hits
+
+    def get_misses(self):
+        """
+        :return: number of lookups that did not find an entry (int)
+        """
+        return self._misses
@@ -0,0 +1,319 @@
+#Description: Contains the Rules class, which describes a FocusGame variant and holds the precomputed tables for it.
+
+import move_tables
+import zobrist
+
+STANDARD_BOARD_SIZE = 6
+STANDARD_STACK_CAP = 5
+STANDARD_WIN_CAPTURES = 6
+
+# a packed stack (see compact_game.pack_stack) stores its height in 3 bits
+MAX_STACK_CAP = 7
+
+# values in an opening layout
+EMPTY = -1
+PLAYER_A = 0
+PLAYER_B = 1
+
+# Move tables are shared by every Rules object with the same board and stack cap, and Zobrist keys by every Rules
+# object with the same number of cells, stack cap and pieces.
+_move_tables = {}
+_zobrist_keys = {}
+
+# most pairs of colors a Rules object keeps the opening pieces for (see Rules.get_opening_pieces) before starting over
+_MAX_OPENING_PIECES = 1024
+
+
+def generate_opening(board_size, coords, edge_extensions=False):
+    """
+    Generates the opening layout: one piece on every space of the square in the middle of the board, in pairs of the
+    same color that alternate along each row, with each row the row above with the colors swapped (player A's pieces
+    start the first row). The edge extensions start empty. On the standard board this is the starting position of
+    FocusGame.
+    :param board_size: number of rows and columns of the square in the middle of the board (int)
+    :param coords: coordinates of each cell, from move_tables.build_coords (list of tuples)
+    :param edge_extensions: whether the board has edge extensions (boolean)
+    :return: owner of the piece on each cell: PLAYER_A, PLAYER_B or EMPTY (tuple of ints)
+    """
+    offset = 1 if edge_extensions else 0
+    opening = []
+    for row, col in coords:
+        row -= offset
+        col -= offset
+        if 0 <= row < board_size and 0 <= col < board_size:
+            opening.append((row + col // 2) % 2)
+        else:
+            opening.append(EMPTY)
+    return tuple(opening)
+
+
+def build_move_tables(board_size, edge_extensions, stack_cap):
+    """
+    Builds, or looks up, the move tables for a board. The standard board uses the tables in move_tables, so standard
+    games use the same table objects as before.
+    :param board_size: number of rows and columns of the square in the middle of the board (int)
+    :param edge_extensions: whether the board has edge extensions (boolean)
+    :param stack_cap: most pieces a stack can hold, which is also the longest move (int)
+    :return: coords, cell index, coordinate moves by height, and coordinate distances (tuple)
+    """
+    key = (board_size, edge_extensions, stack_cap)
+    if key not in _move_tables:
+        if key == (STANDARD_BOARD_SIZE, False, STANDARD_STACK_CAP):
+            _move_tables[key] = (move_tables.COORDS, move_tables.CELL_INDEX, move_tables.COORD_MOVES_BY_HEIGHT,
+                                 move_tables.COORD_DISTANCES)
+        else:
+            coords = move_tables.build_coords(board_size, edge_extensions)
+            move_table = move_tables.build_move_table(coords, stack_cap)
+            moves_by_height = move_tables.build_moves_by_height(move_table, len(coords), stack_cap)
+            distances = move_tables.build_distances(move_table, len(coords))
+            _move_tables[key] = (coords, move_tables.build_cell_index(coords),
+                                 move_tables.build_coord_moves(moves_by_height, coords),
+                                 move_tables.build_coord_distances(distances, coords))
+    return _move_tables[key]
+
+
+def build_zobrist_keys(num_cells, stack_cap, num_pieces):
+    """
+    Builds, or looks up, the Zobrist keys for a board. The standard board uses the keys in zobrist, so standard games
+    hash the same as CompactFocusGame and the files written by position_db.
+    :param num_cells: number of cells on the board (int)
+    :param stack_cap: most pieces a stack can hold (int)
+    :param num_pieces: number of pieces in the opening layout (int)
+    :return: piece keys, reserved keys, captured keys and turn keys (tuple of lists)
+    """
+    key = (num_cells, stack_cap, num_pieces)
+    if key not in _zobrist_keys:
+        if key == (zobrist.NUM_CELLS, zobrist.MAX_STACK, zobrist.MAX_COUNT):
+            _zobrist_keys[key] = (zobrist.PIECE_KEYS, zobrist.RESERVED_KEYS, zobrist.CAPTURED_KEYS, zobrist.TURN_KEYS)
+        else:
+            _zobrist_keys[key] = zobrist.build_keys(num_cells, 2 * stack_cap, num_pieces)
+    return _zobrist_keys[key]
+
+
+class Rules:
+    """
+    Represents the rules of a FocusGame variant: the size of the board, whether it has the 1x4 edge extensions of the
+    original Focus board, how many pieces a stack can hold before pieces are taken off the bottom, how many captured
+    pieces win the game, and the opening layout.
+    The tables a game needs (the spaces on the board, the moves from each space for each stack height, the distance
+    between every pair of spaces, and the Zobrist keys) are built when a Rules object is made, and shared by every
+    Rules object for the same board. A FocusGame only looks things up in these tables during play, so a variant costs
+    no more per move than the standard game, which uses the tables in move_tables unchanged.
+    Spaces are numbered row by row, and that order is used for cells in set_position. With edge extensions, the board
+    is drawn in a square two spaces wider than the middle of the board, and coordinates start from its top-left corner.
+    """
+
+    def __init__(self, board_size=STANDARD_BOARD_SIZE, edge_extensions=False, stack_cap=STANDARD_STACK_CAP,
+                 win_captures=STANDARD_WIN_CAPTURES, opening=None):
+        """
+        Initializes the rules and builds (or looks up) their tables.
+        :param board_size: number of rows and columns of the square in the middle of the board; must be even (int)
+        :param edge_extensions: whether to add a strip of board_size - 2 spaces along each edge (boolean)
+        :param stack_cap: most pieces a stack can hold, from 1 to 7 (int)
+        :param win_captures: number of captured pieces that wins the game (int)
+        :param opening: owner of the piece on each cell at the start, PLAYER_A, PLAYER_B or EMPTY, or None for the
+            generated layout (see generate_opening) (sequence of ints)
+        """
+        if board_size < 2 or board_size % 2:
+            raise ValueError("Board size must be an even number of at least 2")
+        if not 1 <= stack_cap <= MAX_STACK_CAP:
+            raise ValueError("Stack cap must be between 1 and " + str(MAX_STACK_CAP))
+        if win_captures < 1:
+            raise ValueError("Win threshold must be at least 1")
+        self._board_size = board_size
+        self._edge_extensions = bool(edge_extensions)
+        self._stack_cap = stack_cap
+        self._win_captures = win_captures
+        self._coords, self._cell_index, self._coord_moves, self._coord_distances = \
+            build_move_tables(board_size, self._edge_extensions, stack_cap)
+        self._grid_size = board_size + 2 if self._edge_extensions else board_size
+
+        if opening is None:
+            opening = generate_opening(board_size, self._coords, self._edge_extensions)
+        opening = tuple(opening)
+        if len(opening) != len(self._coords) or any(owner not in (EMPTY, PLAYER_A, PLAYER_B) for owner in opening):
+            raise ValueError("Opening must give PLAYER_A, PLAYER_B or EMPTY for each of the %d cells"
+                             % len(self._coords))
+        self._opening = opening
+
+        # the opening laid out on the grid, with None for spaces that are not on the board
+        self._opening_rows = [[None] * self._grid_size for row in range(self._grid_size)]
+        for (row, col), owner in zip(self._coords, opening):
+            self._opening_rows[row][col] = owner
+
+        # the opening rows with the players' colors filled in, for each pair of colors games have been started with
+        self._opening_pieces = {}
+
+        # moves from each space for each stack height, keyed by the space's coordinates
+        self._moves_by_position = dict(zip(self._coords, self._coord_moves))
+
+        num_pieces = len(opening) - opening.count(EMPTY)
+        self._piece_keys, self._reserved_keys, self._captured_keys, self._turn_keys = \
+            build_zobrist_keys(len(self._coords), stack_cap, num_pieces)
+        self._position_keys = dict(zip(self._coords, self._piece_keys))
+
+    def __copy__(self):
+        """
+        Rules never change once made, so copies of a game share them.
+        :return: self (Rules object)
+        """
+        return self
+
+    def __deepcopy__(self, memo):
+        """
+        Rules never change once made, so deep copies of a game share them instead of copying every table.
+        :param memo: objects already copied (dict)
+        :return: self (Rules object)
+        """
+        return self
+
+    def is_standard(self):
+        """
+        :return: whether these are the standard rules, which CompactFocusGame and the engines built on it use (boolean)
+        """
+        return self._coords is move_tables.COORDS and self._win_captures == STANDARD_WIN_CAPTURES and \
+            self._opening == STANDARD_RULES._opening
+
+    def cell_index(self, position):
+        """
+        Looks up the cell index of a position.
+        :param position: coordinates of space (tuple or list: (row, col))
+        :return: cell index, or move_tables.OFF_BOARD if the position is not on the board (int)
+        """
+        try:
+            return self._cell_index.get(position, move_tables.OFF_BOARD)
+        except TypeError:
+            # unhashable coordinates, such as a list
+            return self._cell_index.get(tuple(position), move_tables.OFF_BOARD)
+
+    def coord_distance(self, orig_coord, dest_coord):
+        """
+        Looks up the number of pieces needed to move between two positions.
+        :param orig_coord: coordinates of origin space (tuple or list: (row, col))
+        :param dest_coord: coordinates of destination space (tuple or list: (row, col))
+        :return: distance, 0 for the same space, -1 if the spaces are not in line, or None if either position is not on
+            the board (int). Neither 0 nor -1 is a number of pieces that can be moved, so callers check the count first.
+        """
+        try:
+            return self._coord_distances.get((orig_coord, dest_coord))
+        except TypeError:
+            # unhashable coordinates, such as lists
+            return self._coord_distances.get((tuple(orig_coord), tuple(dest_coord)))
+
+    def get_board_size(self):
+        """
+        :return: number of rows and columns of the square in the middle of the board (int)
+        """
+        return self._board_size
+
+    def has_edge_extensions(self):
+        """
+        :return: whether the board has edge extensions (boolean)
+        """
+        return self._edge_extensions
+
+    def get_grid_size(self):
+        """
+        :return: number of rows and columns of the square the board is drawn in (int)
+        """
+        return self._grid_size
+
+    def get_stack_cap(self):
+        """
+        :return: most pieces a stack can hold (int)
+        """
+        return self._stack_cap
+
+    def get_win_captures(self):
+        """
+        :return: number of captured pieces that wins the game (int)
+        """
+        return self._win_captures
+
+    def get_opening(self):
+        """
+        :return: owner of the piece on each cell at the start of the game (tuple of ints)
+        """
+        return self._opening
+
+    def get_opening_rows(self):
+        """
+        :return: the opening on the grid, by row and column, with None for spaces that are not on the board
+            (list of lists)
+        """
+        return self._opening_rows
+
+    def get_opening_pieces(self, color_a, color_b):
+        """
+        Looks up, or lays out the first time a pair of colors is used, the starting piece of every space of the grid,
+        so that a new game only has to make a Space from each one.
+        :param color_a: player A's color, upper case (string)
+        :param color_b: player B's color, upper case (string)
+        :return: the opening on the grid, by row and column, with the color of the piece on each space, "" for an empty
+            space, and None for spaces that are not on the board (list of tuples)
+        """
+        key = (color_a, color_b)
+        rows = self._opening_pieces.get(key)
+        if rows is None:
+            pieces = (color_a, color_b, "")
+            rows = [tuple(pieces[owner] if owner is not None else None for owner in row)
+                    for row in self._opening_rows]
+            if len(self._opening_pieces) >= _MAX_OPENING_PIECES:
+                self._opening_pieces.clear()
+            self._opening_pieces[key] = rows
+        return rows
+
+    def get_coords(self):
+        """
+        :return: coordinates of each cell, in cell index order (list of tuples)
+        """
+        return self._coords
+
+    def get_cell_indexes(self):
+        """
+        :return: cell index of every position on the board (dict)
+        """
+        return self._cell_index
+
+    def get_moves_by_position(self):
+        """
+        :return: stack moves from each position for each stack height, keyed by position, in the same form as
+            FocusGame.legal_moves (dict of lists of tuples)
+        """
+        return self._moves_by_position
+
+    def get_piece_keys(self):
+        """
+        :return: Zobrist keys for pieces, indexed by [cell][level][owner] (list)
+        """
+        return self._piece_keys
+
+    def get_position_keys(self):
+        """
+        :return: the same keys as get_piece_keys for each cell, keyed by position, indexed by [level][owner] (dict)
+        """
+        return self._position_keys
+
+    def get_reserved_keys(self):
+        """
+        :return: Zobrist keys for reserved counts, indexed by [player][count] (list)
+        """
+        return self._reserved_keys
+
+    def get_captured_keys(self):
+        """
+        :return: Zobrist keys for captured counts, indexed by [player][count] (list)
+        """
+        return self._captured_keys
+
+    def get_turn_keys(self):
+        """
+        :return: Zobrist keys for the side to move, indexed by [turn + 1] (list)
+        """
+        return self._turn_keys
+
+
+STANDARD_RULES = Rules()
+
+# the original Focus board: the 6x6 square with a 1x4 strip along each edge, 52 spaces in all
+ORIGINAL_RULES = Rules(edge_extensions=True)
@@ -0,0 +1,90 @@
+#Description: Contains the random keys and helper functions used to compute Zobrist hashes of FocusGame positions.
+
+import random
+
+NUM_CELLS = 36
+MAX_STACK = 5
+
+# packed stack layout used by CompactFocusGame: 3 height bits, then one owner bit per piece
+HEIGHT_BITS = 3
+HEIGHT_MASK = (1 << HEIGHT_BITS) - 1
+
+# A stack can hold up to 10 pieces for a moment (5 moved onto 5) before it is cut back down to 5.
+MAX_LEVELS = 2 * MAX_STACK
+
+# Reserved and captured counts can never go above the total number of pieces on the board.
+MAX_COUNT = NUM_CELLS
+
+SEED = 20201129
+
+
+def build_keys(num_cells, max_levels, max_count, seed=SEED):
+    """
+    Draws a full set of random keys for a board. Keys are always drawn in the same order, so the same arguments give
+    the same keys.
+    :param num_cells: number of cells on the board (int)
+    :param max_levels: tallest a stack can be, including the moment before it is cut back down (int)
+    :param max_count: highest reserved or captured count (int)
+    :param seed: random seed (int)
+    :return: piece keys, reserved keys, captured keys and turn keys, laid out as described below (tuple of lists)
+    """
+    rng = random.Random(seed)
+    piece_keys = [[(rng.getrandbits(64), rng.getrandbits(64)) for level in range(max_levels)]
+                  for cell in range(num_cells)]
+    reserved_keys = [[rng.getrandbits(64) for count in range(max_count + 1)] for player in range(2)]
+    captured_keys = [[rng.getrandbits(64) for count in range(max_count + 1)] for player in range(2)]
+    turn_keys = [rng.getrandbits(64) for turn in range(3)]
+    return piece_keys, reserved_keys, captured_keys, turn_keys
+
+
+# PIECE_KEYS[cell][level][owner] is the key for a piece of owner 0 (player A) or 1 (player B) at a given level of a
+# stack, with level 0 at the bottom.
+# RESERVED_KEYS[player][count] and CAPTURED_KEYS[player][count] are the keys for a player's reserved and captured counts.
+# TURN_KEYS[turn + 1] is the key for the side to move, where turn is -1 (either player), 0 (player A) or 1 (player B).
+PIECE_KEYS, RESERVED_KEYS, CAPTURED_KEYS, TURN_KEYS = build_keys(NUM_CELLS, MAX_LEVELS, MAX_COUNT)
+
+
+def hash_stack(cell, owners, piece_keys=PIECE_KEYS):
+    """
+    Computes the hash of one stack from the owners of its pieces.
+    :param cell: index of the cell holding the stack, row * 6 + col (int)
+    :param owners: owner of each piece, bottom-most piece at index 0 (iterable of 0 or 1)
+    :param piece_keys: piece keys of the board, for boards other than the standard one (list)
+    :return: hash (int)
+    """
+    keys = piece_keys[cell]
+    value = 0
+    level = 0
+    for owner in owners:
+        value ^= keys[level][owner]
+        level += 1
+    return value
+
+
+def _hash_code(cell, code):
+    """
+    Computes the hash of one stack packed in the CompactFocusGame encoding.
+    :param cell: index of the cell holding the stack (int)
+    :param code: packed stack (int)
+    :return: hash (int)
+    """
+    bits = code >> HEIGHT_BITS
+    return hash_stack(cell, [(bits >> level) & 1 for level in range(code & HEIGHT_MASK)])
+
+
+# CELL_KEYS[cell][code] is the hash of the packed stack code at a cell, so CompactFocusGame can update a cell's hash
+# with one lookup. It gives the same value as hash_stack for the same stack, so both engines hash positions identically.
+CELL_KEYS = [[_hash_code(cell, code) for code in range(1 << (HEIGHT_BITS + MAX_STACK))] for cell in range(NUM_CELLS)]
+
+
+def hash_counts(player, reserved, captured, reserved_keys=RESERVED_KEYS, captured_keys=CAPTURED_KEYS):
+    """
+    Computes the part of the hash for one player's reserved and captured counts.
+    :param player: player index, 0 for player A and 1 for player B (int)
+    :param reserved: number of reserved pieces (int)
+    :param captured: number of captured pieces (int)
+    :param reserved_keys: reserved keys of the board, for boards other than the standard one (list)
+    :param captured_keys: captured keys of the board, for boards other than the standard one (list)
+    :return: hash (int)
+    """
+    return reserved_keys[player][reserved] ^ captured_keys[player][captured]